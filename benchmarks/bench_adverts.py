@@ -0,0 +1,185 @@
+"""
+Advert store benchmark: what keeping raw advertisement payloads costs in
+write time and disk, against the old one-row-per-property layout.
+
+A crowd of devices is stored cycle by cycle through store_cycle with
+realistic payloads (iBeacon and continuity manufacturer data, Eddystone
+service data, service UUIDs, TX power), a share of which change every
+cycle the way rotating phone advertisements do. The property-table figure
+writes the same payloads as name/value strings into a table shaped like
+the former device_properties.
+
+Usage:
+    python benchmarks/bench_adverts.py [--devices 500] [--cycles 200] [--changing 0.3]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.context import AppContext
+
+EDDYSTONE = '0000feaa-0000-1000-8000-00805f9b34fb'
+BATTERY = '0000180f-0000-1000-8000-00805f9b34fb'
+HEART_RATE = '0000180d-0000-1000-8000-00805f9b34fb'
+
+def make_adverts(rng: random.Random, index: int) -> dict:
+    """One device's advertisement properties."""
+    kind = index % 4
+    if kind == 0:
+        # Apple continuity, rotated by the phone every few minutes
+        return {'ManufacturerData': {0x004C: bytes([0x10, 0x05]) + rng.randbytes(5)}, 'TxPower': 12}
+    if kind == 1:
+        return {'ManufacturerData': {0x004C: bytes([0x02, 0x15]) + rng.randbytes(21)}, 'TxPower': -59}
+    if kind == 2:
+        return {'ServiceData': {EDDYSTONE: bytes([0x10, 0xEB]) + rng.randbytes(12)}, 'UUIDs': [EDDYSTONE]}
+    return {'ManufacturerData': {0x0075: rng.randbytes(24)}, 'UUIDs': [BATTERY, HEART_RATE], 'TxPower': 4}
+
+def make_batches(args) -> list:
+    rng = random.Random(1)
+    macs = [':'.join(f"{b:02X}" for b in (0x40000 + index).to_bytes(6, 'big')) for index in range(args.devices)]
+    adverts = [make_adverts(rng, index) for index in range(args.devices)]
+    start = time.time() - args.cycles * args.interval
+    batches = []
+    for cycle in range(args.cycles):
+        batch = []
+        for index, mac_address in enumerate(macs):
+            if rng.random() < args.changing:
+                adverts[index] = make_adverts(rng, index)
+            device_info = {
+                'mac_address': mac_address,
+                'signal_strength': rng.randint(-95, -40),
+                'adapter': 'hci0',
+                'last_seen': start + cycle * args.interval,
+                'adverts': adverts[index]
+            }
+            batch.append((device_info, {'device_type': 'unknown', 'is_mobile': False}))
+        batches.append(batch)
+    return batches
+
+def property_rows(adverts: dict) -> list:
+    """The name/value string rows the old device_properties layout would hold."""
+    rows = []
+    for company, data in adverts.get('ManufacturerData', {}).items():
+        rows.append((f"ManufacturerData.0x{company:04X}", data.hex()))
+    for uuid, data in adverts.get('ServiceData', {}).items():
+        rows.append((f"ServiceData.{uuid}", data.hex()))
+    if adverts.get('UUIDs'):
+        rows.append(('UUIDs', ','.join(adverts['UUIDs'])))
+    if 'TxPower' in adverts:
+        rows.append(('TxPower', str(adverts['TxPower'])))
+    return rows
+
+def database_bytes(path: str) -> int:
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        page_count, = connection.execute("PRAGMA page_count").fetchone()
+        freelist, = connection.execute("PRAGMA freelist_count").fetchone()
+        page_size, = connection.execute("PRAGMA page_size").fetchone()
+    finally:
+        connection.close()
+    return (page_count - freelist) * page_size
+
+def run_store(batches: list, advert_store: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config_manager = ConfigManager()
+        config_manager.update_config(
+            db_path=os.path.join(tmp, 'bench.db'),
+            log_file=os.path.join(tmp, 'bench.log'),
+            log_level="WARNING",
+            retention_interval=0,
+            advert_store=advert_store
+        )
+        context = AppContext(config_manager=config_manager)
+        storage = context.storage
+        try:
+            timings = []
+            for batch in batches:
+                start = time.perf_counter()
+                storage.store_cycle(batch)
+                timings.append(time.perf_counter() - start)
+            mac_address = batches[0][0][0]['mac_address']
+            start = time.perf_counter()
+            history = storage.get_device_history(mac_address)
+            history_ms = (time.perf_counter() - start) * 1000
+            with storage.engine.connect() as connection:
+                index_bytes = dict(connection.exec_driver_sql(
+                    "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+                ).fetchall()) if advert_store else {}
+            return {
+                'cycle_ms': sorted(timings)[len(timings) // 2] * 1000,
+                'db_bytes': database_bytes(config_manager.get_config().db_path),
+                'index_bytes': sum(size for name, size in index_bytes.items() if name.startswith('advert_')),
+                'segment_bytes': storage.adverts.size(),
+                'history_ms': history_ms,
+                'history_with_adverts': sum(1 for entry in history if entry['properties']),
+                'history_rows': len(history)
+            }
+        finally:
+            context.close()
+
+def run_property_table(batches: list) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'properties.db')
+        connection = sqlite3.connect(path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE device_properties (
+                id INTEGER PRIMARY KEY, scan_result_id INTEGER,
+                property_name VARCHAR, property_value VARCHAR, timestamp DATETIME
+            )
+        """)
+        connection.execute("CREATE INDEX ix_device_properties_scan_result_id ON device_properties (scan_result_id)")
+        scan_result_id = 0
+        timings = []
+        for batch in batches:
+            rows = []
+            for device_info, _ in batch:
+                scan_result_id += 1
+                stamp = time.strftime('%Y-%m-%d %H:%M:%S.000000', time.gmtime(device_info['last_seen']))
+                rows.extend((scan_result_id, name, value, stamp) for name, value in property_rows(device_info['adverts']))
+            start = time.perf_counter()
+            connection.executemany(
+                "INSERT INTO device_properties (scan_result_id, property_name, property_value, timestamp) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+            connection.commit()
+            timings.append(time.perf_counter() - start)
+        connection.close()
+        return {'cycle_ms': sorted(timings)[len(timings) // 2] * 1000, 'db_bytes': database_bytes(path)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--interval', type=int, default=10, help="Seconds between cycles")
+    parser.add_argument('--changing', type=float, default=0.3, help="Share of payloads that change per cycle")
+    args = parser.parse_args()
+
+    batches = make_batches(args)
+    rows = args.devices * args.cycles
+    without = run_store(batches, advert_store=False)
+    with_store = run_store(batches, advert_store=True)
+    properties = run_property_table(batches)
+
+    print(f"{rows} scan results: {args.devices} devices, {args.cycles} cycles, "
+          f"{args.changing:.0%} of payloads changing per cycle")
+    print(f"{'':<36} {'cycle ms':>9} {'bytes/row':>10}")
+    print(f"{'scan results only':<36} {without['cycle_ms']:9.2f} {without['db_bytes'] / rows:10.1f}")
+    added = with_store['db_bytes'] - without['db_bytes']
+    print(f"{'+ advert store, SQLite growth':<36} {with_store['cycle_ms']:9.2f} {added / rows:10.1f}")
+    print(f"{'  advert index tables':<36} {'':>9} {with_store['index_bytes'] / rows:10.1f}")
+    print(f"{'  segment files':<36} {'':>9} {with_store['segment_bytes'] / rows:10.1f}")
+    print(f"{'property table (payloads only)':<36} {properties['cycle_ms']:9.2f} {properties['db_bytes'] / rows:10.1f}")
+    print(f"device history, {with_store['history_rows']} rows: {without['history_ms']:.1f} ms without payloads, "
+          f"{with_store['history_ms']:.1f} ms with {with_store['history_with_adverts']} payloads")
+
+if __name__ == "__main__":
+    main()
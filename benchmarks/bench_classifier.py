@@ -0,0 +1,112 @@
+"""
+Classifier micro-benchmark: legacy per-call rule scan vs. compiled, memoized
+rules, plus classify_many over a large synthetic corpus.
+
+Usage:
+    python benchmarks/bench_classifier.py [--calls 200000] [--devices 2000] [--corpus 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.classifier import DeviceClassifier
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.logger import Logger
+
+NAMES = ['iPhone', 'Galaxy S23', 'Pixel 8', 'JBL Flip', 'Tile', 'Mi Band', 'LE-Bose', '']
+MANUFACTURERS = ['Apple', 'Samsung', 'Bose', 'Tile Inc', 'Fitbit', '']
+# Smartphone, cellular phone, cordless phone, headset, laptop, wearable, BlueZ int, none
+CLASSES = ['0x5a020c', '0x7a0204', '0x200208', '0x240404', '0x3a010c', 0x000704, 5898764, '']
+
+class LegacyClassifier:
+    """The pre-compilation classify_device algorithm, kept as the baseline."""
+
+    MOBILE_PHONE_CLASSES = {'0x000500', '0x000504', '0x000508'}
+    MOBILE_MANUFACTURERS = {
+        'Apple', 'Samsung', 'Google', 'Xiaomi', 'Huawei',
+        'OnePlus', 'Sony', 'LG', 'Motorola', 'Nokia',
+    }
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    def classify_device(self, device_info: dict) -> dict:
+        classification = {'is_mobile': False, 'device_type': 'unknown', 'confidence': 0.0}
+        if device_info.get('device_class', '') in self.MOBILE_PHONE_CLASSES:
+            classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.8)
+        manufacturer = device_info.get('manufacturer', '').lower()
+        if any(m.lower() in manufacturer for m in self.MOBILE_MANUFACTURERS):
+            if not classification['is_mobile']:
+                classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.7)
+            else:
+                classification['confidence'] = 0.9
+        device_name = device_info.get('device_name', '').lower()
+        mobile_patterns = {'iphone', 'samsung', 'galaxy', 'pixel', 'xiaomi', 'huawei'}
+        if any(pattern in device_name for pattern in mobile_patterns):
+            if not classification['is_mobile']:
+                classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.6)
+            else:
+                classification['confidence'] = min(1.0, classification['confidence'] + 0.2)
+        self.logger.info(
+            f"Device classified: {device_info} as "
+            f"{'mobile phone' if classification['is_mobile'] else 'other device'} "
+            f"(confidence: {classification['confidence']:.2f})"
+        )
+        return classification
+
+def make_devices(count: int, seed: int = 1) -> list:
+    """Build a population of synthetic device_info dicts."""
+    rng = random.Random(seed)
+    return [
+        {
+            'mac_address': f"02:00:00:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}",
+            'device_name': f"{rng.choice(NAMES)} {i % 7}".strip(),
+            'manufacturer': rng.choice(MANUFACTURERS),
+            'device_class': rng.choice(CLASSES),
+            'signal_strength': rng.randint(-95, -30)
+        }
+        for i in range(count)
+    ]
+
+def bench(classify, devices: list, calls: int) -> float:
+    """Return classifications per second over a cyclic stream of devices."""
+    count = len(devices)
+    start = time.perf_counter()
+    for i in range(calls):
+        classify(devices[i % count])
+    return calls / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--devices', type=int, default=2000)
+    parser.add_argument('--corpus', type=int, default=100000)
+    args = parser.parse_args()
+
+    config_manager = ConfigManager()
+    config_manager.update_config(log_level="WARNING")
+    logger = Logger(config_manager)
+    compiled = DeviceClassifier(logger)
+    legacy = LegacyClassifier(logger)
+    devices = make_devices(args.devices)
+
+    legacy_rate = bench(legacy.classify_device, devices, args.calls)
+    compiled_rate = bench(compiled.classify_device, devices, args.calls)
+
+    print(f"legacy:   {legacy_rate:12.0f} calls/s")
+    print(f"compiled: {compiled_rate:12.0f} calls/s  ({compiled_rate / legacy_rate:.1f}x)")
+    print(f"cache:    {compiled.cache_info()}")
+
+    # Batch API over a corpus with many distinct devices; tests/test_classifier.py checks its results
+    corpus = make_devices(args.corpus, seed=2)
+    start = time.perf_counter()
+    results = compiled.classify_many(corpus)
+    batch_rate = len(corpus) / (time.perf_counter() - start)
+    print(f"batch:    {batch_rate:12.0f} devices/s over {len(corpus)} devices, {results.mobile_count()} mobile")
+
+if __name__ == "__main__":
+    main()
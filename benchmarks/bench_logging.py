@@ -0,0 +1,89 @@
+"""
+Logging overhead benchmark: the legacy synchronous, eagerly formatted logger
+vs. the queue-based, lazily formatted and rate-limited Logger, measured as the
+time a classification cycle spends on the scanning thread.
+
+Usage:
+    python benchmarks/bench_logging.py [--devices 5000] [--cycles 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.classifier import DeviceClassifier
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.logger import Logger
+from bench_classifier import make_devices
+
+class LegacyLogger:
+    """The original Logger: synchronous handlers and f-string messages."""
+
+    def __init__(self, log_file: str):
+        self.logger = logging.getLogger("bench_legacy")
+        self.logger.setLevel("INFO")
+        self.logger.propagate = False
+        log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        for handler in (logging.StreamHandler(sys.stdout), logging.FileHandler(log_file)):
+            handler.setFormatter(log_format)
+            self.logger.addHandler(handler)
+
+    def info(self, message: str) -> None:
+        self.logger.info(message)
+
+    def debug(self, message: str) -> None:
+        self.logger.debug(message)
+
+    def log_classification(self, device_info: dict, classification: dict) -> None:
+        self.info(
+            f"Device classified: {device_info} as "
+            f"{'mobile phone' if classification['is_mobile'] else 'other device'} "
+            f"(confidence: {classification['confidence']:.2f})"
+        )
+
+def run_cycles(classifier: DeviceClassifier, devices: list, cycles: int) -> list:
+    """Return per-cycle wall time in milliseconds for classifying every device."""
+    timings = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        for device in devices:
+            classifier.classify_device(device)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=5000)
+    parser.add_argument('--cycles', type=int, default=5)
+    args = parser.parse_args()
+
+    devices = make_devices(args.devices)
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        # Console output goes to /dev/null so the terminal doesn't dominate
+        sys.stdout = devnull
+        try:
+            legacy = DeviceClassifier(LegacyLogger(os.path.join(tmp, 'legacy.log')))
+            legacy_ms = run_cycles(legacy, devices, args.cycles)
+
+            config_manager = ConfigManager()
+            config_manager.update_config(log_level="INFO", log_file=os.path.join(tmp, 'async.log'))
+            logger = Logger(config_manager)
+            pipeline = DeviceClassifier(logger)
+            pipeline_ms = run_cycles(pipeline, devices, args.cycles)
+            logger.close()
+        finally:
+            sys.stdout = stdout
+
+    print(f"{args.devices} devices per cycle, LOG_LEVEL=INFO")
+    print("cycle   legacy ms   async ms")
+    for cycle, (old, new) in enumerate(zip(legacy_ms, pipeline_ms), start=1):
+        print(f"{cycle:>5} {old:11.1f} {new:10.1f}")
+    print(f"mean  {sum(legacy_ms) / len(legacy_ms):11.1f} {sum(pipeline_ms) / len(pipeline_ms):10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Presence engine benchmark: memory per tracked device and the time one batch
+of readings takes, for a crowd of the given size.
+
+Memory is what tracemalloc still sees allocated after every device has been
+fed once and that first batch freed, so it includes the MAC index (the dict
+and the key strings) as well as the slot arrays. Latency is per update()
+call with a reading for every device.
+
+Usage:
+    python benchmarks/bench_presence.py [--devices 10000] [--cycles 50] [--window 16]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.presence import PresenceEngine
+
+def make_readings(count: int, rng: random.Random, now: float) -> list:
+    """One reading per device, RSSI wandering around the thresholds."""
+    return [
+        {
+            'mac_address': f"02:00:00:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}",
+            'signal_strength': rng.randint(-95, -55),
+            'last_seen': now
+        }
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=10000)
+    parser.add_argument('--cycles', type=int, default=50)
+    parser.add_argument('--window', type=int, default=16)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    now = time.time()
+
+    engine = PresenceEngine(window=args.window)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    first = make_readings(args.devices, rng, now)
+    engine.update(first, now)
+    del first
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    batches = [make_readings(args.devices, rng, now + cycle) for cycle in range(1, args.cycles)]
+    timings = []
+    events = 0
+    for cycle, batch in enumerate(batches, start=1):
+        start = time.perf_counter()
+        transitions, _ = engine.update(batch, now + cycle)
+        timings.append(time.perf_counter() - start)
+        events += len(transitions)
+
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    print(f"{args.devices} devices, window {args.window}, {len(timings)} cycles")
+    print(f"slot arrays   {engine.memory_bytes():>10} bytes  {engine.memory_bytes() / args.devices:6.1f} B/device")
+    print(f"total traced  {traced:>10} bytes  {traced / args.devices:6.1f} B/device")
+    print(f"update        p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   "
+          f"{args.devices / (sum(timings) / len(timings)):,.0f} readings/s")
+    print(f"transitions   {events} arrived/left events")
+
+if __name__ == "__main__":
+    main()
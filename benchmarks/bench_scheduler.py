@@ -0,0 +1,232 @@
+"""
+Discovery schedule benchmark: detection latency and radio-on time of the
+fixed schedule against the adaptive one, on replayed crowd scenarios.
+
+Each scenario is a list of device visits (arrival, departure, RSSI and
+advertising interval), generated from a seed or taken from a capture file
+recorded with RECORD_PATH, and both schedules replay exactly the same
+visits on a simulated clock. In a discovery window a device is heard with
+the probability of catching at least one of its advertisements while the
+radio is listening, and a visit is detected at the end of the first
+window that hears it. Processing each window costs --cost-per-device of
+simulated time per device heard, which counts against the CPU budget.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--scenarios night morning event office]
+        [--capture scans.cap] [--seed 1] [--cost-per-device 0.002]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.backends import DEVICE_INTERFACE, read_capture
+from bluetooth_scanner.config import ScannerConfig
+from bluetooth_scanner.metrics import MetricsRegistry
+from bluetooth_scanner.scheduler import AdaptiveSchedule, FixedSchedule
+
+# Share of the time BlueZ's discovery is actually listening for LE adverts
+LISTEN_SHARE = 0.5
+
+class Visit:
+    __slots__ = ('mac_address', 'arrive', 'leave', 'rssi', 'walking_until', 'adv_interval', 'detected_at')
+
+    def __init__(self, mac_address: str, arrive: float, leave: float, rssi: float,
+                 walking_until: float, adv_interval: float):
+        self.mac_address = mac_address
+        self.arrive = arrive
+        self.leave = leave
+        self.rssi = rssi
+        self.walking_until = walking_until
+        self.adv_interval = adv_interval
+        self.detected_at = None
+
+class Crowd:
+    """Builds seeded visits."""
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.visits = []
+
+    def add(self, arrive: float, stay: float) -> None:
+        rng = self.random
+        self.visits.append(Visit(
+            ':'.join(f"{rng.randrange(256):02X}" for _ in range(6)),
+            arrive, arrive + stay, rng.uniform(-90, -50),
+            arrive + rng.uniform(60, 300),
+            # Phones in the background advertise every second or so, trackers far less often
+            min(10.0, max(0.1, rng.lognormvariate(0.0, 0.8)))
+        ))
+
+    def poisson(self, start: float, end: float, per_minute, stay) -> None:
+        """Arrivals at a (possibly time-varying) rate, each staying stay() seconds."""
+        rng = self.random
+        t = start
+        while True:
+            rate = per_minute(t) if callable(per_minute) else per_minute
+            t += rng.expovariate(max(rate, 1e-6) / 60)
+            if t >= end:
+                return
+            self.add(t, stay())
+
+def scenario_night(seed: int):
+    """Eight quiet hours: a few devices that never leave and the odd visitor."""
+    crowd = Crowd(seed)
+    duration = 8 * 3600
+    for _ in range(3):
+        crowd.add(0, duration)
+    crowd.poisson(0, duration, 0.015, lambda: crowd.random.uniform(300, 1200))
+    return crowd.visits, duration
+
+def scenario_morning(seed: int):
+    """A room filling up over an hour, then people drifting in and out."""
+    crowd = Crowd(seed)
+    duration = 3 * 3600
+    crowd.poisson(0, duration, lambda t: 4.0 * max(0.05, t / 3600) if t < 3600 else 1.0,
+                  lambda: crowd.random.lognormvariate(math.log(2700), 0.5))
+    return crowd.visits, duration
+
+def scenario_event(seed: int):
+    """A steady crowd, then 150 people walking in within five minutes."""
+    crowd = Crowd(seed)
+    duration = 2 * 3600
+    for _ in range(20):
+        crowd.add(0, duration)
+    for _ in range(150):
+        crowd.add(1800 + crowd.random.uniform(0, 300), crowd.random.gauss(2400, 600))
+    return crowd.visits, duration
+
+def scenario_office(seed: int):
+    """A working day: a steady crowd with people coming and going."""
+    crowd = Crowd(seed)
+    duration = 8 * 3600
+    for _ in range(40):
+        crowd.add(0, crowd.random.uniform(3600, duration))
+    crowd.poisson(0, duration, 0.5, lambda: crowd.random.uniform(1800, 14400))
+    return crowd.visits, duration
+
+SCENARIOS = {
+    'night': scenario_night,
+    'morning': scenario_morning,
+    'event': scenario_event,
+    'office': scenario_office,
+}
+
+def scenario_from_capture(path: str, seed: int):
+    """Visits of the devices in a capture: one per run of frames a MAC appears in."""
+    frames = [(captured_at, objects) for captured_at, objects in read_capture(path)]
+    if not frames:
+        raise ValueError(f"{path} holds no frames")
+    start = frames[0][0]
+    spacing = (frames[-1][0] - start) / max(len(frames) - 1, 1)
+    rng = random.Random(seed)
+    open_visits, visits = {}, []
+    for captured_at, objects in frames:
+        seen = {}
+        for interfaces in objects.values():
+            properties = interfaces.get(DEVICE_INTERFACE)
+            if properties and properties.get('RSSI'):
+                seen[properties['Address']] = properties['RSSI']
+        for mac_address, rssi in seen.items():
+            visit = open_visits.get(mac_address)
+            if visit is None:
+                visit = Visit(mac_address, captured_at - start, 0, rssi, captured_at - start,
+                              min(10.0, max(0.1, rng.lognormvariate(0.0, 0.8))))
+                open_visits[mac_address] = visit
+                visits.append(visit)
+            visit.leave = captured_at - start + spacing
+        for mac_address in [mac for mac, visit in open_visits.items() if mac not in seen]:
+            del open_visits[mac_address]
+    return visits, frames[-1][0] - start + spacing
+
+def replay(schedule, clock: list, visits: list, duration: float, cost_per_device: float, seed: int) -> dict:
+    """Run one schedule over the visits; clock[0] is the simulated time it reads."""
+    rng = random.Random(seed)
+    for visit in visits:
+        visit.detected_at = None
+    pending = sorted(visits, key=lambda visit: visit.arrive)
+    upcoming = 0
+    active = []
+    radio_on = busy_total = 0.0
+    cycles = 0
+    while clock[0] < duration:
+        window, gap = schedule.next_cycle()
+        start, end = clock[0], clock[0] + window
+        while upcoming < len(pending) and pending[upcoming].arrive < end:
+            active.append(pending[upcoming])
+            upcoming += 1
+        active = [visit for visit in active if visit.leave > start]
+
+        heard = {}
+        for visit in active:
+            overlap = min(end, visit.leave) - max(start, visit.arrive)
+            if overlap <= 0:
+                continue
+            if rng.random() < 1 - math.exp(-LISTEN_SHARE * overlap / visit.adv_interval):
+                spread = 9 if start < visit.walking_until else 3
+                heard[visit.mac_address] = max(-127, min(-20, round(rng.gauss(visit.rssi, spread))))
+                if visit.detected_at is None:
+                    visit.detected_at = end
+
+        clock[0] = end
+        schedule.observe(heard)
+        busy = 0.005 + cost_per_device * len(heard)
+        schedule.add_busy(busy)
+        clock[0] += busy + gap
+        radio_on += window
+        busy_total += busy
+        cycles += 1
+
+    latencies = sorted(visit.detected_at - visit.arrive for visit in visits if visit.detected_at is not None)
+    missed = sum(1 for visit in visits if visit.detected_at is None)
+    elapsed = clock[0]
+    return {
+        'radio_on': radio_on / elapsed,
+        'busy': busy_total / elapsed,
+        'cycles': cycles,
+        'p50': latencies[len(latencies) // 2] if latencies else float('nan'),
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else float('nan'),
+        'missed': missed,
+        'visits': len(visits),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--capture', action='append', default=[], help="Also replay the visits in a capture file")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--cost-per-device', type=float, default=0.002,
+                        help="Simulated processing seconds per device heard")
+    args = parser.parse_args()
+
+    # The shipped defaults of both schedules
+    config = ScannerConfig()
+    scenarios = [(name, SCENARIOS[name](args.seed)) for name in args.scenarios]
+    scenarios += [(os.path.basename(path), scenario_from_capture(path, args.seed)) for path in args.capture]
+
+    print(f"fixed: {config.scan_duration}s windows, {config.scan_interval}s gaps; adaptive: windows "
+          f"{config.scan_duration_min:g}-{config.scan_duration_max:g}s, gaps "
+          f"{config.scan_interval_min:g}-{config.scan_interval_max:g}s, CPU budget {config.schedule_cpu_budget:.0%}")
+    print(f"{'scenario':<12} {'schedule':<9} {'visits':>7} {'missed':>7} {'p50 s':>7} {'p95 s':>7} "
+          f"{'radio on':>9} {'cpu':>6} {'cycles':>7}")
+    for name, (visits, duration) in scenarios:
+        for label in ('fixed', 'adaptive'):
+            clock = [0.0]
+            metrics = MetricsRegistry(enabled=False)
+            if label == 'fixed':
+                schedule = FixedSchedule(config.scan_duration, config.scan_interval, metrics)
+            else:
+                schedule = AdaptiveSchedule(
+                    config.scan_duration_min, config.scan_duration_max,
+                    config.scan_interval_min, config.scan_interval_max,
+                    config.schedule_cpu_budget, metrics, clock=lambda: clock[0]
+                )
+            result = replay(schedule, clock, visits, duration, args.cost_per_device, args.seed)
+            print(f"{name:<12} {label:<9} {result['visits']:7d} {result['missed']:7d} {result['p50']:7.1f} "
+                  f"{result['p95']:7.1f} {result['radio_on']:9.1%} {result['busy']:6.1%} {result['cycles']:7d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Standard vs compact schema benchmark: database size and query times for a
+synthetic month of scan results.
+
+Each schema gets a fresh database filled with the same readings, a fixed
+crowd of devices seen every --interval seconds for --days days, written in
+store-sized batches through the storage layer's insert path.
+
+Usage:
+    python benchmarks/bench_schema.py [--devices 100] [--interval 60] [--days 30]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import insert
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.context import AppContext
+from bluetooth_scanner.storage import Device, pack_mac
+
+TYPES = ['mobile_phone', 'audio_video', 'wearable', 'computer', 'unknown']
+BATCH_SIZE = 50000
+
+def make_devices(count: int) -> list:
+    rng = random.Random(count)
+    return [
+        {
+            'mac_address': ':'.join(f"{rng.randrange(256):02X}" for _ in range(6)),
+            'device_type': rng.choice(TYPES),
+        }
+        for _ in range(count)
+    ]
+
+def readings(devices: list, start: datetime, days: int, interval: int):
+    """Yield scan result dicts for every device at every interval."""
+    rng = random.Random(1)
+    for step in range(days * 86400 // interval):
+        scan_time = start + timedelta(seconds=step * interval)
+        for device in devices:
+            yield {
+                'device_mac': device['mac_address'],
+                'scan_time': scan_time,
+                'signal_strength': rng.randint(-95, -40),
+                'device_type': device['device_type'],
+                'is_mobile': device['device_type'] == 'mobile_phone',
+                'adapter': 'hci0',
+            }
+
+def timed(function, *args, repeat: int = 5) -> float:
+    """Best of repeat runs, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def table_sizes(storage) -> dict:
+    """Bytes per table and index, where SQLite was built with dbstat."""
+    try:
+        with storage.engine.connect() as connection:
+            return dict(connection.exec_driver_sql(
+                "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+            ).fetchall())
+    except Exception:
+        return {}
+
+def run_schema(mode: str, devices: list, start: datetime, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, f'{mode}.db')
+        config_manager = ConfigManager()
+        config_manager.update_config(
+            db_path=db_path,
+            log_file=os.path.join(tmp, 'bench.log'),
+            log_level="WARNING",
+            schema_mode=mode,
+            retention_interval=0,
+            retention_days=args.days - 1
+        )
+        context = AppContext(config_manager=config_manager)
+        storage = context.storage
+        try:
+            session = storage.Session()
+            session.execute(insert(Device), [
+                {'mac_address': device['mac_address'], 'device_id': pack_mac(device['mac_address']),
+                 'first_seen': start, 'last_seen': start + timedelta(days=args.days)}
+                for device in devices
+            ])
+            session.commit()
+
+            rows = 0
+            batch = []
+            write_start = time.perf_counter()
+            for reading in readings(devices, start, args.days, args.interval):
+                batch.append(reading)
+                if len(batch) >= BATCH_SIZE:
+                    storage._insert_scan_results(session, batch)
+                    session.commit()
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                storage._insert_scan_results(session, batch)
+                session.commit()
+                rows += len(batch)
+            write_seconds = time.perf_counter() - write_start
+            session.close()
+
+            with storage.engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            size = os.path.getsize(db_path)
+            sizes = table_sizes(storage)
+
+            mac_address = devices[0]['mac_address']
+            month_end = start + timedelta(days=args.days)
+            hour_start = month_end - timedelta(hours=12)
+            queries = {
+                'device history, 1 day': timed(
+                    lambda: storage.get_device_history(mac_address, days=1)
+                ),
+                'export 1 hour, all devices': timed(
+                    lambda: sum(1 for _ in storage.iter_scan_history(hour_start, hour_start + timedelta(hours=1)))
+                ),
+                'export month, 1 device': timed(
+                    lambda: sum(1 for _ in storage.iter_scan_history(mac_addresses=[mac_address])), repeat=3
+                ),
+            }
+            cleanup_start = time.perf_counter()
+            deleted = storage.cleanup_old_data()['scan_results']
+            queries[f'retention, {deleted} rows'] = (time.perf_counter() - cleanup_start) * 1000
+        finally:
+            context.close()
+
+    return {
+        'rows': rows,
+        'write_rows_per_sec': rows / write_seconds,
+        'file_bytes': size,
+        'table_bytes': sizes,
+        'queries_ms': queries,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--interval', type=int, default=60, help="Seconds between readings of a device")
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    devices = make_devices(args.devices)
+    # Readings end now, so "the last day" queries hit real data
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(days=args.days)
+    results = {mode: run_schema(mode, devices, start, args) for mode in ('standard', 'compact')}
+
+    standard, compact = results['standard'], results['compact']
+    print(f"{standard['rows']} scan results: {args.devices} devices every {args.interval}s for {args.days} days")
+    print(f"{'':<32} {'standard':>12} {'compact':>12} {'ratio':>7}")
+    print(f"{'file MiB':<32} {standard['file_bytes'] / 1048576:12.1f} "
+          f"{compact['file_bytes'] / 1048576:12.1f} {compact['file_bytes'] / standard['file_bytes']:7.2f}")
+    print(f"{'bytes per row':<32} {standard['file_bytes'] / standard['rows']:12.1f} "
+          f"{compact['file_bytes'] / compact['rows']:12.1f}")
+    print(f"{'insert rows/s':<32} {standard['write_rows_per_sec']:12.0f} {compact['write_rows_per_sec']:12.0f} "
+          f"{compact['write_rows_per_sec'] / standard['write_rows_per_sec']:7.2f}")
+    result_bytes = [
+        sum(value for name, value in results[mode]['table_bytes'].items() if name.startswith(prefixes))
+        for mode, prefixes in (('standard', ('scan_results', 'ix_scan_results')),
+                               ('compact', ('compact_scan_results', 'ix_compact_scan_results')))
+    ]
+    if all(result_bytes):
+        print(f"{'scan results + indexes MiB':<32} {result_bytes[0] / 1048576:12.1f} "
+              f"{result_bytes[1] / 1048576:12.1f} {result_bytes[1] / result_bytes[0]:7.2f}")
+    for (name, standard_ms), compact_ms in zip(standard['queries_ms'].items(), compact['queries_ms'].values()):
+        print(f"{name + ' ms':<32} {standard_ms:12.1f} {compact_ms:12.1f} {compact_ms / standard_ms:7.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Storage throughput benchmark: per-row writes vs. batched store_cycle.
+
+Usage:
+    python benchmarks/bench_storage.py [--sizes 1000 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.logger import Logger
+from bluetooth_scanner.storage import StorageManager
+
+def make_batch(count: int) -> list:
+    """Build (device_info, classification) pairs for synthetic devices."""
+    batch = []
+    for i in range(count):
+        device_info = {
+            'mac_address': ':'.join(f"{b:02X}" for b in i.to_bytes(6, 'big')),
+            'device_name': f"device-{i}",
+            'device_class': '0x5a020c',
+            'manufacturer': 'Apple' if i % 3 == 0 else '',
+            'signal_strength': -40 - (i % 50),
+            'last_seen': time.time()
+        }
+        classification = {
+            'is_mobile': i % 3 == 0,
+            'device_type': 'mobile_phone' if i % 3 == 0 else 'unknown',
+            'confidence': 0.7
+        }
+        batch.append((device_info, classification))
+    return batch
+
+def make_storage(db_path: str) -> StorageManager:
+    """Create a StorageManager on a fresh database with quiet logging."""
+    config_manager = ConfigManager()
+    config_manager.update_config(db_path=db_path, log_level="WARNING")
+    return StorageManager(config_manager, Logger(config_manager))
+
+def bench_per_row(storage: StorageManager, batch: list) -> float:
+    """Time the store_device + store_scan_result path."""
+    start = time.perf_counter()
+    for device_info, classification in batch:
+        storage.store_device(device_info)
+        storage.store_scan_result({
+            'device_mac': device_info['mac_address'],
+            'signal_strength': device_info['signal_strength'],
+            'device_type': classification['device_type'],
+            'is_mobile': classification['is_mobile']
+        })
+    return time.perf_counter() - start
+
+def bench_store_cycle(storage: StorageManager, batch: list) -> float:
+    """Time a single store_cycle call."""
+    start = time.perf_counter()
+    storage.store_cycle(batch)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            batch = make_batch(size)
+            for name, bench in (('per-row', bench_per_row), ('store_cycle', bench_store_cycle)):
+                storage = make_storage(os.path.join(tmp, f"{name}-{size}.db"))
+                elapsed = bench(storage, batch)
+                storage.engine.dispose()
+                print(f"{name:>12} {size:>6} devices: {elapsed:8.3f}s  {size / elapsed:10.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
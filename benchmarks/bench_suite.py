@@ -0,0 +1,274 @@
+"""
+End-to-end benchmark suite: scan cycles, classification, storage and the
+visualizer driven by synthetic device populations, with JSON results that
+can be compared against a stored baseline.
+
+Each population runs in its own process so peak RSS is per population.
+Latencies are per cycle; devices/s is population / mean cycle time. DB
+growth per hour extrapolates the steady-state growth of the scan cycles
+(after the first, which creates every device) at the configured
+SCAN_DURATION + SCAN_INTERVAL cadence. A visualizer frame applies a feed
+delta changing 5% of the devices, then builds the layout and renders it to
+an off-screen console.
+
+Usage:
+    python benchmarks/bench_suite.py [--populations 100 1000 10000 50000]
+        [--cycles 10] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.2] [--min-delta-ms 1.0]
+        [--repeat 3]
+
+Exits with status 1 when any metric is worse than the baseline by more than
+the threshold (0.2 = 20%). Stage timings must also be worse by more than
+min-delta-ms, so stages that take well under a millisecond don't fail on
+timer noise. Each population runs repeat times and every figure is the
+median of the runs, so one disturbed run doesn't fail the comparison.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.backends import SyntheticBackend
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.context import AppContext
+from bluetooth_scanner.scanner import BluetoothScanner
+
+STAGES = ('scanner', 'classifier', 'storage', 'visualizer')
+
+# Share of the devices a feed delta changes between visualizer frames
+VISUALIZER_CHURN = 0.05
+
+# (metric, True when higher is better)
+COMPARED_METRICS = (
+    ('devices_per_sec', True),
+    ('p50_ms', False),
+    ('p99_ms', False),
+)
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+def summarize(timings: list, population: int) -> dict:
+    """Reduce per-cycle timings in seconds to throughput and latency figures."""
+    return {
+        'devices_per_sec': population * len(timings) / sum(timings),
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+    }
+
+def timed(function, *args) -> float:
+    """Run a function and return its wall time in seconds."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def churn_delta(devices: list, rng: random.Random, now: float) -> dict:
+    """A feed delta moving the RSSI and last_seen of VISUALIZER_CHURN of the devices."""
+    changed = [
+        dict(device, signal_strength=rng.randint(-95, -40), last_seen=now)
+        for device in rng.sample(devices, max(1, int(len(devices) * VISUALIZER_CHURN)))
+    ]
+    return {'type': 'delta', 'time': now, 'added': [], 'changed': changed, 'removed': []}
+
+def render_frame(visualizer) -> None:
+    """Build the layout and render it, as one refresh of the live display does."""
+    console = visualizer.console
+    console.render_lines(visualizer.update_display(), console.options.update_height(console.height))
+
+def database_bytes(storage, db_path: str) -> int:
+    """Size of the database file once the write-ahead log is checkpointed into it."""
+    with storage.engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(db_path)
+
+def run_population(population: int, cycles: int) -> dict:
+    """Benchmark every stage at one population size, in a fresh process."""
+    # Imported here so the visualizer's rich dependency only loads in workers
+    from rich.console import Console
+    from bluetooth_scanner.visualizer import BluetoothVisualizer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        config_manager = ConfigManager()
+        config_manager.update_config(
+            db_path=db_path,
+            log_file=os.path.join(tmp, 'bench.log'),
+            log_level="WARNING",
+            retention_interval=0
+        )
+        config = config_manager.get_config()
+        backend = SyntheticBackend(population=population, churn=0.05, seed=population)
+        context = AppContext(config_manager=config_manager, backend=backend)
+        scanner = BluetoothScanner(context)
+        scanner.initialize()
+        try:
+            # Full cycle: snapshot, presence, filtering, classification, storage
+            scanner_times = []
+            sizes = []
+            for _ in range(cycles):
+                scanner_times.append(timed(scanner._process_discovered_devices))
+                sizes.append(database_bytes(scanner.storage, db_path))
+            cycles_per_hour = 3600 / (config.scan_duration + config.scan_interval)
+            growth_per_cycle = (sizes[-1] - sizes[0]) / max(1, cycles - 1)
+
+            devices = [
+                scanner._device_info_from_properties(properties)
+                for properties in scanner._get_device_snapshot().values()
+            ]
+            classifier_times = [timed(scanner.classifier.classify_many, devices) for _ in range(cycles)]
+
+            batch = list(zip(devices, scanner.classifier.classify_many(devices)))
+            storage_times = []
+            for _ in range(cycles):
+                now = time.time()
+                for device_info, _ in batch:
+                    device_info['last_seen'] = now
+                storage_times.append(timed(scanner.storage.store_cycle, batch))
+
+            console = Console(file=io.StringIO(), width=160, height=50, force_terminal=True)
+            visualizer = BluetoothVisualizer(context, console=console)
+            rng = random.Random(population)
+            shown = visualizer.feed.snapshot()
+            visualizer_times = []
+            for _ in range(cycles):
+                visualizer.feed.apply(churn_delta(shown, rng, time.time()))
+                visualizer_times.append(timed(render_frame, visualizer))
+        finally:
+            context.close()
+
+    return {
+        'scanner': summarize(scanner_times, population),
+        'classifier': summarize(classifier_times, population),
+        'storage': summarize(storage_times, population),
+        'visualizer': summarize(visualizer_times, population),
+        'db_growth_bytes_per_hour': growth_per_cycle * cycles_per_hour,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def median_result(runs: list) -> dict:
+    """Combine run_population results into the median of every figure."""
+    combined = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            combined[key] = {metric: statistics.median(run[key][metric] for run in runs) for metric in value}
+        else:
+            combined[key] = statistics.median(run[key] for run in runs)
+    return combined
+
+def cycle_ms(metric: str, value: float, population: int) -> float:
+    """A stage metric as milliseconds per cycle; devices/s becomes the mean cycle time."""
+    if metric == 'devices_per_sec':
+        return population * 1000 / value if value else 0.0
+    return value
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float = 1.0) -> list:
+    """
+    List every metric that is worse than the baseline by more than threshold.
+    A stage metric must also cost more than min_delta_ms per cycle than the
+    baseline, since a relative change of a sub-millisecond stage is noise.
+    """
+    regressions = []
+    for population, current in results['results'].items():
+        previous = baseline.get('results', {}).get(population)
+        if previous is None:
+            continue
+        checks = [
+            (f"{stage}.{metric}", current[stage][metric], previous[stage][metric], higher_is_better,
+             cycle_ms(metric, current[stage][metric], int(population))
+             - cycle_ms(metric, previous[stage][metric], int(population)))
+            for stage in STAGES
+            for metric, higher_is_better in COMPARED_METRICS
+        ]
+        checks += [
+            ('db_growth_bytes_per_hour', current['db_growth_bytes_per_hour'],
+             previous['db_growth_bytes_per_hour'], False, None),
+            ('peak_rss_kb', current['peak_rss_kb'], previous['peak_rss_kb'], False, None),
+        ]
+        for name, value, reference, higher_is_better, delta_ms in checks:
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            if (-change if higher_is_better else change) <= threshold:
+                continue
+            if delta_ms is not None and delta_ms <= min_delta_ms:
+                continue
+            regressions.append((population, name, reference, value, change))
+    return regressions
+
+def print_results(results: dict) -> None:
+    """Print a table of every population and stage."""
+    print(f"{'devices':>8} {'stage':<11} {'devices/s':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    for population, result in results['results'].items():
+        for stage in STAGES:
+            figures = result[stage]
+            print(
+                f"{population:>8} {stage:<11} {figures['devices_per_sec']:12.0f} "
+                f"{figures['p50_ms']:10.1f} {figures['p99_ms']:10.1f}"
+            )
+        print(
+            f"{population:>8} {'db growth':<11} {result['db_growth_bytes_per_hour'] / 1048576:11.1f} MiB/h   "
+            f"peak RSS {result['peak_rss_kb'] / 1024:.0f} MiB"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--populations', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per population, reported as the median")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="Compare against results JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed relative regression before the run fails")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help="Smallest per-cycle slowdown of a stage that counts as a regression")
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cycles': args.cycles,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    for population in args.populations:
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                runs.append(executor.submit(run_population, population, args.cycles).result())
+        results['results'][str(population)] = median_result(runs)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for population, name, reference, value, change in regressions:
+            print(f"REGRESSION {population} {name}: {reference:.1f} -> {value:.1f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
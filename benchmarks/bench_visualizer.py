@@ -0,0 +1,119 @@
+"""
+Visualizer frame-time benchmark: the full table of every device, rebuilt each
+frame, against the paged, cached view, with a share of the devices changing
+between frames as live feed deltas.
+
+A frame is update_display plus rendering the layout to an off-screen
+console of the given size, which is the work one refresh costs.
+
+Usage:
+    python benchmarks/bench_visualizer.py [--devices 10000] [--frames 50]
+        [--churn 0.01] [--width 160] [--height 50]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rich.console import Console
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.context import AppContext
+from bluetooth_scanner.visualizer import SORT_KEYS, BluetoothVisualizer
+
+NAMES = ['iPhone', 'Galaxy S23', 'Pixel 8', 'JBL Flip', 'Tile', 'Mi Band', 'LE-Bose', '']
+
+def make_device(index: int, now: float) -> dict:
+    return {
+        'mac_address': f"{index >> 16 & 0xFF:02X}:{index >> 8 & 0xFF:02X}:{index & 0xFF:02X}:00:00:01",
+        'device_name': random.choice(NAMES),
+        'device_class': '',
+        'manufacturer': '',
+        'signal_strength': random.randint(-95, -40),
+        'device_type': 'mobile_phone' if index % 3 == 0 else 'unknown',
+        'is_mobile': index % 3 == 0,
+        'adapter': 'hci0',
+        'first_seen': now - random.uniform(0, 3600),
+        'last_seen': now - random.uniform(0, 60),
+    }
+
+def churn_delta(devices: list, share: float, now: float) -> dict:
+    """A feed delta moving the RSSI and last_seen of a random share of the devices."""
+    changed = []
+    for device in random.sample(devices, max(1, int(len(devices) * share))):
+        device = dict(device, signal_strength=random.randint(-95, -40), last_seen=now)
+        changed.append(device)
+    return {'type': 'delta', 'time': now, 'added': [], 'changed': changed, 'removed': []}
+
+def legacy_frame(visualizer: BluetoothVisualizer) -> object:
+    """The previous approach: a fresh layout with a row for every device."""
+    layout = visualizer.create_layout()
+    devices = sorted(visualizer.feed.snapshot(), key=SORT_KEYS['last seen'])
+    # A fresh view each frame, so no cells are reused
+    visualizer.view.__init__()
+    layout["body"].update(visualizer.create_device_table(devices))
+    mobile_devices = sum(1 for device in devices if device.get('is_mobile'))
+    layout["footer"].update(visualizer.create_stats_panel(len(devices), mobile_devices))
+    return layout
+
+def measure(visualizer: BluetoothVisualizer, build, frames: int, churn: float) -> list:
+    """Time build plus rendering for each frame, applying churn between frames."""
+    timings = []
+    devices = visualizer.feed.snapshot()
+    for _ in range(frames):
+        if churn:
+            visualizer.feed.apply(churn_delta(devices, churn, time.time()))
+        visualizer.console.file = io.StringIO()
+        start = time.perf_counter()
+        visualizer.console.print(build())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def report(label: str, timings: list) -> None:
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    print(f"{label:<28} p50 {p50:9.2f} ms   p99 {p99:9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=10000)
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--churn', type=float, default=0.01, help="Share of devices changed per frame")
+    parser.add_argument('--width', type=int, default=160)
+    parser.add_argument('--height', type=int, default=50)
+    args = parser.parse_args()
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_manager = ConfigManager()
+        config_manager.update_config(
+            db_path=os.path.join(tmp, 'bench.db'),
+            log_file=os.path.join(tmp, 'bench.log'),
+            log_level="WARNING",
+            feed_timeout=86400
+        )
+        context = AppContext(config_manager=config_manager)
+        console = Console(file=io.StringIO(), width=args.width, height=args.height, force_terminal=True)
+        visualizer = BluetoothVisualizer(context, console=console)
+        now = time.time()
+        visualizer.feed.load([make_device(index, now) for index in range(args.devices)])
+
+        try:
+            print(f"{args.devices} devices, {args.churn:.0%} changing per frame, "
+                  f"{args.width}x{args.height} console")
+            legacy_frames = max(3, args.frames // 10)
+            report("full table", measure(visualizer, lambda: legacy_frame(visualizer), legacy_frames, args.churn))
+            visualizer.view.__init__()
+            report("paged view, changing", measure(visualizer, visualizer.update_display, args.frames, args.churn))
+            report("paged view, idle", measure(visualizer, visualizer.update_display, args.frames, 0.0))
+        finally:
+            context.close()
+
+if __name__ == "__main__":
+    main()
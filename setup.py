@@ -5,6 +5,7 @@ setup(
     version="0.1.0",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    package_data={"bluetooth_scanner": ["data/*.json"]},
     install_requires=[
         "dbus-python>=1.3.2",
         "pydbus>=0.6.0",
@@ -12,10 +13,16 @@ setup(
         "SQLAlchemy>=2.0.0",
         "rich>=13.0.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=10.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "bluetooth-scanner=bluetooth_scanner.__main__:main",
             "bluetooth-visualizer=bluetooth_scanner.visualizer:main",
+            "bluetooth-rollups=bluetooth_scanner.rollups:main",
+            "bluetooth-export=bluetooth_scanner.export:main",
+            "bluetooth-compact=bluetooth_scanner.compact:main",
         ],
     },
     python_requires=">=3.7",
@@ -4,27 +4,38 @@ Main entry point for the Bluetooth scanner.
 import signal
 import sys
 from .scanner import BluetoothScanner
-from .logger import Logger
-from .config import ConfigManager
+from .async_scanner import AsyncBluetoothScanner
+from .context import AppContext
+
+scanner = None
 
 def signal_handler(signum, frame):
     """Handle system signals."""
+    if scanner is None or not scanner.scanning:
+        # Nothing to drain yet, or a second signal while draining
+        sys.exit(0)
     print("\nStopping Bluetooth scanner...")
-    sys.exit(0)
+    # start_scanning returns once buffered readings are stored; main then closes the context
+    scanner.stop_scanning()
 
 def main():
     """Main entry point."""
+    global scanner
+
     # Set up signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     # Initialize components
-    config_manager = ConfigManager()
-    logger = Logger(config_manager)
+    context = AppContext.default()
+    logger = context.logger
     
     try:
         # Create and initialize scanner
-        scanner = BluetoothScanner()
+        if context.config.scanner_mode == 'async':
+            scanner = AsyncBluetoothScanner(context)
+        else:
+            scanner = BluetoothScanner(context)
         
         if not scanner.initialize():
             logger.error("Failed to initialize Bluetooth scanner")
@@ -33,10 +44,12 @@ def main():
         # Start scanning
         logger.info("Starting Bluetooth scanner...")
         scanner.start_scanning()
+        # Write out anything still waiting in the write-behind and log queues
+        context.close()
         
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,256 @@
+"""
+Append-only store for raw advertisement payloads.
+
+The Device1 properties that carry advertisement data (ManufacturerData,
+ServiceData, UUIDs, TxPower) are encoded as one binary record per scan
+result and appended to segment files in a directory next to the database.
+A record is a length and CRC-32 header followed by tag-length-value fields;
+reads go through mmap, so looking up a scan result's payload costs no
+syscalls once its segment is mapped. SQLite keeps only the index from scan
+result to (segment, offset), and whole segments are deleted once retention
+has passed them.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from .logger import Logger
+
+# Device1 properties kept in the advert store
+ADVERT_PROPERTIES = ('ManufacturerData', 'ServiceData', 'UUIDs', 'TxPower')
+
+RECORD_HEADER = struct.Struct('<II')  # payload length, CRC-32 of the payload
+FIELD_HEADER = struct.Struct('<BH')  # tag, value length
+COMPANY_ID = struct.Struct('<H')
+TX_POWER = struct.Struct('<h')
+
+TAG_MANUFACTURER_DATA = 1  # company id, then the data
+TAG_SERVICE_DATA = 2  # UUID length byte, UUID, then the data
+TAG_UUID = 3
+TAG_TX_POWER = 4
+
+SEGMENT_SUFFIX = '.seg'
+
+# Segments mapped for reading at once; older maps are closed first
+MAX_OPEN_MAPS = 32
+
+def _as_bytes(value) -> bytes:
+    """Get the bytes of a payload value: bytes, a D-Bus byte array or text."""
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return bytes(value)
+
+def _field(tag: int, value: bytes) -> bytes:
+    return FIELD_HEADER.pack(tag, len(value)) + value
+
+def encode_adverts(adverts: Dict) -> bytes:
+    """Encode advertisement properties as a record payload."""
+    fields = []
+    for company, data in (adverts.get('ManufacturerData') or {}).items():
+        # pydbus gives integer company ids; recordings keep them as "0x004C"
+        company = int(company, 0) if isinstance(company, str) else int(company)
+        fields.append(_field(TAG_MANUFACTURER_DATA, COMPANY_ID.pack(company) + _as_bytes(data)))
+    for uuid, data in (adverts.get('ServiceData') or {}).items():
+        uuid = uuid.encode('ascii')
+        fields.append(_field(TAG_SERVICE_DATA, bytes((len(uuid),)) + uuid + _as_bytes(data)))
+    for uuid in adverts.get('UUIDs') or ():
+        fields.append(_field(TAG_UUID, uuid.encode('ascii')))
+    if adverts.get('TxPower') is not None:
+        fields.append(_field(TAG_TX_POWER, TX_POWER.pack(int(adverts['TxPower']))))
+    return b''.join(fields)
+
+def decode_adverts(payload: bytes) -> Dict:
+    """Decode a record payload back to Device1-style advertisement properties."""
+    adverts: Dict = {}
+    position = 0
+    while position < len(payload):
+        tag, length = FIELD_HEADER.unpack_from(payload, position)
+        position += FIELD_HEADER.size
+        value = bytes(payload[position:position + length])
+        position += length
+        if tag == TAG_MANUFACTURER_DATA:
+            company, = COMPANY_ID.unpack_from(value)
+            adverts.setdefault('ManufacturerData', {})[company] = value[COMPANY_ID.size:]
+        elif tag == TAG_SERVICE_DATA:
+            uuid_end = 1 + value[0]
+            adverts.setdefault('ServiceData', {})[value[1:uuid_end].decode('ascii')] = value[uuid_end:]
+        elif tag == TAG_UUID:
+            adverts.setdefault('UUIDs', []).append(value.decode('ascii'))
+        elif tag == TAG_TX_POWER:
+            adverts['TxPower'], = TX_POWER.unpack(value)
+    return adverts
+
+class AdvertStore:
+    """
+    Segment files of advertisement records.
+    One process (the scanner) appends; any process can read. Segment files
+    are only created on the first append, so readers never write to the
+    directory. A writer always starts a new segment rather than appending to
+    one left by an earlier run, whose tail may hold a torn record. Records
+    are flushed to the OS before append_many returns, so the caller can
+    commit index rows that point at them.
+    """
+
+    def __init__(self, directory: str, logger: Logger, segment_size: int = 16777216,
+                 segment_seconds: float = 3600.0):
+        self.directory = directory
+        self.logger = logger
+        self.segment_size = segment_size
+        self.segment_seconds = segment_seconds
+        self.active_segment: Optional[int] = None
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        # Last record per MAC in the active segment, so unchanged payloads are written once
+        self._last: Dict[str, Tuple[bytes, int]] = {}
+        self._maps: "OrderedDict[int, mmap.mmap]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:08d}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> List[int]:
+        """Get the numbers of the segment files on disk, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in names
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def append_many(self, records: Sequence[Tuple[str, Dict]]) -> List[Optional[Tuple[int, int]]]:
+        """
+        Append (mac_address, adverts) records to the active segment.
+        Returns the (segment, offset) of each record, or None for one that
+        couldn't be encoded. A payload identical to the last one stored for
+        the same MAC in this segment points at that record instead.
+        """
+        locations: List[Optional[Tuple[int, int]]] = []
+        with self._lock:
+            if self._file is None or self._size >= self.segment_size \
+                    or time.time() - self._opened_at >= self.segment_seconds:
+                self._rotate()
+            chunks = []
+            for mac_address, adverts in records:
+                try:
+                    payload = encode_adverts(adverts)
+                except Exception as e:
+                    self.logger.error(f"Could not encode adverts of {mac_address}: {str(e)}")
+                    locations.append(None)
+                    continue
+                last = self._last.get(mac_address)
+                if last is not None and last[0] == payload:
+                    locations.append((self.active_segment, last[1]))
+                    continue
+                offset = self._size
+                chunks.append(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+                chunks.append(payload)
+                self._size += RECORD_HEADER.size + len(payload)
+                self._last[mac_address] = (payload, offset)
+                locations.append((self.active_segment, offset))
+            if chunks:
+                self._file.write(b''.join(chunks))
+                self._file.flush()
+        return locations
+
+    def _rotate(self) -> None:
+        """Close the active segment and start the next one."""
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        existing = self.segments()
+        self.active_segment = (existing[-1] + 1) if existing else 1
+        self._file = open(self.path(self.active_segment), 'ab')
+        self._size = 0
+        self._opened_at = time.time()
+        self._last.clear()
+        self.logger.debug("Started advert segment %s", self.active_segment)
+
+    def read(self, segment: int, offset: int) -> Optional[Dict]:
+        """Read one record, or None if it is missing or damaged."""
+        return self.read_many([(segment, offset)]).get((segment, offset))
+
+    def read_many(self, locations: Sequence[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict]:
+        """Read records by (segment, offset), skipping any that are missing or damaged."""
+        records: Dict[Tuple[int, int], Dict] = {}
+        with self._lock:
+            for segment, offset in sorted(set(locations)):
+                view = self._map(segment, offset + RECORD_HEADER.size)
+                if view is None:
+                    continue
+                length, crc = RECORD_HEADER.unpack_from(view, offset)
+                start = offset + RECORD_HEADER.size
+                if start + length > len(view):
+                    view = self._map(segment, start + length)
+                    if view is None:
+                        continue
+                payload = view[start:start + length]
+                if zlib.crc32(payload) != crc:
+                    self.logger.debug("Damaged advert record at %s:%s", segment, offset)
+                    continue
+                records[(segment, offset)] = decode_adverts(payload)
+        return records
+
+    def _map(self, segment: int, needed: int) -> Optional[mmap.mmap]:
+        """Get a read-only map of a segment covering at least needed bytes."""
+        view = self._maps.get(segment)
+        if view is not None and len(view) >= needed:
+            self._maps.move_to_end(segment)
+            return view
+        if view is not None:
+            # The segment has grown since it was mapped
+            view.close()
+            del self._maps[segment]
+        try:
+            with open(self.path(segment), 'rb') as segment_file:
+                size = os.fstat(segment_file.fileno()).st_size
+                if size < needed:
+                    return None
+                view = mmap.mmap(segment_file.fileno(), size, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        self._maps[segment] = view
+        while len(self._maps) > MAX_OPEN_MAPS:
+            self._maps.popitem(last=False)[1].close()
+        return view
+
+    def remove_segment(self, segment: int) -> int:
+        """Delete a closed segment file. Returns the bytes freed."""
+        with self._lock:
+            if segment == self.active_segment:
+                return 0
+            view = self._maps.pop(segment, None)
+            if view is not None:
+                view.close()
+            try:
+                size = os.path.getsize(self.path(segment))
+                os.unlink(self.path(segment))
+                return size
+            except FileNotFoundError:
+                return 0
+
+    def size(self) -> int:
+        """Get the bytes of every segment on disk."""
+        total = 0
+        for segment in self.segments():
+            try:
+                total += os.path.getsize(self.path(segment))
+            except FileNotFoundError:
+                pass
+        return total
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.active_segment = None
+            for view in self._maps.values():
+                view.close()
+            self._maps.clear()
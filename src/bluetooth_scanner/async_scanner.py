@@ -0,0 +1,204 @@
+"""
+asyncio variant of the Bluetooth scanner service.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional
+from .context import AppContext
+from .scanner import BluetoothScanner
+
+class AsyncBluetoothScanner(BluetoothScanner):
+    """
+    Bluetooth scanner that runs discovery, enrichment, classification and
+    persistence as separate asyncio stages joined by bounded queues, so the
+    next discovery window starts while the previous one is still processed.
+    Blocking D-Bus and database calls run in executors.
+    """
+
+    # Seconds to let in-flight readings reach storage on shutdown
+    DRAIN_TIMEOUT = 10.0
+
+    def __init__(self, context: Optional[AppContext] = None):
+        super().__init__(context)
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self.enrich_queue: Optional[asyncio.Queue] = None
+        self.classify_queue: Optional[asyncio.Queue] = None
+        self.store_queue: Optional[asyncio.Queue] = None
+        depth = self.metrics.gauge(
+            'bluetooth_scanner_pipeline_queue_depth', 'Readings waiting between pipeline stages', ('queue',)
+        )
+        for name in ('enrich', 'classify', 'store'):
+            depth.labels(name).set_function(partial(self._queue_depth, name))
+
+    def start_scanning(self) -> None:
+        """Start the Bluetooth scanning pipeline and block until it stops."""
+        if not self.adapter:
+            if not self.initialize():
+                return
+
+        self.scanning = True
+        self.logger.info("Starting asynchronous Bluetooth scanning")
+        self.retention.start()
+        self.metrics_exporter.start()
+        if self.feed is not None:
+            self.feed.start()
+
+        try:
+            asyncio.run(self.run_pipeline())
+        except Exception as e:
+            self.logger.error(f"Error during scanning: {str(e)}")
+        finally:
+            self._release()
+
+    def stop_scanning(self) -> None:
+        """
+        Ask the pipeline to stop; safe to call from any thread or a signal
+        handler. start_scanning returns once the queued readings are stored.
+        """
+        loop, stop_event = self._async_loop, self._stop_event
+        if loop is not None and stop_event is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                # The loop closed between the check and the call
+                pass
+        super().stop_scanning()
+
+    async def run_pipeline(self) -> None:
+        """Run all stages until stop_scanning is called or discovery fails."""
+        config = self.config_manager.get_config()
+        self._async_loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self.enrich_queue = asyncio.Queue(config.async_queue_size)
+        self.classify_queue = asyncio.Queue(config.async_queue_size)
+        self.store_queue = asyncio.Queue(config.async_queue_size)
+        db_executor = ThreadPoolExecutor(
+            max_workers=config.async_storage_workers, thread_name_prefix="storage"
+        )
+
+        discovery = asyncio.ensure_future(self._discovery_stage())
+        workers = (
+            [asyncio.ensure_future(self._enrich_stage()) for _ in range(config.async_enrich_workers)]
+            + [asyncio.ensure_future(self._classify_stage()) for _ in range(config.async_classify_workers)]
+            + [asyncio.ensure_future(self._store_stage(db_executor)) for _ in range(config.async_storage_workers)]
+        )
+        stopped = asyncio.ensure_future(self._stop_event.wait())
+
+        try:
+            await asyncio.wait([discovery, stopped], return_when=asyncio.FIRST_COMPLETED)
+            discovery.cancel()
+            try:
+                await asyncio.wait_for(self._drain(), self.DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "Timed out draining the scan pipeline, dropping %d in-flight readings",
+                    sum(self._queue_depth(name) for name in ('enrich', 'classify', 'store'))
+                )
+        finally:
+            stopped.cancel()
+            for worker in workers:
+                worker.cancel()
+            results = await asyncio.gather(discovery, *workers, return_exceptions=True)
+            db_executor.shutdown(wait=True)
+            self._async_loop = None
+            for result in results:
+                if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                    self.logger.error(f"Pipeline stage failed: {str(result)}")
+
+    def _queue_depth(self, name: str) -> int:
+        """Get the number of readings in one of the stage queues."""
+        stage_queue = getattr(self, f'{name}_queue')
+        return stage_queue.qsize() if stage_queue is not None else 0
+
+    async def _drain(self) -> None:
+        """Wait until every queued reading has passed through all stages."""
+        await self.enrich_queue.join()
+        await self.classify_queue.join()
+        await self.store_queue.join()
+
+    async def _discovery_stage(self) -> None:
+        """Run discovery windows on every adapter and feed each snapshot into the pipeline."""
+        loop = asyncio.get_running_loop()
+        while self.scanning:
+            self._take_dbus_calls()
+            window, gap = self.schedule.next_cycle()
+            for name in self.adapters:
+                await loop.run_in_executor(None, self._dbus_call, self.backend.start_discovery, name)
+            await asyncio.sleep(window)
+            snapshot = await loop.run_in_executor(None, self._get_device_snapshot)
+            for name in self.adapters:
+                await loop.run_in_executor(None, self._dbus_call, self.backend.stop_discovery, name)
+            self.last_cycle_dbus_calls = self._take_dbus_calls()
+            # Give the presence engine a chance to time out devices even in an empty room
+            await loop.run_in_executor(None, self._track_presence, [])
+
+            # Every adapter shares one window here, so duplicates are in the same snapshot
+            sightings = self._strongest_sightings(snapshot)
+            self.schedule.observe({
+                properties.get('Address', ''): properties.get('RSSI', 0) for properties in sightings
+            })
+            for properties in sightings:
+                await self.enrich_queue.put(properties)
+
+            await asyncio.sleep(gap)
+
+    async def _enrich_stage(self) -> None:
+        """Turn raw Device1 properties into device_info readings."""
+        while True:
+            properties = await self.enrich_queue.get()
+            try:
+                device_info = self._device_info_from_properties(properties)
+                if device_info['mac_address']:
+                    await self.classify_queue.put(device_info)
+            except Exception as e:
+                self.logger.error(f"Error enriching device: {str(e)}")
+            finally:
+                self.enrich_queue.task_done()
+
+    async def _classify_stage(self) -> None:
+        """Track presence and classify readings in batches of whatever is queued."""
+        loop = asyncio.get_running_loop()
+        config = self.config_manager.get_config()
+        while True:
+            batch = await self._next_batch(self.classify_queue, config.write_batch_size)
+            try:
+                self._devices_seen.inc(len(batch))
+                await loop.run_in_executor(None, self._track_presence, batch)
+                devices = self.reading_filter.filter_signal(batch)
+                for record in zip(devices, self.classifier.classify_many(devices)):
+                    await self.store_queue.put(record)
+            except Exception as e:
+                self.logger.error(f"Error classifying devices: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.classify_queue.task_done()
+
+    async def _store_stage(self, executor: ThreadPoolExecutor) -> None:
+        """Persist classified readings in batches on the database executor."""
+        loop = asyncio.get_running_loop()
+        config = self.config_manager.get_config()
+        while True:
+            batch = await self._next_batch(self.store_queue, config.write_batch_size)
+            try:
+                started = time.perf_counter()
+                await loop.run_in_executor(executor, self._submit, batch)
+                self.schedule.add_busy(time.perf_counter() - started)
+            except Exception as e:
+                self.logger.error(f"Error storing devices: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.store_queue.task_done()
+
+    @staticmethod
+    async def _next_batch(source: asyncio.Queue, limit: int) -> List:
+        """Wait for one item, then take whatever else is already queued up to limit."""
+        items = [await source.get()]
+        while len(items) < limit:
+            try:
+                items.append(source.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
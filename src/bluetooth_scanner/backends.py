@@ -0,0 +1,403 @@
+"""
+Sources of Bluetooth sightings for the scanner.
+
+Every backend answers in BlueZ's ObjectManager layout ({object path:
+{interface: properties}}), so the scanner handles real adapters, recorded
+captures and synthetic crowds the same way.
+"""
+import gzip
+import random
+import struct
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+BLUEZ_SERVICE = 'org.bluez'
+ADAPTER_INTERFACE = 'org.bluez.Adapter1'
+DEVICE_INTERFACE = 'org.bluez.Device1'
+OBJECT_MANAGER_INTERFACE = 'org.freedesktop.DBus.ObjectManager'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+def adapter_path(adapter: str) -> str:
+    """Get the BlueZ object path of an adapter name such as "hci0"."""
+    return f'/org/bluez/{adapter}'
+
+def device_path(adapter: str, mac_address: str) -> str:
+    """Get the BlueZ object path of a device seen by an adapter."""
+    return f"/org/bluez/{adapter}/dev_{mac_address.replace(':', '_')}"
+
+class ScannerBackend:
+    """Interface the scanner uses to discover devices."""
+
+    # Whether subscribe() delivers ObjectManager and PropertiesChanged signals
+    supports_signals = False
+
+    def get_managed_objects(self) -> Dict[str, Dict[str, Dict]]:
+        """Get every adapter and device, as org.freedesktop.DBus.ObjectManager would."""
+        raise NotImplementedError
+
+    def start_discovery(self, adapter: str) -> None:
+        """Start discovery on an adapter."""
+
+    def stop_discovery(self, adapter: str) -> None:
+        """Stop discovery on an adapter."""
+
+    def set_discovery_filter(self, adapter: str, discovery_filter: Dict) -> None:
+        """Set the discovery filter of an adapter."""
+
+    def get_device_properties(self, path: str) -> Dict:
+        """Get the Device1 properties of one device."""
+        return self.get_managed_objects().get(path, {}).get(DEVICE_INTERFACE, {})
+
+    def subscribe(self, iface: str, signal: str, handler: Callable, arg0: Optional[str] = None):
+        """Subscribe to a BlueZ signal; returns an object with unsubscribe()."""
+        raise NotImplementedError(f"{type(self).__name__} does not deliver signals")
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+class BlueZBackend(ScannerBackend):
+    """Real adapters through BlueZ on the D-Bus system bus."""
+
+    supports_signals = True
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._proxies: Dict[str, object] = {}
+
+    def _get_proxy(self, path: str):
+        """Get a cached D-Bus proxy for a BlueZ object path."""
+        proxy = self._proxies.get(path)
+        if proxy is None:
+            # bus.get introspects the object, which is a round trip of its own
+            proxy = self.bus.get(BLUEZ_SERVICE, path)
+            self._proxies[path] = proxy
+        return proxy
+
+    def get_managed_objects(self) -> Dict[str, Dict[str, Dict]]:
+        objects = self._get_proxy('/').GetManagedObjects()
+        # Forget cached proxies for devices BlueZ no longer reports
+        for path in list(self._proxies):
+            if '/dev_' in path and path not in objects:
+                del self._proxies[path]
+        return objects
+
+    def start_discovery(self, adapter: str) -> None:
+        self._get_proxy(adapter_path(adapter)).StartDiscovery()
+
+    def stop_discovery(self, adapter: str) -> None:
+        self._get_proxy(adapter_path(adapter)).StopDiscovery()
+
+    def set_discovery_filter(self, adapter: str, discovery_filter: Dict) -> None:
+        self._get_proxy(adapter_path(adapter)).SetDiscoveryFilter(discovery_filter)
+
+    def get_device_properties(self, path: str) -> Dict:
+        return self._get_proxy(path).GetAll(DEVICE_INTERFACE)
+
+    def subscribe(self, iface: str, signal: str, handler: Callable, arg0: Optional[str] = None):
+        return self.bus.subscribe(
+            sender=BLUEZ_SERVICE, iface=iface, signal=signal, arg0=arg0, signal_fired=handler
+        )
+
+# Capture files are gzip streams of frames, one per get_managed_objects call:
+#   frame:   capture time (float64), device count (uint32), adapter count (uint8)
+#   adapter: name length (uint8), name
+#   device:  packed MAC (6 bytes), RSSI (int8), adapter index (uint8),
+#            Class (uint32), name length (uint8), manufacturer length (uint8),
+#            name, manufacturer
+CAPTURE_MAGIC = b'BTCAP1'
+_FRAME = struct.Struct('<dIB')
+_DEVICE = struct.Struct('<6sbBIBB')
+
+def _pack_text(value) -> bytes:
+    """Encode a name or manufacturer string, truncated to fit a one-byte length."""
+    return value.encode('utf-8', 'replace')[:255] if isinstance(value, str) else b''
+
+class CaptureWriter:
+    """Appends device snapshots to a capture file."""
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, 'wb')
+        self._file.write(CAPTURE_MAGIC)
+        self.frames = 0
+
+    def write(self, captured_at: float, objects: Dict[str, Dict[str, Dict]]) -> None:
+        """Write one snapshot in ObjectManager layout."""
+        adapters = [
+            path.rsplit('/', 1)[-1] for path, interfaces in objects.items()
+            if ADAPTER_INTERFACE in interfaces
+        ]
+        indexes = {name: index for index, name in enumerate(adapters)}
+        records = []
+        for path, interfaces in objects.items():
+            properties = interfaces.get(DEVICE_INTERFACE)
+            if not properties or not properties.get('Address'):
+                continue
+            adapter = properties.get('Adapter', path.rsplit('/', 1)[0]).rsplit('/', 1)[-1]
+            if adapter not in indexes:
+                indexes[adapter] = len(adapters)
+                adapters.append(adapter)
+            name = _pack_text(properties.get('Name'))
+            manufacturer = _pack_text(properties.get('ManufacturerData', {}).get('0x0000'))
+            device_class = properties.get('Class')
+            records.append(_DEVICE.pack(
+                bytes.fromhex(properties['Address'].replace(':', '')),
+                max(-128, min(127, int(properties.get('RSSI', 0)))),
+                indexes[adapter],
+                device_class if isinstance(device_class, int) else 0,
+                len(name),
+                len(manufacturer)
+            ) + name + manufacturer)
+
+        parts = [_FRAME.pack(captured_at, len(records), len(adapters))]
+        for adapter in adapters:
+            encoded = adapter.encode()
+            parts.append(bytes([len(encoded)]) + encoded)
+        parts.extend(records)
+        self._file.write(b''.join(parts))
+        self.frames += 1
+
+    def close(self) -> None:
+        """Finish the gzip stream."""
+        self._file.close()
+
+def _read_exact(capture, size: int) -> bytes:
+    """Read exactly size bytes, raising EOFError when the capture ends first."""
+    data = capture.read(size)
+    if len(data) < size:
+        raise EOFError
+    return data
+
+def read_capture(path: str) -> Iterator[Tuple[float, Dict[str, Dict[str, Dict]]]]:
+    """Yield (capture time, objects) for every frame in a capture file."""
+    with gzip.open(path, 'rb') as capture:
+        if capture.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a scanner capture")
+        try:
+            while True:
+                header = capture.read(_FRAME.size)
+                if len(header) < _FRAME.size:
+                    return
+                captured_at, device_count, adapter_count = _FRAME.unpack(header)
+                adapters = []
+                for _ in range(adapter_count):
+                    adapters.append(_read_exact(capture, _read_exact(capture, 1)[0]).decode())
+                objects = {
+                    adapter_path(adapter): {ADAPTER_INTERFACE: {}} for adapter in adapters
+                }
+                for _ in range(device_count):
+                    mac, rssi, adapter_index, device_class, name_length, manufacturer_length = \
+                        _DEVICE.unpack(_read_exact(capture, _DEVICE.size))
+                    name = _read_exact(capture, name_length).decode('utf-8', 'replace')
+                    manufacturer = _read_exact(capture, manufacturer_length).decode('utf-8', 'replace')
+                    mac_address = ':'.join(f'{byte:02X}' for byte in mac)
+                    adapter = adapters[adapter_index]
+                    properties = {'Address': mac_address, 'Adapter': adapter_path(adapter)}
+                    if rssi:
+                        properties['RSSI'] = rssi
+                    if device_class:
+                        properties['Class'] = device_class
+                    if name:
+                        properties['Name'] = name
+                    if manufacturer:
+                        properties['ManufacturerData'] = {'0x0000': manufacturer}
+                    objects[device_path(adapter, mac_address)] = {DEVICE_INTERFACE: properties}
+                yield captured_at, objects
+        except (EOFError, IndexError, struct.error):
+            # A capture cut off mid-frame, e.g. by a power loss, ends at the last whole frame
+            return
+
+class RecordingBackend(ScannerBackend):
+    """
+    Passes another backend through while capturing every snapshot it returns.
+    Signals are not recorded, so the scanner polls while recording.
+    """
+
+    def __init__(self, backend: ScannerBackend, path: str):
+        self.backend = backend
+        self.writer = CaptureWriter(path)
+
+    def get_managed_objects(self) -> Dict[str, Dict[str, Dict]]:
+        objects = self.backend.get_managed_objects()
+        self.writer.write(time.time(), objects)
+        return objects
+
+    def start_discovery(self, adapter: str) -> None:
+        self.backend.start_discovery(adapter)
+
+    def stop_discovery(self, adapter: str) -> None:
+        self.backend.stop_discovery(adapter)
+
+    def set_discovery_filter(self, adapter: str, discovery_filter: Dict) -> None:
+        self.backend.set_discovery_filter(adapter, discovery_filter)
+
+    def get_device_properties(self, path: str) -> Dict:
+        return self.backend.get_device_properties(path)
+
+    def close(self) -> None:
+        self.writer.close()
+        self.backend.close()
+
+class ReplayBackend(ScannerBackend):
+    """
+    Plays a capture back, at its recorded pace scaled by speed. Each poll
+    returns the newest frame due by then; a speed of 0 returns the next
+    frame on every poll regardless of time. Once the capture runs out only
+    the adapters are reported and finished is set.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.speed = speed
+        self.clock = clock
+        self.finished = False
+        self._frames = read_capture(path)
+        self._pending = next(self._frames, None)
+        self._current: Dict[str, Dict[str, Dict]] = {}
+        self._first_capture: Optional[float] = None
+        self._started: Optional[float] = None
+
+    def _advance(self) -> bool:
+        """Move to the next frame; returns False when the capture is exhausted."""
+        if self._pending is None:
+            if not self.finished:
+                self.finished = True
+                self._current = {
+                    path: interfaces for path, interfaces in self._current.items()
+                    if ADAPTER_INTERFACE in interfaces
+                }
+            return False
+        captured_at, self._current = self._pending
+        if self._first_capture is None:
+            self._first_capture = captured_at
+            self._started = self.clock()
+        self._pending = next(self._frames, None)
+        return True
+
+    def get_managed_objects(self) -> Dict[str, Dict[str, Dict]]:
+        if self.speed <= 0 or self._first_capture is None:
+            self._advance()
+        else:
+            elapsed = (self.clock() - self._started) * self.speed
+            advanced = False
+            while self._pending is not None and self._pending[0] - self._first_capture <= elapsed:
+                advanced = self._advance()
+            if not advanced and self._pending is None:
+                # The last frame has already been served
+                self._advance()
+        return self._current
+
+    def close(self) -> None:
+        self._frames.close()
+
+class SyntheticBackend(ScannerBackend):
+    """
+    Generates a crowd of devices. Every poll replaces a churn share of the
+    crowd with newcomers and jitters each device's RSSI around its own mean.
+    The crowd size follows steps, a list of (seconds since the first poll,
+    population) pairs, when given. With several adapters each device is
+    heard by one or more of them, at different strengths.
+    """
+
+    # (Class of Device, name prefix, share of the crowd)
+    PROFILES = (
+        (0x5a020c, "Phone", 0.55),
+        (0x7a0104, "Laptop", 0.15),
+        (0x240404, "Headset", 0.15),
+        (0x000704, "Watch", 0.10),
+        (0, "", 0.05),
+    )
+
+    def __init__(self, population: int = 1000, churn: float = 0.05,
+                 adapters: Tuple[str, ...] = ('hci0',), seed: Optional[int] = None,
+                 steps: Optional[List[Tuple[float, int]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.population = population
+        self.churn = churn
+        self.adapters = tuple(adapters)
+        self.steps = sorted(steps) if steps else None
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.arrivals = 0
+        self.departures = 0
+        self._devices: Dict[str, Tuple] = {}  # mac -> (mean RSSI, class, name, adapters)
+        self._started: Optional[float] = None
+        self._profiles = [profile[:2] for profile in self.PROFILES]
+        self._weights = [profile[2] for profile in self.PROFILES]
+
+    def _target_population(self) -> int:
+        """Get the crowd size due at the current time."""
+        if not self.steps:
+            return self.population
+        elapsed = self.clock() - self._started
+        target = self.steps[0][1]
+        for offset, population in self.steps:
+            if offset > elapsed:
+                break
+            target = population
+        return target
+
+    def _new_device(self) -> Tuple[str, Tuple]:
+        """Create a random device."""
+        rng = self.random
+        mac_address = ':'.join(f'{rng.randrange(256):02X}' for _ in range(6))
+        device_class, prefix = rng.choices(self._profiles, self._weights)[0]
+        name = f"{prefix} {mac_address[-5:]}" if prefix else ""
+        heard_by = tuple(adapter for adapter in self.adapters if rng.random() < 0.7) or (rng.choice(self.adapters),)
+        return mac_address, (rng.uniform(-95, -45), device_class, name, heard_by)
+
+    def get_managed_objects(self) -> Dict[str, Dict[str, Dict]]:
+        if self._started is None:
+            self._started = self.clock()
+        rng = self.random
+
+        departing = rng.sample(list(self._devices), int(len(self._devices) * self.churn))
+        for mac_address in departing:
+            del self._devices[mac_address]
+        self.departures += len(departing)
+
+        target = self._target_population()
+        if len(self._devices) > target:
+            for mac_address in rng.sample(list(self._devices), len(self._devices) - target):
+                del self._devices[mac_address]
+                self.departures += 1
+        while len(self._devices) < target:
+            mac_address, device = self._new_device()
+            self._devices[mac_address] = device
+            self.arrivals += 1
+
+        objects = {adapter_path(adapter): {ADAPTER_INTERFACE: {}} for adapter in self.adapters}
+        gauss = rng.gauss
+        for mac_address, (mean_rssi, device_class, name, heard_by) in self._devices.items():
+            for adapter in heard_by:
+                properties = {
+                    'Address': mac_address,
+                    'Adapter': adapter_path(adapter),
+                    'RSSI': max(-127, min(-20, int(gauss(mean_rssi, 4))))
+                }
+                if device_class:
+                    properties['Class'] = device_class
+                if name:
+                    properties['Name'] = name
+                objects[device_path(adapter, mac_address)] = {DEVICE_INTERFACE: properties}
+        return objects
+
+def create_backend(config, bus_factory: Callable[[], object]) -> ScannerBackend:
+    """Build the backend selected by the configuration, wrapped in a recorder if requested."""
+    if config.backend == 'replay':
+        if not config.replay_path:
+            raise ValueError("BACKEND=replay needs REPLAY_PATH")
+        backend = ReplayBackend(config.replay_path, speed=config.replay_speed)
+    elif config.backend == 'synthetic':
+        backend = SyntheticBackend(
+            population=config.synthetic_devices,
+            churn=config.synthetic_churn,
+            adapters=tuple(f'hci{index}' for index in range(config.synthetic_adapters))
+        )
+    elif config.backend == 'bluez':
+        backend = BlueZBackend(bus_factory())
+    else:
+        raise ValueError(f"Unknown backend: {config.backend}")
+
+    if config.record_path:
+        backend = RecordingBackend(backend, config.record_path)
+    return backend
@@ -1,84 +1,240 @@
 """
 Device classification for the Bluetooth Scanner.
 """
-from typing import Dict, Optional
+import json
+import os
+import re
+import time
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
 from .logger import Logger
+from .metrics import MetricsRegistry
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'classifier_rules.json')
+
+# Device types, indexed by the small-integer type code used in batch results
+DEVICE_TYPES = (
+    'unknown',
+    'mobile_phone',
+    'phone',
+    'computer',
+    'network',
+    'audio_video',
+    'peripheral',
+    'imaging',
+    'wearable',
+    'toy',
+    'health',
+)
+TYPE_CODES = {name: code for code, name in enumerate(DEVICE_TYPES)}
+
+# Class of Device major classes (bits 8-12) from the Bluetooth assigned numbers
+MAJOR_CLASS_MASK = 0x1F00
+MAJOR_CLASS_SHIFT = 8
+MINOR_CLASS_MASK = 0x00FC
+MINOR_CLASS_SHIFT = 2
+MAJOR_PHONE = 0x02
+MAJOR_CLASS_TYPES = {
+    0x01: TYPE_CODES['computer'],
+    0x02: TYPE_CODES['phone'],
+    0x03: TYPE_CODES['network'],
+    0x04: TYPE_CODES['audio_video'],
+    0x05: TYPE_CODES['peripheral'],
+    0x06: TYPE_CODES['imaging'],
+    0x07: TYPE_CODES['wearable'],
+    0x08: TYPE_CODES['toy'],
+    0x09: TYPE_CODES['health'],
+}
+
+def _compile_alternation(words) -> Optional[re.Pattern]:
+    """Compile substrings into one case-folded alternation regex."""
+    words = sorted({word.lower() for word in words if word}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile('|'.join(re.escape(word) for word in words))
+
+def _normalize(value) -> str:
+    """Lower-case a property value for matching, treating missing values as empty."""
+    return str(value).strip().lower() if value else ''
+
+def parse_device_class(value) -> Optional[int]:
+    """Parse a Class of Device value (BlueZ integer or hex string) to an int."""
+    if isinstance(value, int):
+        return value
+    if not value:
+        return None
+    try:
+        return int(str(value), 0)
+    except ValueError:
+        return None
+
+class ClassificationResults:
+    """
+    Classification results for a batch, stored as compact parallel arrays
+    (one byte each for is_mobile, type code and confidence percent).
+    Indexing or iterating yields the same dicts classify_device returns, so
+    zip(devices, results) can be handed straight to StorageManager.store_cycle.
+    """
+
+    __slots__ = ('is_mobile', 'type_codes', 'confidence')
+
+    def __init__(self, size: int):
+        self.is_mobile = bytearray(size)
+        self.type_codes = array('B', bytes(size))
+        self.confidence = array('B', bytes(size))  # percent
+
+    def __len__(self) -> int:
+        return len(self.type_codes)
+
+    def __getitem__(self, index: int) -> Dict:
+        return {
+            'is_mobile': bool(self.is_mobile[index]),
+            'device_type': DEVICE_TYPES[self.type_codes[index]],
+            'confidence': self.confidence[index] / 100
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def mobile_count(self) -> int:
+        """Count the devices classified as mobile."""
+        return self.is_mobile.count(1)
 
 class DeviceClassifier:
     """Classifies Bluetooth devices based on their properties."""
-    
-    # Common mobile phone device classes
-    MOBILE_PHONE_CLASSES = {
-        '0x000500',  # Phone
-        '0x000504',  # Smartphone
-        '0x000508',  # Mobile phone
-    }
-    
-    # Common mobile phone manufacturers
-    MOBILE_MANUFACTURERS = {
-        'Apple',
-        'Samsung',
-        'Google',
-        'Xiaomi',
-        'Huawei',
-        'OnePlus',
-        'Sony',
-        'LG',
-        'Motorola',
-        'Nokia',
-    }
-    
-    def __init__(self, logger: Logger):
+
+    def __init__(self, logger: Logger, rules_path: Optional[str] = None, cache_size: int = 4096,
+                 metrics: Optional[MetricsRegistry] = None):
         self.logger = logger
-    
+        self.rules = self.load_rules(rules_path or DEFAULT_RULES_PATH)
+
+        # Compile the rules once; matching is then a single regex search per field
+        self.mobile_phone_minor_classes = frozenset(self.rules['mobile_phone_minor_classes'])
+        self.manufacturer_matcher = _compile_alternation(self.rules['mobile_manufacturers'])
+        self.name_matcher = _compile_alternation(self.rules['mobile_name_patterns'])
+        self.confidence = {
+            rule: round(value * 100) for rule, value in self.rules['confidence'].items()
+        }
+
+        # The same devices are reclassified every cycle, so memoize on the normalized input
+        self._classify_normalized = lru_cache(maxsize=cache_size)(self._classify_normalized)
+
+        metrics = metrics or MetricsRegistry(enabled=False)
+        self._classify_time = metrics.histogram(
+            'bluetooth_scanner_stage_seconds', 'Time spent per scanner stage', ('stage',)
+        ).labels('classify')
+        self._classified = metrics.counter(
+            'bluetooth_scanner_classifications_total', 'Devices classified'
+        )
+        cache = metrics.gauge(
+            'bluetooth_scanner_classifier_cache', 'Classification cache statistics', ('result',)
+        )
+        cache.labels('hits').set_function(lambda: self.cache_info().hits)
+        cache.labels('misses').set_function(lambda: self.cache_info().misses)
+
+    @staticmethod
+    def load_rules(path: str) -> Dict:
+        """Load classification rules from a JSON file."""
+        with open(path) as rules_file:
+            return json.load(rules_file)
+
+    def cache_info(self):
+        """Get hit/miss statistics for the classification cache."""
+        return self._classify_normalized.cache_info()
+
     def classify_device(self, device_info: Dict) -> Dict:
         """
         Classify a device based on its properties.
         Returns a dictionary with classification results.
         """
+        is_mobile, type_code, confidence = self._classify_normalized(
+            parse_device_class(device_info.get('device_class')),
+            _normalize(device_info.get('manufacturer')),
+            _normalize(device_info.get('device_name'))
+        )
         classification = {
-            'is_mobile': False,
-            'device_type': 'unknown',
-            'confidence': 0.0
+            'is_mobile': is_mobile,
+            'device_type': DEVICE_TYPES[type_code],
+            'confidence': confidence / 100
         }
-        
+
+        # Log classification
+        self.logger.log_classification(device_info, classification)
+
+        return classification
+
+    def classify_many(self, devices: List[Dict]) -> ClassificationResults:
+        """
+        Classify a batch of devices in one pass.
+        Returns a ClassificationResults indexed like the input list.
+        """
+        start = time.perf_counter()
+        results = ClassificationResults(len(devices))
+        classify = self._classify_normalized
+        is_mobile_out = results.is_mobile
+        type_codes_out = results.type_codes
+        confidence_out = results.confidence
+
+        for index, device_info in enumerate(devices):
+            is_mobile, type_code, confidence = classify(
+                parse_device_class(device_info.get('device_class')),
+                _normalize(device_info.get('manufacturer')),
+                _normalize(device_info.get('device_name'))
+            )
+            is_mobile_out[index] = is_mobile
+            type_codes_out[index] = type_code
+            confidence_out[index] = confidence
+
+        self._classify_time.observe(time.perf_counter() - start)
+        self._classified.inc(len(devices))
+        self.logger.debug("Classified %d devices, %d mobile", len(devices), results.mobile_count())
+        return results
+
+    def _classify_normalized(self, device_class: Optional[int], manufacturer: str,
+                             device_name: str) -> Tuple[bool, int, int]:
+        """
+        Apply the compiled rules to a decoded Class of Device and normalized
+        manufacturer and name. Returns (is_mobile, type code, confidence percent).
+        """
+        is_mobile = False
+        type_code = TYPE_CODES['unknown']
+        confidence = 0
+
         # Check device class
-        device_class = device_info.get('device_class', '')
-        if device_class in self.MOBILE_PHONE_CLASSES:
-            classification['is_mobile'] = True
-            classification['device_type'] = 'mobile_phone'
-            classification['confidence'] = 0.8
-        
+        if device_class is not None:
+            major = (device_class & MAJOR_CLASS_MASK) >> MAJOR_CLASS_SHIFT
+            minor = (device_class & MINOR_CLASS_MASK) >> MINOR_CLASS_SHIFT
+            if major == MAJOR_PHONE and minor in self.mobile_phone_minor_classes:
+                is_mobile = True
+                type_code = TYPE_CODES['mobile_phone']
+                confidence = self.confidence['device_class']
+            elif major in MAJOR_CLASS_TYPES:
+                # A device that declares a non-phone class (headphones, laptops)
+                # is not reclassified as a phone by its vendor or name
+                return False, MAJOR_CLASS_TYPES[major], self.confidence['device_class']
+
         # Check manufacturer
-        manufacturer = device_info.get('manufacturer', '').lower()
-        if any(m.lower() in manufacturer for m in self.MOBILE_MANUFACTURERS):
-            if not classification['is_mobile']:
-                classification['is_mobile'] = True
-                classification['device_type'] = 'mobile_phone'
-                classification['confidence'] = 0.7
+        if manufacturer and self.manufacturer_matcher and self.manufacturer_matcher.search(manufacturer):
+            if not is_mobile:
+                is_mobile = True
+                type_code = TYPE_CODES['mobile_phone']
+                confidence = self.confidence['manufacturer']
             else:
-                classification['confidence'] = 0.9
-        
+                confidence = self.confidence['device_class_and_manufacturer']
+
         # Check device name patterns
-        device_name = device_info.get('device_name', '').lower()
-        mobile_patterns = {'iphone', 'samsung', 'galaxy', 'pixel', 'xiaomi', 'huawei'}
-        if any(pattern in device_name for pattern in mobile_patterns):
-            if not classification['is_mobile']:
-                classification['is_mobile'] = True
-                classification['device_type'] = 'mobile_phone'
-                classification['confidence'] = 0.6
+        if device_name and self.name_matcher and self.name_matcher.search(device_name):
+            if not is_mobile:
+                is_mobile = True
+                type_code = TYPE_CODES['mobile_phone']
+                confidence = self.confidence['name']
             else:
-                classification['confidence'] = min(1.0, classification['confidence'] + 0.2)
-        
-        # Log classification
-        self.logger.log_classification(
-            device_info,
-            f"{'mobile phone' if classification['is_mobile'] else 'other device'} "
-            f"(confidence: {classification['confidence']:.2f})"
-        )
-        
-        return classification
-    
+                confidence = min(100, confidence + self.confidence['name_boost'])
+
+        return is_mobile, type_code, confidence
+
     def get_device_properties(self, device_info: Dict) -> Dict:
         """
         Extract and normalize device properties.
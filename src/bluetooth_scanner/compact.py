@@ -0,0 +1,55 @@
+"""
+Command-line conversion of a database to the compact schema.
+"""
+import argparse
+import os
+import sys
+from .context import AppContext
+
+def main():
+    """Main entry point for the compact schema tool."""
+    parser = argparse.ArgumentParser(description="Compact schema tool for the Bluetooth scanner database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Show the schema mode and row counts")
+
+    convert = commands.add_parser(
+        "convert", help="Move scan results into the compact schema (stop the scanner first)"
+    )
+    convert.add_argument("--chunk-size", type=int, default=50000, help="Rows moved per transaction")
+    convert.add_argument("--vacuum", action="store_true",
+                         help="Rebuild the file afterwards so it shrinks on disk")
+
+    args = parser.parse_args()
+
+    context = AppContext.default()
+    logger = context.logger
+    storage = context.storage
+
+    try:
+        if args.command == "status":
+            with storage.engine.connect() as connection:
+                standard = connection.exec_driver_sql("SELECT COUNT(*) FROM scan_results").scalar()
+                compact = connection.exec_driver_sql("SELECT COUNT(*) FROM compact_scan_results").scalar()
+            print(f"schema: {storage.schema_mode}")
+            print(f"scan_results: {standard}  compact_scan_results: {compact}")
+            print(f"file size: {os.path.getsize(context.config.db_path)} bytes")
+        else:
+            size_before = os.path.getsize(context.config.db_path)
+            moved = storage.convert_to_compact(chunk_size=args.chunk_size)
+            if args.vacuum:
+                with storage.engine.connect() as connection:
+                    connection.exec_driver_sql("VACUUM")
+                    connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(
+                f"Converted {moved} scan results to the compact schema; "
+                f"file {size_before} -> {os.path.getsize(context.config.db_path)} bytes"
+            )
+    except Exception as e:
+        logger.error(f"Compact command failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        context.close()
+
+if __name__ == "__main__":
+    main()
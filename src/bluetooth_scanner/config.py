@@ -11,23 +11,162 @@ class ScannerConfig:
     """Configuration settings for the Bluetooth scanner."""
     scan_interval: int = 10  # seconds between scans
     scan_duration: int = 5   # seconds to scan
+    adaptive_schedule: bool = False  # size windows and gaps from observed churn instead
+    scan_duration_min: float = 2.0  # adaptive window bounds, in seconds
+    scan_duration_max: float = 6.0
+    scan_interval_min: float = 1.0  # adaptive gap bounds, in seconds
+    scan_interval_max: float = 20.0
+    schedule_cpu_budget: float = 0.25  # share of wall time processing may take before gaps stretch
     db_path: str = "bluetooth_devices.db"
     log_level: str = "INFO"
+    log_file: str = "bluetooth_scanner.log"
+    log_async: bool = True  # hand records to a background listener thread
+    log_max_bytes: int = 10485760  # rotate the log file at this size
+    log_backup_count: int = 3
+    log_device_interval: float = 60.0  # seconds between per-device log lines for one MAC
     retention_days: int = 30
-    min_signal_strength: int = -90  # dBm
+    rollup_retention_days: int = 365
+    retention_interval: int = 3600  # seconds between retention runs, 0 disables
+    retention_chunk_size: int = 5000  # rows deleted per transaction
+    retention_prune_devices: bool = True  # drop devices not seen within retention_days
+    min_signal_strength: int = -90  # dBm, weaker readings are dropped before classification
+    suppress_unchanged: bool = True  # skip rows for devices whose reading hasn't changed
+    suppress_rssi_delta: int = 5  # dB of RSSI change that still counts as unchanged
+    suppress_heartbeat: int = 300  # seconds between rows for an unchanged device
+    discovery_mode: str = "signals"  # "signals" or "poll"
+    signal_flush_interval: float = 1.0  # seconds of signal-mode readings per transaction, 0 writes each event
+    backend: str = "bluez"  # "bluez", "replay" or "synthetic"
+    record_path: Optional[str] = None  # capture every snapshot to this file
+    replay_path: Optional[str] = None  # capture played back by the replay backend
+    replay_speed: float = 1.0  # replay pace multiplier, 0 plays one frame per poll
+    synthetic_devices: int = 1000  # crowd size of the synthetic backend
+    synthetic_churn: float = 0.05  # share of the crowd replaced on every poll
+    synthetic_adapters: int = 1
+    adapters: str = ""  # comma-separated adapter names, empty uses every adapter
+    merge_window: float = 2.0  # seconds to merge sightings of one MAC across adapters
+    scanner_mode: str = "sync"  # "sync" or "async" staged pipeline
+    async_queue_size: int = 1000  # readings buffered between pipeline stages
+    async_enrich_workers: int = 1
+    async_classify_workers: int = 1
+    async_storage_workers: int = 1
+    write_behind: bool = False  # queue writes for a dedicated writer thread
+    write_queue_size: int = 10000  # records
+    write_batch_size: int = 500  # records per transaction
+    write_flush_interval: float = 1.0  # seconds before a partial batch is written
+    write_backpressure: str = "block"  # "block" or "drop_oldest"
+    db_profile: str = "performance"  # "performance" or "default" SQLite settings
+    schema_mode: str = "standard"  # "standard" or "compact" scan_results rows, for new databases
+    advert_store: bool = True  # keep raw advertisement payloads in segment files
+    advert_dir: str = ""  # segment directory, empty puts it next to the database
+    advert_segment_size: int = 16777216  # bytes before a new segment is started
+    advert_segment_seconds: int = 3600  # seconds before a new segment is started
+    db_mmap_size: int = 67108864  # bytes of the database file to memory-map
+    db_cache_size: int = 8192  # KiB of page cache per connection
+    classifier_rules_path: Optional[str] = None  # JSON rules file, None uses the bundled rules
+    classifier_cache_size: int = 4096  # memoized classification results
+    metrics_enabled: bool = False  # record stage timings, counters and gauges
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0  # serve Prometheus text on this port, 0 disables the endpoint
+    metrics_log_interval: int = 60  # seconds between stats log lines, 0 disables
+    feed_enabled: bool = True  # publish device changes to viewers over a Unix socket
+    feed_socket: str = "bluetooth_scanner.sock"
+    feed_timeout: float = 300.0  # seconds unseen before a device drops out of the live feed
+    visualizer_cpu_budget: float = 0.25  # share of a core the visualizer aims to stay under
+    visualizer_min_interval: float = 0.25  # fastest refresh, in seconds
+    visualizer_max_interval: float = 5.0  # slowest refresh when over the CPU budget
+    presence_enabled: bool = True  # track arrivals and departures in memory
+    presence_window: int = 16  # raw RSSI readings kept per device
+    presence_alpha: float = 0.3  # EMA smoothing factor, higher follows RSSI faster
+    presence_enter_rssi: int = -75  # dBm, smoothed RSSI to count as present
+    presence_exit_rssi: int = -85  # dBm, smoothed RSSI to count as gone
+    presence_confirm_samples: int = 2  # readings past a threshold before the state flips
+    presence_timeout: float = 120.0  # seconds unseen before a device has left
+    presence_sample_interval: float = 60.0  # seconds between stored smoothed samples
+
+_dotenv_loaded = False
 
 class ConfigManager:
     """Manages configuration loading and access."""
     
     def __init__(self):
-        load_dotenv()
+        global _dotenv_loaded
+        if not _dotenv_loaded:
+            load_dotenv()
+            _dotenv_loaded = True
         self.config = ScannerConfig(
             scan_interval=int(os.getenv("SCAN_INTERVAL", "10")),
             scan_duration=int(os.getenv("SCAN_DURATION", "5")),
+            adaptive_schedule=os.getenv("ADAPTIVE_SCHEDULE", "false").lower() in ("1", "true", "yes"),
+            scan_duration_min=float(os.getenv("SCAN_DURATION_MIN", "2.0")),
+            scan_duration_max=float(os.getenv("SCAN_DURATION_MAX", "6.0")),
+            scan_interval_min=float(os.getenv("SCAN_INTERVAL_MIN", "1.0")),
+            scan_interval_max=float(os.getenv("SCAN_INTERVAL_MAX", "20.0")),
+            schedule_cpu_budget=float(os.getenv("SCHEDULE_CPU_BUDGET", "0.25")),
             db_path=os.getenv("DB_PATH", "bluetooth_devices.db"),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
+            log_file=os.getenv("LOG_FILE", "bluetooth_scanner.log"),
+            log_async=os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes"),
+            log_max_bytes=int(os.getenv("LOG_MAX_BYTES", "10485760")),
+            log_backup_count=int(os.getenv("LOG_BACKUP_COUNT", "3")),
+            log_device_interval=float(os.getenv("LOG_DEVICE_INTERVAL", "60")),
             retention_days=int(os.getenv("RETENTION_DAYS", "30")),
-            min_signal_strength=int(os.getenv("MIN_SIGNAL_STRENGTH", "-90"))
+            rollup_retention_days=int(os.getenv("ROLLUP_RETENTION_DAYS", "365")),
+            retention_interval=int(os.getenv("RETENTION_INTERVAL", "3600")),
+            retention_chunk_size=int(os.getenv("RETENTION_CHUNK_SIZE", "5000")),
+            retention_prune_devices=os.getenv("RETENTION_PRUNE_DEVICES", "true").lower() in ("1", "true", "yes"),
+            min_signal_strength=int(os.getenv("MIN_SIGNAL_STRENGTH", "-90")),
+            suppress_unchanged=os.getenv("SUPPRESS_UNCHANGED", "true").lower() in ("1", "true", "yes"),
+            suppress_rssi_delta=int(os.getenv("SUPPRESS_RSSI_DELTA", "5")),
+            suppress_heartbeat=int(os.getenv("SUPPRESS_HEARTBEAT", "300")),
+            discovery_mode=os.getenv("DISCOVERY_MODE", "signals").lower(),
+            signal_flush_interval=float(os.getenv("SIGNAL_FLUSH_INTERVAL", "1.0")),
+            backend=os.getenv("BACKEND", "bluez").lower(),
+            record_path=os.getenv("RECORD_PATH") or None,
+            replay_path=os.getenv("REPLAY_PATH") or None,
+            replay_speed=float(os.getenv("REPLAY_SPEED", "1.0")),
+            synthetic_devices=int(os.getenv("SYNTHETIC_DEVICES", "1000")),
+            synthetic_churn=float(os.getenv("SYNTHETIC_CHURN", "0.05")),
+            synthetic_adapters=int(os.getenv("SYNTHETIC_ADAPTERS", "1")),
+            adapters=os.getenv("ADAPTERS", ""),
+            merge_window=float(os.getenv("MERGE_WINDOW", "2.0")),
+            scanner_mode=os.getenv("SCANNER_MODE", "sync").lower(),
+            async_queue_size=int(os.getenv("ASYNC_QUEUE_SIZE", "1000")),
+            async_enrich_workers=int(os.getenv("ASYNC_ENRICH_WORKERS", "1")),
+            async_classify_workers=int(os.getenv("ASYNC_CLASSIFY_WORKERS", "1")),
+            async_storage_workers=int(os.getenv("ASYNC_STORAGE_WORKERS", "1")),
+            write_behind=os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes"),
+            write_queue_size=int(os.getenv("WRITE_QUEUE_SIZE", "10000")),
+            write_batch_size=int(os.getenv("WRITE_BATCH_SIZE", "500")),
+            write_flush_interval=float(os.getenv("WRITE_FLUSH_INTERVAL", "1.0")),
+            write_backpressure=os.getenv("WRITE_BACKPRESSURE", "block").lower(),
+            db_profile=os.getenv("DB_PROFILE", "performance").lower(),
+            schema_mode=os.getenv("SCHEMA_MODE", "standard").lower(),
+            advert_store=os.getenv("ADVERT_STORE", "true").lower() in ("1", "true", "yes"),
+            advert_dir=os.getenv("ADVERT_DIR", ""),
+            advert_segment_size=int(os.getenv("ADVERT_SEGMENT_SIZE", "16777216")),
+            advert_segment_seconds=int(os.getenv("ADVERT_SEGMENT_SECONDS", "3600")),
+            db_mmap_size=int(os.getenv("DB_MMAP_SIZE", "67108864")),
+            db_cache_size=int(os.getenv("DB_CACHE_SIZE", "8192")),
+            classifier_rules_path=os.getenv("CLASSIFIER_RULES") or None,
+            classifier_cache_size=int(os.getenv("CLASSIFIER_CACHE_SIZE", "4096")),
+            metrics_enabled=os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes"),
+            metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+            metrics_port=int(os.getenv("METRICS_PORT", "0")),
+            metrics_log_interval=int(os.getenv("METRICS_LOG_INTERVAL", "60")),
+            feed_enabled=os.getenv("FEED_ENABLED", "true").lower() in ("1", "true", "yes"),
+            feed_socket=os.getenv("FEED_SOCKET", "bluetooth_scanner.sock"),
+            feed_timeout=float(os.getenv("FEED_TIMEOUT", "300")),
+            visualizer_cpu_budget=float(os.getenv("VISUALIZER_CPU_BUDGET", "0.25")),
+            visualizer_min_interval=float(os.getenv("VISUALIZER_MIN_INTERVAL", "0.25")),
+            visualizer_max_interval=float(os.getenv("VISUALIZER_MAX_INTERVAL", "5.0")),
+            presence_enabled=os.getenv("PRESENCE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            presence_window=int(os.getenv("PRESENCE_WINDOW", "16")),
+            presence_alpha=float(os.getenv("PRESENCE_ALPHA", "0.3")),
+            presence_enter_rssi=int(os.getenv("PRESENCE_ENTER_RSSI", "-75")),
+            presence_exit_rssi=int(os.getenv("PRESENCE_EXIT_RSSI", "-85")),
+            presence_confirm_samples=int(os.getenv("PRESENCE_CONFIRM_SAMPLES", "2")),
+            presence_timeout=float(os.getenv("PRESENCE_TIMEOUT", "120")),
+            presence_sample_interval=float(os.getenv("PRESENCE_SAMPLE_INTERVAL", "60"))
         )
     
     def get_config(self) -> ScannerConfig:
@@ -0,0 +1,84 @@
+"""
+Application context shared by the Bluetooth Scanner components.
+"""
+import threading
+from typing import Optional
+from .backends import ScannerBackend, create_backend
+from .config import ConfigManager, ScannerConfig
+from .logger import Logger
+from .metrics import MetricsRegistry
+from .storage import StorageManager
+
+class AppContext:
+    """
+    Owns the process-wide configuration, logger, metrics, storage engine,
+    D-Bus connection and scanner backend. Components receive a context instead of
+    building their own, so a process has one handler set, one engine and one
+    bus connection. Tests can pass fakes for any of them, such as the FakeBus
+    in tests/fakes.py.
+    """
+
+    _default: Optional['AppContext'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, config_manager: Optional[ConfigManager] = None,
+                 logger: Optional[Logger] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 storage: Optional[StorageManager] = None,
+                 bus=None,
+                 backend: Optional[ScannerBackend] = None):
+        self.config_manager = config_manager or ConfigManager()
+        self.logger = logger or Logger(self.config_manager)
+        self.metrics = metrics or MetricsRegistry(self.config_manager.get_config().metrics_enabled)
+        self._storage = storage
+        self._bus = bus
+        self._backend = backend
+        # Reentrant: the backend property connects the bus under the same lock
+        self._lock = threading.RLock()
+
+    @classmethod
+    def default(cls) -> 'AppContext':
+        """Get the process-wide context, creating it on first use."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def config(self) -> ScannerConfig:
+        """Get the current configuration."""
+        return self.config_manager.get_config()
+
+    @property
+    def storage(self) -> StorageManager:
+        """Get the storage manager, opening the database on first use."""
+        with self._lock:
+            if self._storage is None:
+                self._storage = StorageManager(self.config_manager, self.logger, self.metrics)
+            return self._storage
+
+    @property
+    def bus(self):
+        """Get the D-Bus system bus, connecting on first use."""
+        with self._lock:
+            if self._bus is None:
+                from pydbus import SystemBus
+                self._bus = SystemBus()
+            return self._bus
+
+    @property
+    def backend(self) -> ScannerBackend:
+        """Get the configured scanner backend, creating it on first use."""
+        with self._lock:
+            if self._backend is None:
+                self._backend = create_backend(self.config, lambda: self.bus)
+            return self._backend
+
+    def close(self) -> None:
+        """Flush and release the backend, storage engine and logging thread."""
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        if self._storage is not None:
+            self._storage.close()
+        self.logger.close()
@@ -0,0 +1,171 @@
+"""
+Streaming export of the scan history to CSV, NDJSON or Parquet.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from .context import AppContext
+from .storage import EXPORT_COLUMNS, StorageManager
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+class _LastId:
+    """Passes rows through, remembering the count and the last id seen."""
+
+    def __init__(self, rows: Iterable[Dict]):
+        self.rows = rows
+        self.count = 0
+        self.last_id: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self.rows:
+            self.count += 1
+            self.last_id = row['id']
+            yield row
+
+def _format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def write_csv(rows: Iterable[Dict], stream, header: bool = True) -> None:
+    """Write rows as CSV with a header line."""
+    writer = csv.writer(stream)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_format_value(row[column]) for column in EXPORT_COLUMNS])
+
+def write_ndjson(rows: Iterable[Dict], stream) -> None:
+    """Write rows as newline-delimited JSON objects."""
+    for row in rows:
+        stream.write(json.dumps({column: _format_value(row[column]) for column in EXPORT_COLUMNS}))
+        stream.write('\n')
+
+def write_parquet(rows: Iterable[Dict], path: str, batch_size: int = 10000) -> None:
+    """Write rows to a Parquet file, one row group per batch_size rows. Needs pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('scan_time', pa.timestamp('us')),
+        ('device_mac', pa.string()),
+        ('device_name', pa.string()),
+        ('device_class', pa.string()),
+        ('manufacturer', pa.string()),
+        ('signal_strength', pa.int16()),
+        ('device_type', pa.string()),
+        ('is_mobile', pa.bool_()),
+        ('adapter', pa.string()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        columns = {column: [] for column in EXPORT_COLUMNS}
+        pending = 0
+        for row in rows:
+            for column in EXPORT_COLUMNS:
+                columns[column].append(row[column])
+            pending += 1
+            if pending >= batch_size:
+                writer.write_batch(pa.record_batch(list(columns.values()), schema=schema))
+                columns = {column: [] for column in EXPORT_COLUMNS}
+                pending = 0
+        if pending:
+            writer.write_batch(pa.record_batch(list(columns.values()), schema=schema))
+
+def export_scan_history(storage: StorageManager, path: str, format: str = 'csv',
+                        start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        mac_addresses: Optional[Sequence[str]] = None, after_id: Optional[int] = None,
+                        append: bool = False, batch_size: int = 1000) -> Tuple[int, Optional[int]]:
+    """
+    Export scan results joined with their devices to path.
+    Rows stream from the database batch_size at a time, so memory use is
+    constant whatever the table size. With append, CSV and NDJSON output is
+    added to an existing file (without a second CSV header). Returns the
+    number of rows written and the last exported id, which can be passed
+    back as after_id to resume.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    if append and format == 'parquet':
+        raise ValueError("Parquet files can't be appended to")
+
+    rows = _LastId(storage.iter_scan_history(start, end, mac_addresses, after_id, batch_size))
+    if format == 'parquet':
+        write_parquet(rows, path, max(batch_size, 10000))
+    else:
+        has_content = append and os.path.exists(path) and os.path.getsize(path) > 0
+        with open(path, 'a' if append else 'w', newline='') as stream:
+            if format == 'csv':
+                write_csv(rows, stream, header=not has_content)
+            else:
+                write_ndjson(rows, stream)
+    return rows.count, rows.last_id
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO-8601 UTC timestamp argument."""
+    return datetime.fromisoformat(value)
+
+def read_resume_id(path: str) -> Optional[int]:
+    """Read the last exported id from a resume file, if there is one."""
+    try:
+        with open(path) as resume_file:
+            content = resume_file.read().strip()
+        return int(content) if content else None
+    except FileNotFoundError:
+        return None
+
+def main():
+    """Main entry point for the export tool."""
+    parser = argparse.ArgumentParser(description="Export the Bluetooth scanner's scan history")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="Output format, default from the file extension or csv")
+    parser.add_argument("--start", type=parse_time, help="Only scans at or after this time (UTC)")
+    parser.add_argument("--end", type=parse_time, help="Only scans before this time (UTC)")
+    parser.add_argument("--device", action="append", dest="devices", metavar="MAC",
+                        help="Only this device; repeat for several")
+    parser.add_argument("--after-id", type=int, help="Only scan results with a larger id")
+    parser.add_argument("--resume-file",
+                        help="Read the starting id from this file and store the last exported id in it")
+    parser.add_argument("--append", action="store_true", help="Append to an existing CSV or NDJSON file")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per database round trip")
+    args = parser.parse_args()
+
+    output_format = args.format
+    if output_format is None:
+        extension = os.path.splitext(args.output)[1].lstrip('.').lower()
+        output_format = {'jsonl': 'ndjson', 'json': 'ndjson', 'pq': 'parquet'}.get(extension, extension)
+        if output_format not in FORMATS:
+            output_format = 'csv'
+
+    after_id = args.after_id
+    if after_id is None and args.resume_file:
+        after_id = read_resume_id(args.resume_file)
+
+    context = AppContext.default()
+    logger = context.logger
+
+    try:
+        count, last_id = export_scan_history(
+            context.storage, args.output, output_format,
+            start=args.start, end=args.end, mac_addresses=args.devices,
+            after_id=after_id, append=args.append, batch_size=args.batch_size
+        )
+        if args.resume_file and last_id is not None:
+            with open(args.resume_file, 'w') as resume_file:
+                resume_file.write(f"{last_id}\n")
+        logger.info(f"Exported {count} scan results to {args.output} (last id {last_id})")
+    except Exception as e:
+        logger.error(f"Export failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        context.close()
+
+if __name__ == "__main__":
+    main()
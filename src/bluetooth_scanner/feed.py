@@ -0,0 +1,292 @@
+"""
+Live device feed from the scanner to viewers over a Unix-domain socket.
+
+The scanner publishes each cycle's changes as newline-delimited JSON: a
+"snapshot" message with every live device when a viewer connects, then one
+"delta" message per cycle listing devices added, changed and removed. A
+device is removed once it has gone unseen for the feed timeout.
+"""
+import json
+import os
+import queue
+import socket
+import stat
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from .logger import Logger
+
+# Messages buffered per viewer before a slow viewer is disconnected
+CLIENT_QUEUE_SIZE = 64
+
+def _encode(message: Dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+def epoch(value: Optional[datetime]) -> Optional[float]:
+    """Convert a naive UTC datetime from the database to epoch seconds."""
+    return value.replace(tzinfo=timezone.utc).timestamp() if value is not None else None
+
+class _FeedClient:
+    """One connected viewer, fed from its own queue by a sender thread."""
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.queue: queue.Queue = queue.Queue(CLIENT_QUEUE_SIZE)
+        self.closed = False
+        self.thread = threading.Thread(target=self._send_loop, name="feed-client", daemon=True)
+
+    def send(self, data: bytes) -> bool:
+        """Queue a message; False when the viewer has fallen too far behind."""
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                pass
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _send_loop(self) -> None:
+        try:
+            while True:
+                data = self.queue.get()
+                if data is None or self.closed:
+                    break
+                self.connection.sendall(data)
+        except OSError:
+            pass
+        finally:
+            self.closed = True
+            self.connection.close()
+
+class FeedPublisher:
+    """
+    Serves the scanner's live device set on a Unix-domain socket.
+    Keeps one record per live device, so a viewer that connects mid-run gets
+    a full snapshot without touching the database. Each viewer has its own
+    bounded queue and sender thread; a viewer that can't keep up is
+    disconnected rather than slowing the scanner, and resyncs on reconnect.
+    """
+
+    def __init__(self, path: str, logger: Logger, timeout: float = 300.0):
+        self.path = path
+        self.logger = logger
+        self.timeout = timeout
+        self.devices: Dict[str, Dict] = {}
+        self._clients: List[_FeedClient] = []
+        self._server: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._next_expiry = 0.0
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def start(self) -> None:
+        """Listen for viewers."""
+        if self._server is not None:
+            return
+        try:
+            # A socket left behind by a scanner that didn't shut down cleanly
+            if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(self.path)
+            server.listen()
+            self._server = server
+            threading.Thread(target=self._accept_loop, name="feed-accept", daemon=True).start()
+            self.logger.info(f"Publishing live device feed on {self.path}")
+        except Exception as e:
+            self._server = None
+            self.logger.error(f"Could not start live feed: {str(e)}")
+
+    def stop(self) -> None:
+        """Disconnect every viewer and remove the socket."""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.close()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _accept_loop(self) -> None:
+        server = self._server
+        while self._server is server:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                break
+            client = _FeedClient(connection)
+            with self._lock:
+                # Queued under the lock so no delta can slip in ahead of the snapshot
+                client.send(_encode({
+                    'type': 'snapshot',
+                    'time': time.time(),
+                    'devices': list(self.devices.values())
+                }))
+                self._clients.append(client)
+            client.thread.start()
+            self.logger.debug("Live feed viewer connected")
+
+    def publish(self, batch: List[Tuple[Dict, Dict]], now: Optional[float] = None) -> Dict:
+        """
+        Apply a cycle of stored (device_info, classification) pairs and send
+        the resulting delta to every viewer. Returns the delta message.
+        """
+        now = time.time() if now is None else now
+        added, changed, removed = [], [], []
+        with self._lock:
+            for device_info, classification in batch:
+                mac_address = device_info.get('mac_address')
+                if not mac_address:
+                    continue
+                previous = self.devices.get(mac_address)
+                record = {
+                    'mac_address': mac_address,
+                    # Keep known values when this sighting didn't carry one, as storage does
+                    'device_name': device_info.get('device_name') or (previous or {}).get('device_name', ''),
+                    'device_class': device_info.get('device_class') or (previous or {}).get('device_class', ''),
+                    'manufacturer': device_info.get('manufacturer') or (previous or {}).get('manufacturer', ''),
+                    'signal_strength': device_info.get('signal_strength', 0),
+                    'device_type': classification['device_type'],
+                    'is_mobile': classification['is_mobile'],
+                    'adapter': device_info.get('adapter'),
+                    'first_seen': previous['first_seen'] if previous else device_info.get('last_seen') or now,
+                    'last_seen': device_info.get('last_seen') or now
+                }
+                self.devices[mac_address] = record
+                (changed if previous else added).append(record)
+
+            if now >= self._next_expiry:
+                cutoff = now - self.timeout
+                removed = [
+                    mac_address for mac_address, record in self.devices.items()
+                    if record['last_seen'] < cutoff
+                ]
+                for mac_address in removed:
+                    del self.devices[mac_address]
+                self._next_expiry = now + 1.0
+
+            message = {'type': 'delta', 'time': now, 'added': added, 'changed': changed, 'removed': removed}
+            if (added or changed or removed) and self._clients:
+                data = _encode(message)
+                for client in self._clients:
+                    if client.closed or not client.send(data):
+                        client.close()
+                lagging = [client for client in self._clients if client.closed]
+                if lagging:
+                    self._clients = [client for client in self._clients if not client.closed]
+                    self.logger.debug("Dropped %d live feed viewers", len(lagging))
+        return message
+
+class FeedSubscriber:
+    """
+    Keeps an in-memory copy of the scanner's live device set.
+    Seed it once from the database with load, then start it to follow the
+    feed; it reconnects on its own whenever the scanner restarts. version
+    increases with every applied change, so a viewer can tell when to redraw.
+    """
+
+    # Seconds between connection attempts while the scanner is down
+    RETRY_INTERVAL = 2.0
+
+    def __init__(self, path: str, logger: Logger, timeout: float = 300.0):
+        self.path = path
+        self.logger = logger
+        self.timeout = timeout
+        self.devices: Dict[str, Dict] = {}
+        self.version = 0
+        self.connected = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, devices: List[Dict]) -> None:
+        """Seed the model with device records, e.g. from the database at startup."""
+        with self._lock:
+            for device in devices:
+                self.devices[device['mac_address']] = device
+            self.version += 1
+
+    def start(self) -> None:
+        """Follow the feed in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="feed-subscriber", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        connection = self._socket
+        if connection is not None:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def snapshot(self) -> List[Dict]:
+        """Get the live devices, dropping any unseen for longer than the timeout."""
+        cutoff = time.time() - self.timeout
+        with self._lock:
+            expired = [mac for mac, device in self.devices.items() if (device.get('last_seen') or 0) < cutoff]
+            for mac_address in expired:
+                del self.devices[mac_address]
+            if expired:
+                self.version += 1
+            return list(self.devices.values())
+
+    def apply(self, message: Dict) -> None:
+        """Apply one feed message to the model."""
+        with self._lock:
+            if message.get('type') == 'snapshot':
+                for device in message['devices']:
+                    self.devices[device['mac_address']] = device
+            elif message.get('type') == 'delta':
+                for device in message['added']:
+                    self.devices[device['mac_address']] = device
+                for device in message['changed']:
+                    self.devices[device['mac_address']] = device
+                for mac_address in message['removed']:
+                    self.devices.pop(mac_address, None)
+            else:
+                return
+            self.version += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                    connection.connect(self.path)
+                    self._socket = connection
+                    self.connected = True
+                    self.logger.debug("Connected to live feed on %s", self.path)
+                    with connection.makefile('rb') as stream:
+                        for line in stream:
+                            self.apply(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._socket = None
+                self.connected = False
+            self._stop.wait(self.RETRY_INTERVAL)
@@ -0,0 +1,100 @@
+"""
+Pre-storage filtering of device readings.
+"""
+import threading
+import time
+from typing import Dict, List, Tuple
+
+class ReadingFilter:
+    """
+    Decides which readings reach storage. Readings weaker than
+    min_signal_strength are dropped before classification, and a reading
+    whose RSSI is within rssi_delta of the last stored one for that device,
+    with the same name and classification, gets no scan_results row unless
+    heartbeat_interval seconds have passed since that device's last row.
+    Thread-safe; counters accumulate until take_stats is called.
+    """
+
+    # Last-written entries kept before expired ones are swept
+    SWEEP_SIZE = 10000
+
+    def __init__(self, min_signal_strength: int, rssi_delta: int = 5,
+                 heartbeat_interval: float = 300.0, suppress: bool = True):
+        self.min_signal_strength = min_signal_strength
+        self.rssi_delta = rssi_delta
+        self.heartbeat_interval = heartbeat_interval
+        self.suppress = suppress
+        self._written: Dict[str, Tuple] = {}  # mac -> (rssi, name, type, is_mobile, written_at)
+        self._sweep_at = self.SWEEP_SIZE
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'readings': 0, 'below_threshold': 0, 'suppressed': 0, 'written': 0}
+
+    def accept_signal(self, device_info: Dict) -> bool:
+        """Check a reading against min_signal_strength, counting it either way."""
+        rssi = device_info.get('signal_strength')
+        # 0 means BlueZ reported no RSSI, which isn't a weak signal
+        accepted = not rssi or rssi >= self.min_signal_strength
+        with self._lock:
+            self._stats['readings'] += 1
+            if not accepted:
+                self._stats['below_threshold'] += 1
+        return accepted
+
+    def filter_signal(self, devices: List[Dict]) -> List[Dict]:
+        """Drop readings weaker than min_signal_strength."""
+        minimum = self.min_signal_strength
+        kept = [
+            device_info for device_info in devices
+            if not device_info.get('signal_strength') or device_info['signal_strength'] >= minimum
+        ]
+        with self._lock:
+            self._stats['readings'] += len(devices)
+            self._stats['below_threshold'] += len(devices) - len(kept)
+        return kept
+
+    def persist_mask(self, batch: List[Tuple[Dict, Dict]]) -> List[bool]:
+        """Tell, per (device_info, classification) pair, whether it adds anything to the last stored row."""
+        now = time.time()
+        mask = []
+        with self._lock:
+            for device_info, classification in batch:
+                mac_address = device_info.get('mac_address')
+                rssi = device_info.get('signal_strength') or 0
+                key = (
+                    device_info.get('device_name', ''),
+                    classification['device_type'],
+                    classification['is_mobile']
+                )
+                last = self._written.get(mac_address)
+                if (self.suppress and last is not None
+                        and last[1:4] == key
+                        and abs(rssi - last[0]) <= self.rssi_delta
+                        and now - last[4] < self.heartbeat_interval):
+                    mask.append(False)
+                    continue
+                self._written[mac_address] = (rssi,) + key + (now,)
+                mask.append(True)
+
+            written = sum(mask)
+            self._stats['suppressed'] += len(batch) - written
+            self._stats['written'] += written
+            if len(self._written) > self._sweep_at:
+                # Entries past their heartbeat can't suppress anything any more
+                self._written = {
+                    mac_address: last for mac_address, last in self._written.items()
+                    if now - last[4] < self.heartbeat_interval
+                }
+                self._sweep_at = max(self.SWEEP_SIZE, 2 * len(self._written))
+        return mask
+
+    def take_stats(self) -> Dict:
+        """Get the counters since the last call and reset them, adding the suppression ratio."""
+        with self._lock:
+            stats, self._stats = self._stats, self._empty_stats()
+        dropped = stats['below_threshold'] + stats['suppressed']
+        stats['suppression_ratio'] = dropped / stats['readings'] if stats['readings'] else 0.0
+        return stats
@@ -1,58 +1,163 @@
 """
 Logging system for the Bluetooth Scanner.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from .config import ConfigManager
 
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks or formats on the calling thread."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record can be handed over
+        # as-is and its message formatted on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 class Logger:
     """Manages logging for the Bluetooth Scanner."""
-    
+
+    # Records buffered for the listener thread before new ones are dropped
+    QUEUE_SIZE = 10000
+    # Rate-limit entries kept before expired ones are swept
+    DEVICE_SWEEP_SIZE = 10000
+
+    # The Logger whose handlers are attached to the shared "bluetooth_scanner" logger
+    _active: Optional['Logger'] = None
+
     def __init__(self, config_manager: ConfigManager):
+        # Only one handler set per process: a new Logger replaces the previous one
+        if Logger._active is not None:
+            Logger._active.close()
+        Logger._active = self
+
+        config = config_manager.get_config()
         self.logger = logging.getLogger("bluetooth_scanner")
-        self.logger.setLevel(config_manager.get_config().log_level)
-        
+        self.logger.setLevel(config.log_level)
+        self.device_interval = config.log_device_interval
+        self._device_log_times: Dict[tuple, float] = {}
+        self._device_sweep_at = self.DEVICE_SWEEP_SIZE
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._handlers = []
+
         # Create handlers
         console_handler = logging.StreamHandler(sys.stdout)
-        file_handler = logging.FileHandler("bluetooth_scanner.log")
-        
+        file_handler = logging.handlers.RotatingFileHandler(
+            config.log_file,
+            maxBytes=config.log_max_bytes,
+            backupCount=config.log_backup_count
+        )
+
         # Create formatters and add it to handlers
         log_format = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         console_handler.setFormatter(log_format)
         file_handler.setFormatter(log_format)
-        
+
         # Add handlers to the logger
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-    
-    def info(self, message: str) -> None:
+        if config.log_async:
+            # Console and file I/O happen on a listener thread; callers only enqueue
+            self.queue_handler = _NonBlockingQueueHandler(queue.Queue(self.QUEUE_SIZE))
+            self._listener = logging.handlers.QueueListener(
+                self.queue_handler.queue, console_handler, file_handler
+            )
+            self._listener.start()
+            self._handlers = [self.queue_handler]
+        else:
+            self._handlers = [console_handler, file_handler]
+        self._output_handlers = [console_handler, file_handler]
+        for handler in self._handlers:
+            self.logger.addHandler(handler)
+
+    def close(self) -> None:
+        """Write out queued records, stop the listener thread and detach the handlers."""
+        for handler in self._handlers:
+            self.logger.removeHandler(handler)
+        self._handlers = []
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        for handler in self._output_handlers:
+            handler.close()
+        self._output_handlers = []
+        if Logger._active is self:
+            Logger._active = None
+
+    @staticmethod
+    def _close_active() -> None:
+        """Write out the active Logger's queued records at interpreter exit."""
+        if Logger._active is not None:
+            Logger._active.close()
+
+    def info(self, message: str, *args) -> None:
         """Log an info message."""
-        self.logger.info(message)
-    
-    def error(self, message: str) -> None:
+        self.logger.info(message, *args)
+
+    def error(self, message: str, *args) -> None:
         """Log an error message."""
-        self.logger.error(message)
-    
-    def debug(self, message: str) -> None:
+        self.logger.error(message, *args)
+
+    def debug(self, message: str, *args) -> None:
         """Log a debug message."""
-        self.logger.debug(message)
-    
-    def warning(self, message: str) -> None:
+        self.logger.debug(message, *args)
+
+    def warning(self, message: str, *args) -> None:
         """Log a warning message."""
-        self.logger.warning(message)
-    
+        self.logger.warning(message, *args)
+
+    def _should_log_device(self, event: str, device_info: dict, level: int) -> bool:
+        """Check the level and the per-device rate limit before any formatting."""
+        if not self.logger.isEnabledFor(level):
+            return False
+        key = (event, device_info.get('mac_address', ''))
+        now = time.monotonic()
+        last = self._device_log_times.get(key)
+        if last is not None and now - last < self.device_interval:
+            return False
+        if len(self._device_log_times) > self._device_sweep_at:
+            self._device_log_times = {
+                seen: logged for seen, logged in self._device_log_times.items()
+                if now - logged < self.device_interval
+            }
+            self._device_sweep_at = max(self.DEVICE_SWEEP_SIZE, 2 * len(self._device_log_times))
+        self._device_log_times[key] = now
+        return True
+
     def log_device_discovery(self, device_info: dict) -> None:
         """Log device discovery information."""
-        self.info(f"Device discovered: {device_info}")
-    
-    def log_classification(self, device_info: dict, classification: str) -> None:
+        if self._should_log_device("discovery", device_info, logging.INFO):
+            self.logger.info("Device discovered: %s", device_info)
+
+    def log_classification(self, device_info: dict, classification: dict) -> None:
         """Log device classification information."""
-        self.info(f"Device classified: {device_info} as {classification}")
-    
-    def log_storage_operation(self, operation: str, details: str) -> None:
-        """Log storage operation information."""
-        self.debug(f"Storage operation: {operation} - {details}") 
\ No newline at end of file
+        if self._should_log_device("classification", device_info, logging.INFO):
+            self.logger.info(
+                "Device classified: %s as %s (confidence: %.2f)",
+                device_info,
+                'mobile phone' if classification['is_mobile'] else 'other device',
+                classification['confidence']
+            )
+
+    def log_storage_operation(self, operation: str, details: str, *args) -> None:
+        """Log storage operation information; details is a %-style format for args."""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Storage operation: %s - " + details, operation, *args)
+
+# Registered once: replaced Loggers are closed by their successor, so only the active one is left
+atexit.register(Logger._close_active)
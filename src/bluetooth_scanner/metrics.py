@@ -0,0 +1,326 @@
+"""
+Counters, gauges and histograms for the Bluetooth Scanner, with Prometheus
+text exposition over a local HTTP endpoint and a periodic stats log line.
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import ConfigManager
+from .logger import Logger
+
+# Upper bounds in seconds, from a fast classification up to a slow SD card commit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """Render a Prometheus label set."""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class _Timer:
+    """Context manager observing its elapsed time into a histogram."""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: '_HistogramChild'):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from function whenever the gauge is collected."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return float('nan')
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        """Time a block: `with histogram.time(): ...`."""
+        return _Timer(self)
+
+class _Metric:
+    """A metric family; the unlabelled methods act on the child without labels."""
+
+    child_type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), **options):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._options = options
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Get the child for a set of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        return self.child_type()
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+class Counter(_Metric):
+    type_name = 'counter'
+    child_type = _CounterChild
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in self.children():
+            yield self.name, _format_labels(self.labelnames, values), child.value
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+    child_type = _GaugeChild
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+    def samples(self):
+        for values, child in self.children():
+            yield self.name, _format_labels(self.labelnames, values), child.get()
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def _new_child(self):
+        return _HistogramChild(self._options.get('buckets') or DEFAULT_BUCKETS)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self):
+        for values, child in self.children():
+            cumulative = 0
+            for bound, count in zip(child.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, values, f'le="{le}"'), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, values), child.sum
+            yield f'{self.name}_count', _format_labels(self.labelnames, values), child.count
+
+class _NullMetric:
+    """Stands in for every metric when instrumentation is disabled."""
+
+    class _NullTimer:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    _timer = _NullTimer()
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self):
+        return self._timer
+
+NULL_METRIC = _NullMetric()
+
+class MetricsRegistry:
+    """
+    Creates and collects metrics. Asking for an existing name returns the
+    same metric, so components can share families such as the stage timer.
+    A disabled registry hands out a shared no-op metric instead.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_type, name: str, documentation: str, labelnames: Tuple[str, ...], **options):
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_type(name, documentation, labelnames, **options)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def _collect(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._collect():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """One-line digest: counter and gauge values, mean histogram times in ms."""
+        parts = []
+        for metric in self._collect():
+            short_name = metric.name.replace('bluetooth_scanner_', '')
+            for values, child in metric.children():
+                label = short_name + (f"[{','.join(values)}]" if values else '')
+                if isinstance(metric, Histogram):
+                    if child.count:
+                        parts.append(f"{label}={child.sum / child.count * 1000:.1f}ms/{child.count}")
+                elif isinstance(metric, Gauge):
+                    parts.append(f"{label}={child.get():g}")
+                else:
+                    parts.append(f"{label}={child.value:g}")
+        return ' '.join(parts)
+
+class MetricsExporter:
+    """Serves the registry over HTTP and logs a stats line periodically."""
+
+    def __init__(self, registry: MetricsRegistry, config_manager: ConfigManager, logger: Logger):
+        self.registry = registry
+        self.config = config_manager.get_config()
+        self.logger = logger
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._reporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start the HTTP endpoint and stats logging, as configured."""
+        if not self.registry.enabled:
+            return
+        self._stop.clear()
+        if self.config.metrics_port and self._server is None:
+            try:
+                self._server = ThreadingHTTPServer(
+                    (self.config.metrics_host, self.config.metrics_port), self._handler()
+                )
+                self._server.daemon_threads = True
+                threading.Thread(
+                    target=self._server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+                self.logger.info(
+                    f"Serving metrics on http://{self.config.metrics_host}:{self.config.metrics_port}/metrics"
+                )
+            except Exception as e:
+                self._server = None
+                self.logger.error(f"Could not start metrics endpoint: {str(e)}")
+        if self.config.metrics_log_interval > 0 and self._reporter is None:
+            self._reporter = threading.Thread(target=self._report, name="metrics-log", daemon=True)
+            self._reporter.start()
+
+    def stop(self) -> None:
+        """Stop the HTTP endpoint and stats logging."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._reporter is not None:
+            self._reporter.join(timeout=5)
+            self._reporter = None
+
+    def _report(self) -> None:
+        while not self._stop.wait(self.config.metrics_log_interval):
+            self.logger.info("Stats: %s", self.registry.summary())
+
+    def _handler(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes would otherwise print a line each to stderr
+                pass
+
+        return MetricsHandler
@@ -0,0 +1,197 @@
+"""
+In-memory presence tracking from smoothed RSSI.
+"""
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+ABSENT = 0
+PRESENT = 1
+
+# Ring positions and counts are unsigned bytes
+MAX_WINDOW = 255
+
+class PresenceEngine:
+    """
+    Tracks which devices are in range, keyed by MAC.
+
+    Each device gets a slot in a set of flat, preallocated-per-slot arrays:
+    a ring buffer of the last `window` raw RSSI readings (one signed byte
+    each), an exponential moving average of RSSI and a hysteresis state. A
+    device is marked present once its smoothed RSSI stays at or above
+    enter_rssi for confirm_samples readings, and absent once it stays below
+    exit_rssi for as long or goes unseen for timeout seconds. Slots of
+    devices that time out are reused.
+
+    Memory per tracked device is `window` + 16 bytes of array storage
+    (32 bytes with the default window of 16) plus the MAC key and its
+    dict entry, roughly 170 bytes, so 10k devices need under 2 MB
+    (benchmarks/bench_presence.py measures it). window is at most 255.
+    """
+
+    def __init__(self, window: int = 16, alpha: float = 0.3,
+                 enter_rssi: int = -75, exit_rssi: int = -85,
+                 confirm_samples: int = 2, timeout: float = 120.0,
+                 sample_interval: float = 60.0):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f"Presence window must be 1 to {MAX_WINDOW} readings, not {window}")
+        self.window = window
+        self.alpha = alpha
+        self.enter_rssi = enter_rssi
+        self.exit_rssi = exit_rssi
+        self.confirm_samples = confirm_samples
+        self.timeout = timeout
+        self.sample_interval = sample_interval
+
+        self._slots: Dict[str, int] = {}
+        self._macs: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._rssi = array('b')  # window readings per slot
+        self._head = array('B')  # next ring position
+        self._count = array('B')  # readings in the ring, up to window
+        self._streak = array('B')  # consecutive readings past the opposite threshold
+        self._state = array('B')
+        self._ema = array('f')
+        self._last_seen = array('d')
+        self._lock = threading.Lock()
+        self._next_sample = 0.0
+        self._next_expiry = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _allocate(self, mac_address: str) -> int:
+        """Get a free slot for a newly seen device."""
+        if self._free:
+            slot = self._free.pop()
+            self._macs[slot] = mac_address
+            self._head[slot] = self._count[slot] = self._streak[slot] = self._state[slot] = 0
+        else:
+            slot = len(self._macs)
+            self._macs.append(mac_address)
+            self._rssi.frombytes(bytes(self.window))
+            for column in (self._head, self._count, self._streak, self._state, self._ema, self._last_seen):
+                column.append(0)
+        self._slots[mac_address] = slot
+        return slot
+
+    def update(self, readings: List[Dict], now: Optional[float] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Feed a batch of device_info readings.
+        Returns (events, samples): arrived/left transitions, plus one smoothed
+        sample per present device each time sample_interval elapses.
+        """
+        now = time.time() if now is None else now
+        events = []
+        window, alpha = self.window, self.alpha
+        enter_rssi, exit_rssi, confirm = self.enter_rssi, self.exit_rssi, self.confirm_samples
+        slots, ring, head, count = self._slots, self._rssi, self._head, self._count
+        streak, state, ema, last_seen = self._streak, self._state, self._ema, self._last_seen
+
+        with self._lock:
+            for reading in readings:
+                rssi = reading.get('signal_strength')
+                mac_address = reading.get('mac_address')
+                # BlueZ reports no RSSI (0 here) for cached devices that aren't advertising
+                if not rssi or not mac_address:
+                    continue
+                rssi = max(-128, min(127, int(rssi)))
+                slot = slots.get(mac_address)
+                if slot is None:
+                    slot = self._allocate(mac_address)
+
+                position = head[slot]
+                ring[slot * window + position] = rssi
+                head[slot] = (position + 1) % window
+                if count[slot] < window:
+                    count[slot] += 1
+                smoothed = rssi if count[slot] == 1 else ema[slot] + alpha * (rssi - ema[slot])
+                ema[slot] = smoothed
+                last_seen[slot] = reading.get('last_seen') or now
+
+                if state[slot] == ABSENT:
+                    crossing = smoothed >= enter_rssi
+                else:
+                    crossing = smoothed < exit_rssi
+                if not crossing:
+                    streak[slot] = 0
+                    continue
+                streak[slot] = min(streak[slot] + 1, 255)
+                if streak[slot] >= confirm:
+                    streak[slot] = 0
+                    state[slot] = PRESENT if state[slot] == ABSENT else ABSENT
+                    events.append(self._event(slot, 'arrived' if state[slot] == PRESENT else 'left', last_seen[slot]))
+
+            if now >= self._next_expiry:
+                # A full sweep is linear in tracked devices, so run it at most once a second
+                events.extend(self._expire(now))
+                self._next_expiry = now + 1.0
+
+            samples = []
+            if now >= self._next_sample:
+                samples = [
+                    {'device_mac': mac_address, 'sample_time': now, 'rssi': round(ema[slot])}
+                    for mac_address, slot in slots.items() if state[slot] == PRESENT
+                ]
+                self._next_sample = now + self.sample_interval
+        return events, samples
+
+    def _expire(self, now: float) -> List[Dict]:
+        """Release devices unseen for timeout seconds, marking present ones as left."""
+        events = []
+        cutoff = now - self.timeout
+        for mac_address, slot in list(self._slots.items()):
+            if self._last_seen[slot] >= cutoff:
+                continue
+            if self._state[slot] == PRESENT:
+                events.append(self._event(slot, 'left', now))
+            del self._slots[mac_address]
+            self._macs[slot] = None
+            self._free.append(slot)
+        return events
+
+    def _event(self, slot: int, event: str, event_time: float) -> Dict:
+        """Build a presence transition record."""
+        return {
+            'device_mac': self._macs[slot],
+            'event': event,
+            'event_time': event_time,
+            'rssi': round(self._ema[slot])
+        }
+
+    def is_present(self, mac_address: str) -> bool:
+        """Check whether a device is currently considered present."""
+        slot = self._slots.get(mac_address)
+        return slot is not None and self._state[slot] == PRESENT
+
+    def present_devices(self) -> List[str]:
+        """Get the MAC addresses of every present device."""
+        with self._lock:
+            return [mac_address for mac_address, slot in self._slots.items() if self._state[slot] == PRESENT]
+
+    def smoothed_rssi(self, mac_address: str) -> Optional[float]:
+        """Get a device's smoothed RSSI, or None if it isn't tracked."""
+        slot = self._slots.get(mac_address)
+        return None if slot is None else self._ema[slot]
+
+    def rssi_variance(self, mac_address: str) -> Optional[float]:
+        """Get the variance of a device's raw RSSI readings in the ring buffer."""
+        with self._lock:
+            slot = self._slots.get(mac_address)
+            if slot is None or not self._count[slot]:
+                return None
+            count = self._count[slot]
+            start = slot * self.window
+            # The ring fills from position 0, so the first count entries are valid
+            readings = self._rssi[start:start + count]
+        mean = sum(readings) / count
+        return sum((value - mean) ** 2 for value in readings) / count
+
+    def memory_bytes(self) -> int:
+        """Get the bytes held by the per-device arrays (excluding the MAC index)."""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self._rssi, self._head, self._count, self._streak,
+                           self._state, self._ema, self._last_seen)
+        )
@@ -0,0 +1,56 @@
+"""
+Scheduled data retention for the Bluetooth Scanner.
+"""
+import threading
+from typing import Dict, Optional
+from .config import ConfigManager
+from .logger import Logger
+from .storage import StorageManager
+
+class RetentionWorker:
+    """Runs StorageManager.cleanup_old_data on a background schedule."""
+
+    def __init__(self, storage: StorageManager, config_manager: ConfigManager, logger: Logger):
+        self.storage = storage
+        self.config = config_manager.get_config()
+        self.logger = logger
+        self.last_stats: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the retention thread, unless retention_interval is 0."""
+        if self._thread is not None or self.config.retention_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Retention runs every {self.config.retention_interval} seconds")
+
+    def stop(self) -> None:
+        """Stop the retention thread after the chunk it is deleting."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self) -> Dict:
+        """Run one retention pass and log what it freed."""
+        stats = self.storage.cleanup_old_data(self._stop)
+        self.last_stats = stats
+        self.logger.info(
+            f"Retention removed {stats['scan_results']} scan results, "
+            f"{stats['adverts']} adverts, {stats['advert_segments']} advert segments, {stats['devices']} devices, "
+            f"{stats['rollups']} rollups, {stats['presence']} presence rows; freed {stats['bytes_freed']} bytes"
+        )
+        return stats
+
+    def _run(self) -> None:
+        """Run retention at startup and then every retention_interval seconds."""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Error running retention: {str(e)}")
+            self._stop.wait(self.config.retention_interval)
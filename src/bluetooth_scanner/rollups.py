@@ -0,0 +1,54 @@
+"""
+Command-line access to the occupancy rollups.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from .context import AppContext
+from .storage import ROLLUP_GRANULARITIES
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO-8601 UTC timestamp argument."""
+    return datetime.fromisoformat(value)
+
+def main():
+    """Main entry point for the rollup tool."""
+    parser = argparse.ArgumentParser(description="Occupancy rollups for the Bluetooth scanner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill", help="Rebuild rollups from raw scan results")
+    backfill.add_argument("--chunk-size", type=int, default=10000)
+
+    show = commands.add_parser("show", help="Print occupancy for a time range (UTC)")
+    show.add_argument("--start", type=parse_time, help="Range start, default 24 hours ago")
+    show.add_argument("--end", type=parse_time, help="Range end, default now")
+    show.add_argument("--granularity", choices=list(ROLLUP_GRANULARITIES))
+
+    args = parser.parse_args()
+
+    context = AppContext.default()
+    logger = context.logger
+    storage = context.storage
+
+    try:
+        if args.command == "backfill":
+            processed = storage.backfill_rollups(chunk_size=args.chunk_size)
+            logger.info(f"Rebuilt rollups from {processed} scan results")
+        else:
+            end = args.end or datetime.utcnow()
+            start = args.start or end - timedelta(days=1)
+            for row in storage.get_occupancy(start, end, args.granularity):
+                rssi_avg = f"{row['rssi_avg']:.1f}" if row['rssi_avg'] is not None else "-"
+                print(
+                    f"{row['bucket_start']:%Y-%m-%d %H:%M}  {row['granularity']:<6} "
+                    f"devices={row['devices']:<5} mobile={row['mobile_devices']:<5} "
+                    f"rssi min/avg/max={row['rssi_min']}/{rssi_avg}/{row['rssi_max']}"
+                )
+    except Exception as e:
+        logger.error(f"Rollup command failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        context.close()
+
+if __name__ == "__main__":
+    main()
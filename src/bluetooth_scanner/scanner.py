@@ -1,147 +1,630 @@
 """
 Main Bluetooth scanner service.
 """
+import threading
 import time
-from typing import Dict, List, Optional
-from pydbus import SystemBus
-from .config import ConfigManager
-from .logger import Logger
-from .storage import StorageManager
+from typing import Dict, List, Optional, Tuple
+from .adverts import ADVERT_PROPERTIES
+from .backends import (
+    DEVICE_INTERFACE, OBJECT_MANAGER_INTERFACE, PROPERTIES_INTERFACE, ADAPTER_INTERFACE
+)
 from .classifier import DeviceClassifier
+from .context import AppContext
+from .feed import FeedPublisher
+from .filters import ReadingFilter
+from .metrics import MetricsExporter
+from .presence import MAX_WINDOW, PresenceEngine
+from .retention import RetentionWorker
+from .scheduler import create_schedule
+from .sightings import SightingMerger
+
+# Device1 properties whose changes trigger a new scan result in signal mode
+TRACKED_PROPERTIES = {'RSSI', 'Name'}
 
 class BluetoothScanner:
     """Main Bluetooth scanner service."""
-    
-    def __init__(self):
-        self.config_manager = ConfigManager()
-        self.logger = Logger(self.config_manager)
-        self.storage = StorageManager(self.config_manager, self.logger)
-        self.classifier = DeviceClassifier(self.logger)
-        self.bus = SystemBus()
-        self.adapter = None
+
+    def __init__(self, context: Optional[AppContext] = None):
+        self.context = context or AppContext.default()
+        self.config_manager = self.context.config_manager
+        self.logger = self.context.logger
+        self.storage = self.context.storage
+        self.metrics = self.context.metrics
+        self.classifier = DeviceClassifier(
+            self.logger,
+            rules_path=self.config_manager.get_config().classifier_rules_path,
+            cache_size=self.config_manager.get_config().classifier_cache_size,
+            metrics=self.metrics
+        )
+        self.metrics_exporter = MetricsExporter(self.metrics, self.config_manager, self.logger)
+        self.retention = RetentionWorker(self.storage, self.config_manager, self.logger)
+        self.presence = self._create_presence_engine()
+        self.feed = self._create_feed_publisher()
+        self.reading_filter = ReadingFilter(
+            self.config_manager.get_config().min_signal_strength,
+            rssi_delta=self.config_manager.get_config().suppress_rssi_delta,
+            heartbeat_interval=self.config_manager.get_config().suppress_heartbeat,
+            suppress=self.config_manager.get_config().suppress_unchanged
+        )
+        self.last_filter_stats: Optional[Dict] = None
+        self._filter_report_at = time.monotonic()
+        self.backend = self.context.backend
+        self.adapter: Optional[str] = None
+        self.adapters: List[str] = []
+        self.merger = SightingMerger(self.config_manager.get_config().merge_window)
+        self.schedule = create_schedule(self.config_manager.get_config(), self.metrics)
         self.scanning = False
-    
+        self._discovery_stop = threading.Event()
+        self.known_devices: Dict[str, Dict] = {}
+        # Signal-mode readings waiting for the next flush into one transaction
+        self._signal_batch: List[Tuple[Dict, Dict]] = []
+        self.dbus_calls = 0  # D-Bus calls made in the current cycle
+        self.last_cycle_dbus_calls = 0
+        # Adapter threads of multi-adapter mode all count into dbus_calls
+        self._dbus_calls_lock = threading.Lock()
+        self._subscriptions = []
+        self._loop = None
+        self._init_metrics()
+
+    def _init_metrics(self) -> None:
+        """Create the scanner's counters, gauges and stage timers."""
+        stages = self.metrics.histogram(
+            'bluetooth_scanner_stage_seconds', 'Time spent per scanner stage', ('stage',)
+        )
+        self._dbus_time = stages.labels('dbus')
+        self._cycle_time = stages.labels('cycle')
+        self._presence_time = stages.labels('presence')
+        self._submit_time = stages.labels('submit')
+        self._cycles = self.metrics.counter('bluetooth_scanner_cycles_total', 'Scan cycles processed')
+        self._devices_seen = self.metrics.counter(
+            'bluetooth_scanner_devices_seen_total', 'Device readings received'
+        )
+        self._errors = self.metrics.counter(
+            'bluetooth_scanner_errors_total', 'Errors by component', ('component',)
+        ).labels('scanner')
+        self.metrics.gauge(
+            'bluetooth_scanner_dbus_calls_per_cycle', 'D-Bus calls made in the last cycle'
+        ).set_function(lambda: self.last_cycle_dbus_calls)
+
+        log_handler = getattr(self.logger, 'queue_handler', None)
+        if log_handler is not None:
+            self.metrics.gauge(
+                'bluetooth_scanner_log_queue_depth', 'Log records waiting for the listener thread'
+            ).set_function(log_handler.queue.qsize)
+            self.metrics.gauge(
+                'bluetooth_scanner_log_records_dropped', 'Log records dropped on a full queue'
+            ).set_function(lambda: log_handler.dropped)
+
+    def _create_presence_engine(self) -> Optional[PresenceEngine]:
+        """Build the presence engine from the configuration, if it is enabled."""
+        config = self.config_manager.get_config()
+        if not config.presence_enabled:
+            return None
+        window = min(MAX_WINDOW, max(1, config.presence_window))
+        if window != config.presence_window:
+            self.logger.warning(
+                f"PRESENCE_WINDOW={config.presence_window} is outside 1-{MAX_WINDOW}; using {window}"
+            )
+        return PresenceEngine(
+            window=window,
+            alpha=config.presence_alpha,
+            enter_rssi=config.presence_enter_rssi,
+            exit_rssi=config.presence_exit_rssi,
+            confirm_samples=config.presence_confirm_samples,
+            timeout=config.presence_timeout,
+            sample_interval=config.presence_sample_interval
+        )
+
+    def _create_feed_publisher(self) -> Optional[FeedPublisher]:
+        """Build the live feed publisher from the configuration, if it is enabled."""
+        config = self.config_manager.get_config()
+        if not config.feed_enabled:
+            return None
+        publisher = FeedPublisher(config.feed_socket, self.logger, timeout=config.feed_timeout)
+        self.metrics.gauge(
+            'bluetooth_scanner_feed_subscribers', 'Viewers attached to the live feed'
+        ).set_function(lambda: publisher.subscriber_count)
+        return publisher
+
     def initialize(self) -> bool:
         """Initialize the Bluetooth scanner."""
         try:
-            # Get the default adapter
-            self.adapter = self.bus.get('org.bluez', '/org/bluez/hci0')
-            self.logger.info("Bluetooth adapter initialized successfully")
+            self.adapters = self._find_adapters()
+            if not self.adapters:
+                self.logger.error("No Bluetooth adapters found")
+                return False
+            # The first adapter doubles as the default for single-adapter code paths
+            self.adapter = self.adapters[0]
+            self.logger.info(f"Bluetooth adapters initialized: {', '.join(self.adapters)}")
             return True
         except Exception as e:
             self.logger.error(f"Failed to initialize Bluetooth adapter: {str(e)}")
             return False
-    
+
+    def _find_adapters(self) -> List[str]:
+        """Get the name of every adapter, limited to the configured names."""
+        wanted = {name.strip() for name in self.config_manager.get_config().adapters.split(',') if name.strip()}
+        try:
+            objects = self._dbus_call(self.backend.get_managed_objects)
+            paths = sorted(
+                (path for path, interfaces in objects.items() if ADAPTER_INTERFACE in interfaces),
+                key=lambda path: (len(path), path)
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not enumerate adapters, falling back to hci0: {str(e)}")
+            paths = ['/org/bluez/hci0']
+
+        names = [path.rsplit('/', 1)[-1] for path in paths]
+        return [name for name in names if not wanted or name in wanted]
+
     def start_scanning(self) -> None:
         """Start the Bluetooth scanning process."""
         if not self.adapter:
             if not self.initialize():
                 return
-        
+
         self.scanning = True
+        self._discovery_stop.clear()
         self.logger.info("Starting Bluetooth scanning")
-        
+        self.retention.start()
+        self.metrics_exporter.start()
+        if self.feed is not None:
+            self.feed.start()
+
         try:
-            while self.scanning:
-                # Start discovery
-                self.adapter.StartDiscovery()
-                time.sleep(self.config_manager.get_config().scan_duration)
-                
-                # Stop discovery
-                self.adapter.StopDiscovery()
-                
-                # Process discovered devices
-                self._process_discovered_devices()
-                
-                # Wait before next scan
-                time.sleep(self.config_manager.get_config().scan_interval)
-                
+            if (self.config_manager.get_config().discovery_mode == 'signals'
+                    and self.subscribe_signals()):
+                self._run_signal_discovery()
+            else:
+                self._run_polling_discovery()
         except Exception as e:
             self.logger.error(f"Error during scanning: {str(e)}")
         finally:
-            self.stop_scanning()
-    
+            self._release()
+
     def stop_scanning(self) -> None:
-        """Stop the Bluetooth scanning process."""
+        """
+        Ask the scanning loop to stop; safe to call from any thread or a signal
+        handler. start_scanning stores the readings still buffered, releases
+        the adapters and then returns.
+        """
+        self.scanning = False
+        self._discovery_stop.set()
+        if self._loop:
+            self._loop.quit()
+
+    def _release(self) -> None:
+        """Stop the background workers and discovery once the scanning loop has returned."""
+        try:
+            self.scanning = False
+            self._discovery_stop.set()
+            self.retention.stop()
+            self.metrics_exporter.stop()
+            if self.feed is not None:
+                self.feed.stop()
+            self.unsubscribe_signals()
+            for name in self.adapters:
+                try:
+                    self.backend.stop_discovery(name)
+                except Exception as e:
+                    self.logger.error(f"Error stopping discovery on {name}: {str(e)}")
+            self.logger.info("Stopped Bluetooth scanning")
+        except Exception as e:
+            self.logger.error(f"Error stopping scan: {str(e)}")
+
+    def _run_polling_discovery(self) -> None:
+        """Run the fixed discover/sleep cycle (fallback mode)."""
+        self.logger.info("Using polling discovery mode")
+        if len(self.adapters) > 1:
+            self._run_multi_adapter_discovery()
+            return
+
+        while self.scanning:
+            self._take_dbus_calls()
+            window, gap = self.schedule.next_cycle()
+
+            # Start discovery
+            self._dbus_call(self.backend.start_discovery, self.adapter)
+            self._discovery_stop.wait(window)
+
+            # Read RSSI before stopping: BlueZ invalidates it on StopDiscovery
+            started = time.perf_counter()
+            snapshot = self._get_device_snapshot()
+            self._dbus_call(self.backend.stop_discovery, self.adapter)
+
+            # Process discovered devices
+            self._process_discovered_devices(snapshot)
+            self.schedule.add_busy(time.perf_counter() - started)
+
+            self.last_cycle_dbus_calls = self._take_dbus_calls()
+            self.logger.debug(
+                "D-Bus calls this cycle: %d; window %.1fs, gap %.1fs", self.last_cycle_dbus_calls, window, gap
+            )
+            if self.config_manager.get_config().write_behind:
+                self.logger.debug("Storage writer: %s", self.storage.get_writer_stats())
+
+            # Wait before next scan
+            self._discovery_stop.wait(gap)
+
+    def _run_multi_adapter_discovery(self) -> None:
+        """
+        Run a discovery duty cycle on every adapter, each offset by an equal
+        share of the cycle so windows are staggered and one adapter is usually
+        listening, and store merged sightings from this thread.
+        """
+        period = self.schedule.window + self.schedule.gap
+        names = list(self.adapters)
+        self.logger.info(f"Running staggered discovery on {len(names)} adapters")
+
+        threads = [
+            threading.Thread(
+                target=self._adapter_duty_cycle,
+                args=(name, index * period / len(names), index == 0),
+                name=f"discovery-{name}",
+                daemon=True
+            )
+            for index, name in enumerate(names)
+        ]
+        for thread in threads:
+            thread.start()
+
+        while self.scanning:
+            self._discovery_stop.wait(max(self.merger.window, 0.1))
+            self._store_sightings(self.merger.flush())
+            self.last_cycle_dbus_calls = self._take_dbus_calls()
+
+        for thread in threads:
+            thread.join(timeout=5)
+        self._store_sightings(self.merger.flush(force=True))
+
+    def _adapter_duty_cycle(self, name: str, offset: float, lead: bool = True) -> None:
+        """
+        Alternate discovery windows and gaps on one adapter until scanning
+        stops. Only the lead adapter asks the schedule for a new decision;
+        the others follow the latest one, so each cycle counts once.
+        """
+        if self._discovery_stop.wait(offset):
+            return
+
+        while self.scanning:
+            window, gap = self.schedule.next_cycle() if lead else self.schedule.current_cycle()
+            try:
+                self._dbus_call(self.backend.start_discovery, name)
+                if self._discovery_stop.wait(window):
+                    return
+                # Read RSSI before stopping: BlueZ invalidates it on StopDiscovery
+                self._collect_sightings(name)
+                self._dbus_call(self.backend.stop_discovery, name)
+            except Exception as e:
+                self._errors.inc()
+                self.logger.error(f"Error during discovery on {name}: {str(e)}")
+
+            if self._discovery_stop.wait(gap):
+                return
+
+    def _collect_sightings(self, name: str) -> None:
+        """Hand the devices one adapter currently sees to the sighting merger."""
+        snapshot = self._get_device_snapshot()
+        prefix = f'/org/bluez/{name}/'
+        heard = {}
+        for path, properties in snapshot.items():
+            if path.startswith(prefix):
+                device_info = self._device_info_from_properties(properties)
+                heard[device_info['mac_address']] = device_info['signal_strength']
+                self.merger.add(device_info)
+        self.schedule.observe(heard, source=name)
+
+    def _store_sightings(self, devices: List[Dict]) -> None:
+        """Classify and store merged sightings in one batch."""
+        self._track_presence(devices)
+        devices = self.reading_filter.filter_signal(devices)
+        if not devices:
+            return
+
+        try:
+            started = time.perf_counter()
+            with self._cycle_time.time():
+                self._devices_seen.inc(len(devices))
+                classifications = self.classifier.classify_many(devices)
+                self._submit(list(zip(devices, classifications)))
+            self.schedule.add_busy(time.perf_counter() - started)
+            self._cycles.inc()
+            self.logger.debug(
+                "Stored %d merged sightings (%d of %d merged across adapters so far)",
+                len(devices), self.merger.merged, self.merger.received
+            )
+        except Exception as e:
+            self._errors.inc()
+            self.logger.error(f"Error processing merged sightings: {str(e)}")
+
+    def _run_signal_discovery(self) -> None:
+        """Run continuous discovery driven by BlueZ D-Bus signals."""
+        self.logger.info("Using signal-driven discovery mode")
+        for name in self.adapters:
+            self._set_discovery_filter(name)
+            self._dbus_call(self.backend.start_discovery, name)
+
+        # Devices BlueZ already knows about never emit InterfacesAdded
+        for path, properties in self._get_device_snapshot().items():
+            self._handle_device_update(path, properties)
+
+        from gi.repository import GLib
+        self._loop = GLib.MainLoop()
+        if len(self.adapters) > 1:
+            GLib.timeout_add(max(int(self.merger.window * 1000), 100), self._flush_sightings)
+        else:
+            interval = self.config_manager.get_config().signal_flush_interval
+            GLib.timeout_add(max(int(interval * 1000), 100), self._flush_signal_batch)
+            if self.presence is not None:
+                # Departures are noticed by a sweep, which needs to run without new signals too
+                GLib.timeout_add_seconds(1, self._presence_tick)
         if self.scanning:
+            self._loop.run()
+        # Store what arrived since the last timer tick before start_scanning returns
+        if len(self.adapters) > 1:
+            self._flush_sightings()
+        else:
+            self._flush_signal_batch()
+
+    def _set_discovery_filter(self, adapter: str) -> None:
+        """Ask BlueZ to report every advertisement so RSSI updates keep flowing."""
+        try:
+            self.backend.set_discovery_filter(adapter, {'DuplicateData': True})
+        except Exception as e:
+            self.logger.warning(f"Could not set discovery filter: {str(e)}")
+
+    def _presence_tick(self) -> bool:
+        """GLib timer callback letting the presence engine time out departed devices."""
+        self._track_presence([])
+        return self.scanning
+
+    def _flush_signal_batch(self) -> bool:
+        """GLib timer callback storing buffered signal readings; returns False once stopped."""
+        batch, self._signal_batch = self._signal_batch, []
+        # Submitted even when empty so the feed can expire devices that went quiet
+        self._submit(batch)
+        return self.scanning
+
+    def _flush_sightings(self) -> bool:
+        """GLib timer callback storing merged sightings; returns False once stopped."""
+        self._store_sightings(self.merger.flush(force=not self.scanning))
+        return self.scanning
+
+    def subscribe_signals(self) -> bool:
+        """Subscribe to BlueZ ObjectManager and Device1 property signals."""
+        if not self.backend.supports_signals:
+            self.logger.info(f"{type(self.backend).__name__} does not deliver signals, polling instead")
+            return False
+        try:
+            self._subscriptions = [
+                self.backend.subscribe(
+                    OBJECT_MANAGER_INTERFACE, 'InterfacesAdded', self._on_interfaces_added
+                ),
+                self.backend.subscribe(
+                    OBJECT_MANAGER_INTERFACE, 'InterfacesRemoved', self._on_interfaces_removed
+                ),
+                self.backend.subscribe(
+                    PROPERTIES_INTERFACE, 'PropertiesChanged', self._on_properties_changed,
+                    arg0=DEVICE_INTERFACE
+                ),
+            ]
+            return True
+        except Exception as e:
+            self.logger.warning(f"Signal subscription failed, falling back to polling: {str(e)}")
+            self.unsubscribe_signals()
+            return False
+
+    def unsubscribe_signals(self) -> None:
+        """Drop all D-Bus signal subscriptions."""
+        for subscription in self._subscriptions:
             try:
-                if self.adapter:
-                    self.adapter.StopDiscovery()
-                self.scanning = False
-                self.logger.info("Stopped Bluetooth scanning")
+                subscription.unsubscribe()
             except Exception as e:
-                self.logger.error(f"Error stopping scan: {str(e)}")
-    
-    def _process_discovered_devices(self) -> None:
-        """Process discovered Bluetooth devices."""
+                self.logger.error(f"Error unsubscribing from signal: {str(e)}")
+        self._subscriptions = []
+
+    def _on_interfaces_added(self, sender, object_path, iface, signal, params) -> None:
+        """Handle ObjectManager.InterfacesAdded."""
+        path, interfaces = params
+        if DEVICE_INTERFACE in interfaces:
+            self._handle_device_update(path, interfaces[DEVICE_INTERFACE])
+
+    def _on_interfaces_removed(self, sender, object_path, iface, signal, params) -> None:
+        """Handle ObjectManager.InterfacesRemoved."""
+        path, interfaces = params
+        if DEVICE_INTERFACE in interfaces and path in self.known_devices:
+            del self.known_devices[path]
+            self.logger.debug("Device removed: %s", path)
+
+    def _on_properties_changed(self, sender, object_path, iface, signal, params) -> None:
+        """Handle Properties.PropertiesChanged on org.bluez.Device1."""
+        interface, changed, invalidated = params
+        if interface != DEVICE_INTERFACE:
+            return
+
+        properties = self.known_devices.setdefault(object_path, {})
+        properties.update(changed)
+        for name in invalidated:
+            properties.pop(name, None)
+
+        if TRACKED_PROPERTIES.intersection(changed):
+            self._process_device(self._device_info_from_properties(properties))
+
+    def _handle_device_update(self, path: str, properties: Dict) -> None:
+        """Record a device's full property set and process it."""
+        self.known_devices[path] = dict(properties)
+        device_info = self._device_info_from_properties(properties)
+        self.logger.log_device_discovery(device_info)
+        self._process_device(device_info)
+
+    def _process_discovered_devices(self, snapshot: Optional[Dict[str, Dict]] = None) -> None:
+        """Process discovered Bluetooth devices, from snapshot when given or a fresh one."""
         try:
-            # Get discovered devices
-            devices = self._get_discovered_devices()
-            
-            for device in devices:
-                # Get device properties
-                device_info = self._get_device_properties(device)
-                
-                # Classify device
-                classification = self.classifier.classify_device(device_info)
-                
-                # Store device information
-                self.storage.store_device(device_info)
-                
-                # Store scan result
-                scan_result = {
-                    'device_mac': device_info['mac_address'],
-                    'signal_strength': device_info.get('signal_strength', 0),
-                    'device_type': classification['device_type'],
-                    'is_mobile': classification['is_mobile']
-                }
-                self.storage.store_scan_result(scan_result)
-                
+            with self._cycle_time.time():
+                if snapshot is None:
+                    # One GetManagedObjects reply carries every Device1 property dict
+                    snapshot = self._get_device_snapshot()
+
+                devices = [
+                    device_info
+                    for device_info in map(self._device_info_from_properties, self._strongest_sightings(snapshot))
+                    if device_info['mac_address']
+                ]
+                self._devices_seen.inc(len(devices))
+                self.schedule.observe({device['mac_address']: device['signal_strength'] for device in devices})
+                self._track_presence(devices)
+                devices = self.reading_filter.filter_signal(devices)
+                classifications = self.classifier.classify_many(devices)
+
+                # Store the whole cycle in one transaction
+                self._submit(list(zip(devices, classifications)))
+            self._cycles.inc()
+
         except Exception as e:
+            self._errors.inc()
             self.logger.error(f"Error processing discovered devices: {str(e)}")
-    
-    def _get_discovered_devices(self) -> List[str]:
-        """Get list of discovered device paths."""
+
+    def _process_device(self, device_info: Dict) -> None:
+        """Classify and store a single device reading."""
+        if not device_info.get('mac_address'):
+            return
+
+        if len(self.adapters) > 1:
+            # Several adapters report the same device; store one merged sighting
+            self.merger.add(device_info)
+            return
+
         try:
-            objects = self.bus.get('org.bluez', '/').GetManagedObjects()
-            devices = []
-            
-            for path, interfaces in objects.items():
-                if 'org.bluez.Device1' in interfaces:
-                    devices.append(path)
-            
-            return devices
+            self._devices_seen.inc()
+            self._track_presence([device_info])
+            if not self.reading_filter.accept_signal(device_info):
+                return
+            classification = self.classifier.classify_device(device_info)
+            # One store_cycle per flush instead of a commit per D-Bus event
+            self._signal_batch.append((device_info, classification))
+            config = self.config_manager.get_config()
+            if config.signal_flush_interval <= 0 or len(self._signal_batch) >= config.write_batch_size:
+                self._flush_signal_batch()
+        except Exception as e:
+            self._errors.inc()
+            self.logger.error(f"Error processing device: {str(e)}")
+
+    def _submit(self, batch: List[Tuple[Dict, Dict]]) -> None:
+        """
+        Hand classified readings to storage and the live feed. Readings that
+        haven't changed get no scan_results row but still count towards
+        device_state, the occupancy rollups and the feed.
+        """
+        with self._submit_time.time():
+            if batch:
+                self.storage.submit_cycle(batch, self.reading_filter.persist_mask(batch))
+            if self.feed is not None:
+                # Published even when empty so devices that went quiet expire
+                self.feed.publish(batch)
+        self._report_filter_stats()
+
+    def _report_filter_stats(self) -> None:
+        """Log how many readings the filter kept out of storage, once per scan cycle."""
+        config = self.config_manager.get_config()
+        now = time.monotonic()
+        if now - self._filter_report_at < config.scan_duration + config.scan_interval:
+            return
+        self._filter_report_at = now
+        stats = self.reading_filter.take_stats()
+        self.last_filter_stats = stats
+        self.logger.info(
+            f"Stored {stats['written']} of {stats['readings']} readings: "
+            f"{stats['below_threshold']} below {config.min_signal_strength} dBm, "
+            f"{stats['suppressed']} unchanged ({stats['suppression_ratio']:.1%} suppressed)"
+        )
+
+    def _track_presence(self, devices: List[Dict]) -> None:
+        """Feed readings to the presence engine and store its transitions and samples."""
+        if self.presence is None:
+            return
+
+        try:
+            with self._presence_time.time():
+                events, samples = self.presence.update(devices)
+            for event in events:
+                self.logger.debug("Device %s %s (RSSI %s)", event['device_mac'], event['event'], event['rssi'])
+            self.storage.store_presence(events, samples)
+        except Exception as e:
+            self._errors.inc()
+            self.logger.error(f"Error tracking presence: {str(e)}")
+
+    def _get_device_snapshot(self) -> Dict[str, Dict]:
+        """Get the Device1 properties of every known device in one call."""
+        try:
+            objects = self._dbus_call(self.backend.get_managed_objects)
+            return {
+                path: interfaces[DEVICE_INTERFACE]
+                for path, interfaces in objects.items()
+                if DEVICE_INTERFACE in interfaces
+            }
         except Exception as e:
             self.logger.error(f"Error getting discovered devices: {str(e)}")
-            return []
-    
+            return {}
+
+    def _get_discovered_devices(self) -> List[str]:
+        """Get list of discovered device paths."""
+        return list(self._get_device_snapshot())
+
     def _get_device_properties(self, device_path: str) -> Dict:
         """Get properties for a specific device."""
         try:
-            device = self.bus.get('org.bluez', device_path)
-            properties = device.GetAll('org.bluez.Device1')
-            
-            return {
-                'mac_address': properties.get('Address', ''),
-                'device_name': properties.get('Name', ''),
-                'device_class': properties.get('Class', ''),
-                'manufacturer': properties.get('ManufacturerData', {}).get('0x0000', ''),
-                'signal_strength': properties.get('RSSI', 0),
-                'last_seen': time.time()
-            }
+            properties = self._dbus_call(self.backend.get_device_properties, device_path)
+            return self._device_info_from_properties(properties)
         except Exception as e:
             self.logger.error(f"Error getting device properties: {str(e)}")
             return {}
-    
+
+    def _dbus_call(self, method, *args):
+        """Invoke a backend method (a D-Bus call with BlueZ), counting it towards the cycle total."""
+        with self._dbus_calls_lock:
+            self.dbus_calls += 1
+        with self._dbus_time.time():
+            return method(*args)
+
+    def _take_dbus_calls(self) -> int:
+        """Get the D-Bus calls counted since the last call and start a new count."""
+        with self._dbus_calls_lock:
+            calls, self.dbus_calls = self.dbus_calls, 0
+        return calls
+
+    def _device_info_from_properties(self, properties: Dict) -> Dict:
+        """Build a device_info dict from a BlueZ Device1 property dict."""
+        device_info = {
+            'mac_address': properties.get('Address', ''),
+            'device_name': properties.get('Name', ''),
+            'device_class': properties.get('Class', ''),
+            'manufacturer': properties.get('ManufacturerData', {}).get('0x0000', ''),
+            'signal_strength': properties.get('RSSI', 0),
+            'adapter': properties.get('Adapter', '').rsplit('/', 1)[-1] or None,
+            'last_seen': time.time()
+        }
+        # Raw payloads for the advert store, encoded later by the storage writer
+        adverts = {name: properties[name] for name in ADVERT_PROPERTIES if name in properties}
+        if adverts:
+            device_info['adverts'] = adverts
+        return device_info
+
+    @staticmethod
+    def _strongest_sightings(snapshot: Dict[str, Dict]) -> List[Dict]:
+        """Reduce a snapshot to one Device1 property dict per MAC, keeping the strongest RSSI."""
+        strongest: Dict[str, Dict] = {}
+        for properties in snapshot.values():
+            address = properties.get('Address', '')
+            current = strongest.get(address)
+            if current is None or properties.get('RSSI', -999) > current.get('RSSI', -999):
+                strongest[address] = properties
+        return list(strongest.values())
+
     def get_mobile_device_count(self) -> int:
         """Get the current count of mobile devices."""
         try:
-            session = self.storage.Session()
-            count = session.query(self.storage.ScanResult).filter_by(
-                is_mobile=True
-            ).distinct(self.storage.ScanResult.device_mac).count()
-            session.close()
-            return count
+            _, mobile = self.storage.get_device_counts()
+            return mobile
         except Exception as e:
             self.logger.error(f"Error getting mobile device count: {str(e)}")
-            return 0 
\ No newline at end of file
+            return 0
@@ -0,0 +1,234 @@
+"""
+Discovery duty-cycle scheduling for the polling scanners.
+
+A schedule hands out the length of each discovery window and of the gap
+after it. FixedSchedule repeats scan_duration and scan_interval;
+AdaptiveSchedule scans more often while devices come and go or move
+around, and backs off in a quiet room.
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from .metrics import MetricsRegistry
+
+# Reasons recorded for adaptive schedule decisions
+REASONS = ('churn', 'rssi', 'idle', 'budget')
+
+class FixedSchedule:
+    """The same discovery window and gap every cycle."""
+
+    def __init__(self, window: float, gap: float, metrics: MetricsRegistry):
+        self.window = window
+        self.gap = gap
+        self._window_gauge = metrics.gauge(
+            'bluetooth_scanner_scan_window_seconds', 'Length of the current discovery window'
+        )
+        self._gap_gauge = metrics.gauge(
+            'bluetooth_scanner_scan_gap_seconds', 'Idle time after the current discovery window'
+        )
+        self._radio_on = metrics.counter(
+            'bluetooth_scanner_radio_on_seconds_total', 'Seconds of discovery windows scheduled'
+        )
+
+    def next_cycle(self) -> Tuple[float, float]:
+        """Get the next (window, gap) in seconds."""
+        return self._record(self.window, self.gap)
+
+    def current_cycle(self) -> Tuple[float, float]:
+        """Get the last (window, gap) again, for another adapter running the same cycle."""
+        return self._record(self.window, self.gap)
+
+    def _record(self, window: float, gap: float) -> Tuple[float, float]:
+        self._window_gauge.set(window)
+        self._gap_gauge.set(gap)
+        self._radio_on.inc(window)
+        return window, gap
+
+    def observe(self, rssi_by_mac: Dict[str, int], source: str = '') -> None:
+        """Take the devices one window heard, with their RSSI."""
+
+    def add_busy(self, seconds: float) -> None:
+        """Count time spent processing readings against the budget."""
+
+class AdaptiveSchedule(FixedSchedule):
+    """
+    Sizes windows and gaps from the activity of recent windows.
+
+    Activity runs from 0 to 1 and is the larger of two signals: churn, the
+    devices that arrived or left between windows as a share of those
+    around, and RSSI movement, the variance of successive readings of the
+    same device above the noise of a device standing still. It jumps up as
+    soon as a window sees more activity and decays with a half-life, so a
+    filling room shortens the gaps at once and an emptying one lengthens
+    them gradually. Gaps shrink geometrically from max_gap to min_gap as
+    activity rises and windows grow linearly from min_window to max_window.
+
+    A device counts as gone only once it has gone unheard for several times
+    the listening time it usually takes to hear it, and never before
+    MISSES_TO_LEAVE windows, so a tracker that advertises every few seconds
+    and is heard in one short window out of five isn't churn. When
+    processing the readings takes more than cpu_budget of the wall time, the
+    gap is stretched until it fits, up to max_gap. observe can be called per
+    adapter (source), and every adapter shares the resulting schedule: one
+    calls next_cycle and the others current_cycle.
+    """
+
+    # Share of devices arriving or leaving per window that counts as fully active
+    CHURN_SCALE = 0.1
+    # Variance (dB^2) of successive readings from a stationary device, and the
+    # variance above it that counts as fully active
+    RSSI_NOISE_VARIANCE = 16.0
+    RSSI_VARIANCE_SCALE = 48.0
+    # Weight an earlier window's readings keep in the variance at each new window
+    RSSI_MEMORY = 0.8
+    # Fewest windows a device can be missing from before it has left, and the
+    # chance of a present device going unheard that long at which it has
+    MISSES_TO_LEAVE = 2
+    LEAVE_CONFIDENCE = 0.01
+    # Listening seconds per sighting assumed for a new device, and the weight
+    # of each new sighting in the estimate
+    INITIAL_SECONDS_PER_HIT = 4.0
+    HIT_WEIGHT = 0.2
+    # Seconds for activity to halve once things calm down
+    DECAY_HALF_LIFE = 120.0
+    # Activity below which the room counts as idle
+    IDLE_ACTIVITY = 0.05
+
+    def __init__(self, min_window: float, max_window: float, min_gap: float, max_gap: float,
+                 cpu_budget: float, metrics: MetricsRegistry,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(min_window, max_gap, metrics)
+        self.min_window = min_window
+        self.max_window = max(max_window, min_window)
+        self.min_gap = max(min_gap, 0.0)
+        self.max_gap = max(max_gap, self.min_gap)
+        self.cpu_budget = cpu_budget
+        self.clock = clock
+        self.activity = 0.0
+        self.utilization = 0.0
+        self.reason = 'idle'
+        # source -> mac -> [last RSSI, windows missed, listening seconds missed, listening seconds per hit]
+        self._known: Dict[str, Dict[str, list]] = {}
+        self._updated = clock()
+        self._decided = clock()
+        self._busy = 0.0
+        self._squares = 0.0
+        self._pairs = 0.0
+        self._leave_factor = -math.log(self.LEAVE_CONFIDENCE)
+        self._lock = threading.Lock()
+        self._activity_gauge = metrics.gauge(
+            'bluetooth_scanner_scan_activity', 'Activity the adaptive schedule is sized for, 0 to 1'
+        )
+        self._utilization_gauge = metrics.gauge(
+            'bluetooth_scanner_scan_utilization', 'Share of wall time spent processing readings'
+        )
+        self._decisions = metrics.counter(
+            'bluetooth_scanner_schedule_decisions_total', 'Adaptive schedule decisions by deciding signal',
+            ('reason',)
+        )
+        for reason in REASONS:
+            self._decisions.labels(reason)
+
+    def _decay(self, now: float) -> None:
+        """Let activity fall off for the time since it was last updated."""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.activity *= 0.5 ** (elapsed / self.DECAY_HALF_LIFE)
+            self._updated = now
+
+    def observe(self, rssi_by_mac: Dict[str, int], source: str = '') -> None:
+        with self._lock:
+            known = self._known.setdefault(source, {})
+            arrived = departed = 0
+            squares, pairs = 0.0, 0
+            for mac_address, rssi in rssi_by_mac.items():
+                if not rssi:
+                    # Cached by BlueZ but not heard in this window
+                    continue
+                entry = known.get(mac_address)
+                if entry is None:
+                    known[mac_address] = [rssi, 0, 0.0, self.INITIAL_SECONDS_PER_HIT]
+                    arrived += 1
+                    continue
+                if entry[1] == 0:
+                    # Half the mean square of successive differences estimates the variance
+                    squares += (rssi - entry[0]) ** 2 / 2
+                    pairs += 1
+                entry[3] += self.HIT_WEIGHT * (entry[2] + self.window - entry[3])
+                entry[0], entry[1], entry[2] = rssi, 0, 0.0
+            for mac_address, entry in list(known.items()):
+                if rssi_by_mac.get(mac_address):
+                    continue
+                entry[1] += 1
+                entry[2] += self.window
+                # Sightings of a present device arrive at random, so the chance of
+                # none in t listening seconds is exp(-t / seconds per hit)
+                if entry[1] >= self.MISSES_TO_LEAVE and entry[2] >= entry[3] * self._leave_factor:
+                    del known[mac_address]
+                    departed += 1
+
+            churn = min(1.0, (arrived + departed) / max(len(known) + departed, 1) / self.CHURN_SCALE)
+            # A few pairs give a very noisy estimate, so pool them over recent windows
+            self._squares = self._squares * self.RSSI_MEMORY + squares
+            self._pairs = self._pairs * self.RSSI_MEMORY + pairs
+            variance = self._squares / self._pairs if self._pairs else 0.0
+            movement = min(1.0, max(0.0, variance - self.RSSI_NOISE_VARIANCE) / self.RSSI_VARIANCE_SCALE)
+
+            self._decay(self.clock())
+            level = max(churn, movement)
+            if level > self.activity:
+                self.activity = level
+                self.reason = 'churn' if churn >= movement else 'rssi'
+
+    def add_busy(self, seconds: float) -> None:
+        with self._lock:
+            self._busy += seconds
+
+    def next_cycle(self) -> Tuple[float, float]:
+        with self._lock:
+            now = self.clock()
+            self._decay(now)
+            elapsed = now - self._decided
+            if elapsed > 0:
+                self.utilization += 0.5 * (self._busy / elapsed - self.utilization)
+                self._busy = 0.0
+                self._decided = now
+
+            activity = self.activity
+            reason = self.reason if activity >= self.IDLE_ACTIVITY else 'idle'
+            window = self.min_window + activity * (self.max_window - self.min_window)
+            if self.min_gap > 0:
+                gap = self.max_gap * (self.min_gap / self.max_gap) ** activity
+            else:
+                gap = self.max_gap * (1 - activity)
+            if self.cpu_budget > 0 and self.utilization > self.cpu_budget:
+                # Spread the same processing over a longer cycle
+                needed = (window + gap) * self.utilization / self.cpu_budget - window
+                if needed > gap:
+                    gap = min(self.max_gap, needed)
+                    reason = 'budget'
+
+            self._decisions.labels(reason).inc()
+            self._activity_gauge.set(activity)
+            self._utilization_gauge.set(self.utilization)
+            self.window, self.gap = window, gap
+        return self._record(window, gap)
+
+    def current_cycle(self) -> Tuple[float, float]:
+        with self._lock:
+            window, gap = self.window, self.gap
+        return self._record(window, gap)
+
+def create_schedule(config, metrics: MetricsRegistry) -> FixedSchedule:
+    """Build the schedule selected by the configuration."""
+    if not config.adaptive_schedule:
+        return FixedSchedule(config.scan_duration, config.scan_interval, metrics)
+    return AdaptiveSchedule(
+        min_window=config.scan_duration_min,
+        max_window=config.scan_duration_max,
+        min_gap=config.scan_interval_min,
+        max_gap=config.scan_interval_max,
+        cpu_budget=config.schedule_cpu_budget,
+        metrics=metrics
+    )
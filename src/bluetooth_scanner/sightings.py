@@ -0,0 +1,72 @@
+"""
+Merging of device sightings reported by several Bluetooth adapters.
+"""
+import threading
+import time
+from typing import Dict, List
+
+def _rssi(device_info: Dict) -> float:
+    """Get a sighting's RSSI, ranking sightings without one below any real value."""
+    # BlueZ omits RSSI for cached devices and device_info defaults it to 0
+    return device_info.get('signal_strength') or float('-inf')
+
+def merge_sightings(current: Dict, sighting: Dict) -> Dict:
+    """Combine two sightings of one device, preferring the stronger signal."""
+    if _rssi(sighting) > _rssi(current):
+        stronger, weaker = sighting, current
+    else:
+        stronger, weaker = current, sighting
+    merged = dict(stronger)
+    # Fill in fields only the weaker adapter picked up, e.g. a name
+    for key, value in weaker.items():
+        if value and not merged.get(key):
+            merged[key] = value
+    merged['last_seen'] = max(current.get('last_seen') or 0, sighting.get('last_seen') or 0)
+    return merged
+
+class SightingMerger:
+    """
+    Collects device_info readings from every adapter and merges readings of
+    the same MAC that arrive within a time window into one, keeping the
+    strongest RSSI and the adapter that reported it. Thread-safe, so each
+    adapter's discovery thread can add to the same merger.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.received = 0
+        self.merged = 0
+        self._pending: Dict[str, Dict] = {}
+        self._opened: Dict[str, float] = {}  # insertion order is opening order
+        self._lock = threading.Lock()
+
+    def add(self, device_info: Dict) -> None:
+        """Add a sighting, merging it into an open window for the same MAC."""
+        mac_address = device_info.get('mac_address')
+        if not mac_address:
+            return
+        with self._lock:
+            self.received += 1
+            current = self._pending.get(mac_address)
+            if current is None:
+                self._pending[mac_address] = dict(device_info)
+                self._opened[mac_address] = time.monotonic()
+            else:
+                self.merged += 1
+                self._pending[mac_address] = merge_sightings(current, device_info)
+
+    def flush(self, force: bool = False) -> List[Dict]:
+        """Take the sightings whose window has closed, or all of them when forced."""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for mac_address, opened in list(self._opened.items()):
+                if not force and now - opened < self.window:
+                    # Later entries opened later, so none of them are due either
+                    break
+                del self._opened[mac_address]
+                ready.append(self._pending.pop(mac_address))
+        return ready
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -1,16 +1,45 @@
 """
 Data storage management for the Bluetooth Scanner.
 """
-from datetime import datetime
-from typing import List, Optional, Dict
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Boolean, ForeignKey
+import os
+import queue
+import threading
+import time
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Dict, Sequence, Tuple
+from sqlalchemy import (
+    bindparam, create_engine, event, func, insert, update, delete, select, and_, or_, Column, String, Integer,
+    SmallInteger, DateTime, Boolean, ForeignKey, Index
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from .adverts import AdvertStore
+from .classifier import DEVICE_TYPES, TYPE_CODES
 from .config import ConfigManager
 from .logger import Logger
+from .metrics import MetricsRegistry
 
 Base = declarative_base()
 
+EPOCH = datetime(1970, 1, 1)
+
+SCHEMA_MODES = ('standard', 'compact')
+
+# Rollup bucket sizes in seconds, finest first
+ROLLUP_GRANULARITIES = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+# Columns of an exported scan history row, in output order
+EXPORT_COLUMNS = (
+    'id', 'scan_time', 'device_mac', 'device_name', 'device_class', 'manufacturer',
+    'signal_strength', 'device_type', 'is_mobile', 'adapter'
+)
+
 class Device(Base):
     """Database model for Bluetooth devices."""
     __tablename__ = 'devices'
@@ -21,8 +50,10 @@ class Device(Base):
     manufacturer = Column(String)
     first_seen = Column(DateTime, default=datetime.utcnow)
     last_seen = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    device_id = Column(Integer)  # MAC packed into 48 bits, the key of compact scan results
     
     scan_results = relationship("ScanResult", back_populates="device")
+    state = relationship("DeviceState", back_populates="device", uselist=False)
 
 class ScanResult(Base):
     """Database model for scan results."""
@@ -34,32 +65,489 @@ class ScanResult(Base):
     signal_strength = Column(Integer)
     device_type = Column(String)
     is_mobile = Column(Boolean)
+    adapter = Column(String)  # adapter with the strongest sighting, e.g. "hci1"
     
     device = relationship("Device", back_populates="scan_results")
-    properties = relationship("DeviceProperty", back_populates="scan_result")
 
-class DeviceProperty(Base):
-    """Database model for device properties."""
-    __tablename__ = 'device_properties'
-    
+    __table_args__ = (
+        Index('ix_scan_results_device_mac_scan_time', 'device_mac', 'scan_time'),
+        Index('ix_scan_results_scan_time', 'scan_time'),
+        Index('ix_scan_results_is_mobile_device_mac', 'is_mobile', 'device_mac'),
+    )
+
+class CompactScanResult(Base):
+    """
+    Scan results in the compact schema: the packed MAC instead of the
+    17-character string, the classifier's type code instead of its name,
+    epoch seconds instead of a DateTime string and the adapter number.
+    """
+    __tablename__ = 'compact_scan_results'
+
     id = Column(Integer, primary_key=True)
-    scan_result_id = Column(Integer, ForeignKey('scan_results.id'))
-    property_name = Column(String)
-    property_value = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    
-    scan_result = relationship("ScanResult", back_populates="properties")
+    device_id = Column(Integer)
+    scan_time = Column(Integer)
+    rssi = Column(SmallInteger)
+    type_code = Column(SmallInteger)
+    is_mobile = Column(Boolean)
+    adapter = Column(SmallInteger)  # N of hciN
+
+    __table_args__ = (
+        Index('ix_compact_scan_results_device_id_scan_time', 'device_id', 'scan_time'),
+        Index('ix_compact_scan_results_scan_time', 'scan_time'),
+    )
+
+class SchemaSetting(Base):
+    """Settings fixed when the database is created, such as the schema mode."""
+    __tablename__ = 'schema_settings'
+
+    key = Column(String, primary_key=True)
+    value = Column(String)
+
+class DeviceState(Base):
+    """Latest scan result for each device, kept current on every write."""
+    __tablename__ = 'device_state'
+
+    mac_address = Column(String, ForeignKey('devices.mac_address'), primary_key=True)
+    scan_time = Column(DateTime)
+    signal_strength = Column(Integer)
+    device_type = Column(String)
+    is_mobile = Column(Boolean)
+
+    device = relationship("Device", back_populates="state")
+
+    __table_args__ = (
+        Index('ix_device_state_scan_time', 'scan_time'),
+        Index('ix_device_state_is_mobile', 'is_mobile'),
+    )
+
+class AdvertIndex(Base):
+    """Where the raw advertisement payload of a scan result sits in the advert store."""
+    __tablename__ = 'advert_index'
+
+    scan_result_id = Column(Integer, primary_key=True)
+    segment = Column(Integer)
+    record_offset = Column(Integer)
+
+class AdvertSegment(Base):
+    """The scan results indexed into one advert store segment, for retention."""
+    __tablename__ = 'advert_segments'
+
+    segment = Column(Integer, primary_key=True)
+    first_id = Column(Integer)
+    last_id = Column(Integer)
+    last_time = Column(Integer)  # epoch seconds of the newest scan result
+
+class OccupancyRollup(Base):
+    """Occupancy aggregates for one time bucket."""
+    __tablename__ = 'occupancy_rollups'
+
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    device_count = Column(Integer, default=0)
+    mobile_count = Column(Integer, default=0)
+    rssi_min = Column(Integer)
+    rssi_max = Column(Integer)
+    rssi_sum = Column(Integer, default=0)
+    sample_count = Column(Integer, default=0)
+
+class RollupMember(Base):
+    """Devices already counted in a rollup bucket that is still open."""
+    __tablename__ = 'rollup_members'
+
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    mac_address = Column(String, primary_key=True)
+    is_mobile = Column(Boolean, default=False)
+
+class PresenceEvent(Base):
+    """A device arriving or leaving, as decided by the presence engine."""
+    __tablename__ = 'presence_events'
+
+    id = Column(Integer, primary_key=True)
+    device_mac = Column(String)
+    event = Column(String)  # "arrived" or "left"
+    event_time = Column(DateTime)
+    rssi = Column(Integer)  # smoothed RSSI at the transition
+
+    __table_args__ = (
+        Index('ix_presence_events_device_mac_event_time', 'device_mac', 'event_time'),
+        Index('ix_presence_events_event_time', 'event_time'),
+    )
+
+class PresenceSample(Base):
+    """Periodic smoothed RSSI of a present device."""
+    __tablename__ = 'presence_samples'
+
+    id = Column(Integer, primary_key=True)
+    device_mac = Column(String)
+    sample_time = Column(DateTime)
+    rssi = Column(Integer)
+
+    __table_args__ = (
+        Index('ix_presence_samples_device_mac_sample_time', 'device_mac', 'sample_time'),
+        Index('ix_presence_samples_sample_time', 'sample_time'),
+    )
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its rollup bucket."""
+    if granularity == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+def pack_mac(mac_address: str) -> Optional[int]:
+    """Pack a MAC address into a 48-bit integer, or None if it isn't one."""
+    try:
+        value = int(mac_address.replace(':', ''), 16)
+    except (AttributeError, ValueError):
+        return None
+    return value if len(mac_address) == 17 and value < 1 << 48 else None
+
+@lru_cache(maxsize=65536)
+def unpack_mac(device_id: int) -> str:
+    """Format a packed 48-bit MAC address."""
+    return ':'.join(f"{device_id >> shift & 0xFF:02X}" for shift in range(40, -1, -8))
+
+def _adapter_number(adapter: Optional[str]) -> Optional[int]:
+    """Get N from an adapter name like hciN."""
+    if adapter and adapter.startswith('hci') and adapter[3:].isdigit():
+        return int(adapter[3:])
+    return None
+
+def _epoch_seconds(timestamp: datetime) -> int:
+    """Convert a naive UTC datetime to integer epoch seconds."""
+    return int((timestamp - EPOCH).total_seconds())
+
+def _compact_row(result: Dict) -> Optional[Dict]:
+    """Convert a scan result dict to a compact_scan_results row."""
+    device_id = pack_mac(result['device_mac'])
+    if device_id is None:
+        return None
+    row = {
+        'device_id': device_id,
+        'scan_time': _epoch_seconds(result['scan_time']),
+        'rssi': result.get('signal_strength'),
+        'type_code': TYPE_CODES.get(result.get('device_type'), 0),
+        'is_mobile': result.get('is_mobile'),
+        'adapter': _adapter_number(result.get('adapter'))
+    }
+    if 'id' in result:
+        row['id'] = result['id']
+    return row
+
+def _adapter_name(adapter: Optional[int]) -> Optional[str]:
+    return f"hci{adapter}" if adapter is not None else None
+
+def _expand_compact_row(row) -> Dict:
+    """Convert compact_scan_results columns back to the scan result fields."""
+    return {
+        'device_mac': unpack_mac(row.device_id),
+        'scan_time': datetime.utcfromtimestamp(row.scan_time),
+        'signal_strength': row.rssi,
+        'device_type': DEVICE_TYPES[row.type_code] if row.type_code is not None else None,
+        'is_mobile': row.is_mobile,
+        'adapter': _adapter_name(row.adapter)
+    }
+
+def _create_missing_indexes(connection) -> None:
+    """Add indexes that databases created by older versions don't have."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def _backfill_device_state(connection) -> None:
+    """Seed device_state from the newest scan result of each device."""
+    connection.exec_driver_sql("""
+        INSERT OR IGNORE INTO device_state
+            (mac_address, scan_time, signal_strength, device_type, is_mobile)
+        SELECT s.device_mac, s.scan_time, s.signal_strength, s.device_type, s.is_mobile
+        FROM scan_results s
+        JOIN (
+            SELECT device_mac, MAX(id) AS id FROM scan_results GROUP BY device_mac
+        ) latest ON latest.id = s.id
+        WHERE s.device_mac IS NOT NULL
+    """)
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Each step must be safe to run on a database that create_all just built.
+def _add_scan_result_adapter(connection) -> None:
+    """Add the adapter column to scan_results tables created without it."""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(scan_results)")}
+    if 'adapter' not in columns:
+        connection.exec_driver_sql("ALTER TABLE scan_results ADD COLUMN adapter VARCHAR")
+
+def _add_device_id(connection) -> None:
+    """Add and fill the packed-MAC device_id column of devices."""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(devices)")}
+    if 'device_id' not in columns:
+        connection.exec_driver_sql("ALTER TABLE devices ADD COLUMN device_id INTEGER")
+    rows = connection.exec_driver_sql("SELECT mac_address FROM devices WHERE device_id IS NULL").fetchall()
+    updates = [
+        {'mac': mac_address, 'device_id': pack_mac(mac_address)}
+        for mac_address, in rows if pack_mac(mac_address) is not None
+    ]
+    if updates:
+        connection.execute(
+            update(Device.__table__).where(Device.__table__.c.mac_address == bindparam('mac'))
+            .values(device_id=bindparam('device_id')),
+            updates
+        )
+    # Created here rather than on the model, so older databases get the column first
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_devices_device_id ON devices (device_id)"
+    )
+
+def _drop_device_properties(connection) -> None:
+    """Drop the device_properties table, replaced by the advert store."""
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_device_properties_scan_result_id")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS device_properties")
+
+MIGRATIONS = [
+    _create_missing_indexes,
+    _backfill_device_state,
+    _add_scan_result_adapter,
+    _add_device_id,
+    _drop_device_properties,
+]
 
 class StorageManager:
     """Manages data storage operations."""
     
-    def __init__(self, config_manager: ConfigManager, logger: Logger):
+    def __init__(self, config_manager: ConfigManager, logger: Logger,
+                 metrics: Optional[MetricsRegistry] = None):
         self.config = config_manager.get_config()
         self.logger = logger
+        self.metrics = metrics or MetricsRegistry(enabled=False)
         self.engine = create_engine(f"sqlite:///{self.config.db_path}")
+        event.listen(self.engine, 'connect', self._enable_incremental_vacuum)
+        if self.config.db_profile == 'performance':
+            event.listen(self.engine, 'connect', self._apply_performance_pragmas)
         Base.metadata.create_all(self.engine)
+        self._migrate()
+        self._convert_to_incremental_vacuum()
+        # Ordered RETURNING over executemany needs SQLite 3.35 and SQLAlchemy 2.0.10;
+        # the dialect knows the SQLite version once create_all has connected
+        self._returning_ids = getattr(
+            self.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False
+        )
+        self.schema_mode = self._resolve_schema_mode()
+        self.compact = self.schema_mode == 'compact'
         self.Session = sessionmaker(bind=self.engine)
+        self.adverts = AdvertStore(
+            self.config.advert_dir or os.path.splitext(self.config.db_path)[0] + '.adverts',
+            logger,
+            segment_size=self.config.advert_segment_size,
+            segment_seconds=self.config.advert_segment_seconds
+        )
+
+        # Write-behind state, only used when config.write_behind is set
+        self._write_queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        self._writer_stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.writer_stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'batches': 0,
+            'last_latency': 0.0,
+            'max_latency': 0.0
+        }
+        self._sqlite_time = self.metrics.histogram(
+            'bluetooth_scanner_stage_seconds', 'Time spent per scanner stage', ('stage',)
+        ).labels('sqlite')
+        self._rows_written = self.metrics.counter(
+            'bluetooth_scanner_rows_written_total', 'Scan result rows written'
+        )
+        self._errors = self.metrics.counter(
+            'bluetooth_scanner_errors_total', 'Errors by component', ('component',)
+        ).labels('storage')
+        self.metrics.gauge(
+            'bluetooth_scanner_write_queue_depth', 'Records waiting for the writer thread'
+        ).set_function(lambda: self._write_queue.qsize() if self._write_queue else 0)
+        self.metrics.gauge(
+            'bluetooth_scanner_db_size_bytes', 'Bytes of database pages in use'
+        ).set_function(self._database_size)
+        self.metrics.gauge(
+            'bluetooth_scanner_advert_store_bytes', 'Bytes of advert store segments on disk'
+        ).set_function(self.adverts.size)
+
+        if self.config.write_behind:
+            self.start_writer()
     
+    def _enable_incremental_vacuum(self, dbapi_connection, connection_record) -> None:
+        """Let retention hand freed pages back to the OS (takes effect on new or vacuumed databases)."""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        finally:
+            cursor.close()
+
+    def _apply_performance_pragmas(self, dbapi_connection, connection_record) -> None:
+        """Apply the performance profile to each new SQLite connection."""
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers (the visualizer) run alongside the scanner's writes,
+            # and synchronous=NORMAL drops the fsync from every commit in WAL mode
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={int(self.config.db_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size=-{int(self.config.db_cache_size)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
+
+    def _migrate(self) -> None:
+        """Bring an existing database up to the current schema."""
+        with self.engine.begin() as connection:
+            version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(connection)
+                connection.exec_driver_sql(f"PRAGMA user_version = {number}")
+                self.logger.log_storage_operation("migrate", "Applied migration %d: %s", number, migration.__name__)
+
+    def _convert_to_incremental_vacuum(self) -> None:
+        """
+        Rebuild a database created without incremental vacuum, once. The
+        auto_vacuum pragma only changes an existing file through a full
+        VACUUM, which can't run inside the migration transaction.
+        """
+        with self.engine.connect() as connection:
+            if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+                return
+        self.logger.warning(
+            "Rebuilding the database once to enable incremental vacuum; this can take a while on a large file"
+        )
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("VACUUM")
+            mode = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+            cursor.close()
+            self.logger.log_storage_operation("migrate", "Enabled incremental vacuum (auto_vacuum=%d)", mode)
+        except Exception as e:
+            # Retention still works, freed pages are just reused instead of returned
+            self.logger.error(f"Error enabling incremental vacuum: {str(e)}")
+        finally:
+            connection.close()
+
+    def _resolve_schema_mode(self) -> str:
+        """
+        Get the schema mode recorded in the database. A new database takes the
+        configured mode; one that already holds scan results is standard
+        until converted with bluetooth-compact.
+        """
+        with self.engine.begin() as connection:
+            mode = connection.execute(
+                select(SchemaSetting.value).where(SchemaSetting.key == 'schema_mode')
+            ).scalar()
+            if mode is None:
+                has_rows = connection.execute(select(ScanResult.id).limit(1)).first() is not None
+                mode = 'standard' if has_rows or self.config.schema_mode not in SCHEMA_MODES else self.config.schema_mode
+                connection.execute(insert(SchemaSetting).values(key='schema_mode', value=mode))
+        if mode != self.config.schema_mode:
+            self.logger.warning(
+                f"Database uses the {mode} schema, not the configured {self.config.schema_mode}; "
+                f"run bluetooth-compact convert to change it"
+            )
+        return mode
+
+    def _insert_scan_results(self, session, scan_results: List[Dict],
+                             adverts: Optional[List[Optional[Dict]]] = None) -> None:
+        """
+        Insert scan result dicts into the table of the database's schema mode.
+        adverts, when given, holds each result's raw advertisement properties
+        or None; those are appended to the advert store and indexed by the
+        new rows' ids.
+        """
+        model = CompactScanResult if self.compact else ScanResult
+        if self.compact:
+            kept = [(row, index) for index, row in enumerate(map(_compact_row, scan_results)) if row is not None]
+            rows = [row for row, _ in kept]
+            if adverts:
+                adverts = [adverts[index] for _, index in kept]
+                scan_results = [scan_results[index] for _, index in kept]
+        else:
+            rows = scan_results
+        if not rows:
+            return
+        if not self.config.advert_store or not adverts or not any(adverts):
+            session.execute(insert(model), rows)
+            return
+
+        ids = self._insert_returning_ids(session, model, rows)
+        self._index_adverts(session, [
+            (row_id, result, advert)
+            for row_id, result, advert in zip(ids, scan_results, adverts) if advert
+        ])
+
+    def _insert_returning_ids(self, session, model, rows: List[Dict]) -> List[int]:
+        """Insert rows without explicit ids and get the id of each, in order."""
+        if self._returning_ids:
+            return session.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+        # Without RETURNING: once the insert has run this transaction holds the
+        # write lock, and each new rowid was one past the largest, so the rows
+        # took the ids just below the current maximum
+        session.execute(insert(model), rows)
+        last_id = session.execute(select(func.max(model.id))).scalar()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def _index_adverts(self, session, entries: List[Tuple[int, Dict, Dict]]) -> None:
+        """Append (scan result id, scan result, adverts) payloads to the store and index them."""
+        locations = self.adverts.append_many([(result['device_mac'], advert) for _, result, advert in entries])
+        index_rows = []
+        segments: Dict[int, Dict] = {}
+        for (row_id, result, _), location in zip(entries, locations):
+            if location is None:
+                continue
+            segment, offset = location
+            index_rows.append({'scan_result_id': row_id, 'segment': segment, 'record_offset': offset})
+            scan_time = _epoch_seconds(result['scan_time'])
+            bounds = segments.get(segment)
+            if bounds is None:
+                segments[segment] = {'segment': segment, 'first_id': row_id, 'last_id': row_id, 'last_time': scan_time}
+            else:
+                bounds['first_id'] = min(bounds['first_id'], row_id)
+                bounds['last_id'] = max(bounds['last_id'], row_id)
+                bounds['last_time'] = max(bounds['last_time'], scan_time)
+        if not index_rows:
+            return
+        session.execute(insert(AdvertIndex), index_rows)
+        upsert = sqlite_insert(AdvertSegment)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[AdvertSegment.segment],
+            set_={
+                'first_id': func.min(AdvertSegment.first_id, upsert.excluded.first_id),
+                'last_id': func.max(AdvertSegment.last_id, upsert.excluded.last_id),
+                'last_time': func.max(AdvertSegment.last_time, upsert.excluded.last_time)
+            }
+        )
+        session.execute(upsert, list(segments.values()))
+
+    def get_adverts(self, scan_result_ids: Sequence[int]) -> Dict[int, Dict]:
+        """Get the raw advertisement properties of scan results, by scan result id."""
+        locations: Dict[int, Tuple[int, int]] = {}
+        ids = list(scan_result_ids)
+        with self.engine.connect() as connection:
+            for start in range(0, len(ids), 500):
+                for row_id, segment, offset in connection.execute(
+                    select(AdvertIndex.scan_result_id, AdvertIndex.segment, AdvertIndex.record_offset)
+                    .where(AdvertIndex.scan_result_id.in_(ids[start:start + 500]))
+                ):
+                    locations[row_id] = (segment, offset)
+        if not locations:
+            return {}
+        records = self.adverts.read_many(list(locations.values()))
+        return {
+            row_id: records[location]
+            for row_id, location in locations.items() if location in records
+        }
+
     def store_device(self, device_info: Dict) -> None:
         """Store or update device information."""
         session = self.Session()
@@ -74,11 +562,17 @@ class StorageManager:
                 device.manufacturer = device_info.get('manufacturer', device.manufacturer)
                 device.last_seen = datetime.utcnow()
             else:
-                device = Device(**device_info)
+                device = Device(
+                    mac_address=device_info['mac_address'],
+                    device_id=pack_mac(device_info['mac_address']),
+                    device_name=device_info.get('device_name'),
+                    device_class=device_info.get('device_class'),
+                    manufacturer=device_info.get('manufacturer')
+                )
                 session.add(device)
             
             session.commit()
-            self.logger.log_storage_operation("store_device", f"Stored device: {device_info['mac_address']}")
+            self.logger.log_storage_operation("store_device", "Stored device: %s", device_info['mac_address'])
         except Exception as e:
             session.rollback()
             self.logger.error(f"Error storing device: {str(e)}")
@@ -89,18 +583,506 @@ class StorageManager:
         """Store scan result information."""
         session = self.Session()
         try:
-            result = ScanResult(**scan_result)
-            session.add(result)
+            stored = {
+                'device_mac': scan_result['device_mac'],
+                'scan_time': scan_result.get('scan_time') or datetime.utcnow(),
+                'signal_strength': scan_result.get('signal_strength'),
+                'device_type': scan_result.get('device_type'),
+                'is_mobile': scan_result.get('is_mobile'),
+                'adapter': scan_result.get('adapter')
+            }
+            self._insert_scan_results(session, [stored], [scan_result.get('adverts')])
+            self._update_device_state(session, [stored])
+            self._update_rollups(session, [stored])
             session.commit()
-            self.logger.log_storage_operation("store_scan_result", f"Stored scan result for device: {scan_result['device_mac']}")
+            self.logger.log_storage_operation(
+                "store_scan_result", "Stored scan result for device: %s", scan_result['device_mac']
+            )
         except Exception as e:
             session.rollback()
             self.logger.error(f"Error storing scan result: {str(e)}")
         finally:
             session.close()
     
+    def store_cycle(self, batch: List[Tuple[Dict, Dict]], persist_mask: Optional[List[bool]] = None) -> int:
+        """
+        Store one scan cycle in a single transaction.
+        Takes (device_info, classification) pairs, upserts every device and
+        inserts every scan result with one commit. persist_mask, when given,
+        says per pair whether to insert its scan result; the others still
+        update devices, device_state and the rollups. Returns the scan
+        results inserted.
+        """
+        now = datetime.utcnow()
+        devices = {}
+        states = {}
+        readings = []
+        scan_results = []
+        adverts = []
+        for index, (device_info, classification) in enumerate(batch):
+            mac_address = device_info.get('mac_address')
+            if not mac_address:
+                continue
+            # Use the time the device was seen, which may be well before
+            # this write when records went through the write-behind queue
+            seen_at = device_info.get('last_seen')
+            seen_at = datetime.utcfromtimestamp(seen_at) if seen_at else now
+            devices[mac_address] = {
+                'mac_address': mac_address,
+                'device_id': pack_mac(mac_address),
+                'device_name': device_info.get('device_name', ''),
+                'device_class': device_info.get('device_class', ''),
+                'manufacturer': device_info.get('manufacturer', ''),
+                'first_seen': seen_at,
+                'last_seen': seen_at
+            }
+            scan_result = {
+                'device_mac': mac_address,
+                'scan_time': seen_at,
+                'signal_strength': device_info.get('signal_strength', 0),
+                'device_type': classification['device_type'],
+                'is_mobile': classification['is_mobile'],
+                'adapter': device_info.get('adapter')
+            }
+            readings.append(scan_result)
+            if persist_mask is None or persist_mask[index]:
+                scan_results.append(scan_result)
+                adverts.append(device_info.get('adverts'))
+            if mac_address not in states or states[mac_address]['scan_time'] <= seen_at:
+                states[mac_address] = scan_result
+
+        if not readings:
+            return 0
+
+        session = self.Session()
+        start = time.perf_counter()
+        try:
+            upsert = sqlite_insert(Device)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[Device.mac_address],
+                set_={
+                    # Keep the stored value when this sighting didn't carry one
+                    'device_name': func.coalesce(
+                        func.nullif(upsert.excluded.device_name, ''), Device.device_name
+                    ),
+                    'device_class': func.coalesce(
+                        func.nullif(upsert.excluded.device_class, ''), Device.device_class
+                    ),
+                    'manufacturer': func.coalesce(
+                        func.nullif(upsert.excluded.manufacturer, ''), Device.manufacturer
+                    ),
+                    'last_seen': upsert.excluded.last_seen,
+                    'device_id': upsert.excluded.device_id
+                }
+            )
+            session.execute(upsert, list(devices.values()))
+            self._insert_scan_results(session, scan_results, adverts)
+            self._update_device_state(session, states.values())
+            self._update_rollups(session, readings)
+            session.commit()
+            self._sqlite_time.observe(time.perf_counter() - start)
+            self._rows_written.inc(len(scan_results))
+            self.logger.log_storage_operation(
+                "store_cycle", "Stored %d devices and %d scan results", len(devices), len(scan_results)
+            )
+            return len(scan_results)
+        except Exception as e:
+            session.rollback()
+            self._errors.inc()
+            self.logger.error(f"Error storing scan cycle: {str(e)}")
+            return 0
+        finally:
+            session.close()
+
+    def store_presence(self, events: List[Dict], samples: List[Dict]) -> None:
+        """Store presence transitions and smoothed samples in one transaction."""
+        if not events and not samples:
+            return
+
+        session = self.Session()
+        try:
+            if events:
+                session.execute(insert(PresenceEvent), [
+                    {**event, 'event_time': datetime.utcfromtimestamp(event['event_time'])}
+                    for event in events
+                ])
+            if samples:
+                session.execute(insert(PresenceSample), [
+                    {**sample, 'sample_time': datetime.utcfromtimestamp(sample['sample_time'])}
+                    for sample in samples
+                ])
+            session.commit()
+            self.logger.log_storage_operation(
+                "store_presence", "Stored %d presence events and %d samples", len(events), len(samples)
+            )
+        except Exception as e:
+            session.rollback()
+            self._errors.inc()
+            self.logger.error(f"Error storing presence: {str(e)}")
+        finally:
+            session.close()
+
+    def _update_device_state(self, session, scan_results) -> None:
+        """Upsert device_state rows from scan results, never moving back in time."""
+        rows = [
+            {
+                'mac_address': result['device_mac'],
+                'scan_time': result['scan_time'],
+                'signal_strength': result['signal_strength'],
+                'device_type': result['device_type'],
+                'is_mobile': result['is_mobile']
+            }
+            for result in scan_results
+        ]
+        if not rows:
+            return
+        upsert = sqlite_insert(DeviceState)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[DeviceState.mac_address],
+            set_={
+                'scan_time': upsert.excluded.scan_time,
+                'signal_strength': upsert.excluded.signal_strength,
+                'device_type': upsert.excluded.device_type,
+                'is_mobile': upsert.excluded.is_mobile
+            },
+            where=upsert.excluded.scan_time >= DeviceState.scan_time
+        )
+        session.execute(upsert, rows)
+
+    def _update_rollups(self, session, scan_results) -> None:
+        """Fold scan results into the minute, hour and day occupancy rollups."""
+        aggregates = {}
+        members = {}
+        latest = None
+        for result in scan_results:
+            scan_time = result['scan_time']
+            rssi = result['signal_strength']
+            latest = scan_time if latest is None else max(latest, scan_time)
+            for granularity in ROLLUP_GRANULARITIES:
+                key = (granularity, bucket_start(scan_time, granularity))
+                aggregate = aggregates.get(key)
+                if aggregate is None:
+                    aggregates[key] = [rssi, rssi, rssi, 1]
+                else:
+                    aggregate[0] = min(aggregate[0], rssi)
+                    aggregate[1] = max(aggregate[1], rssi)
+                    aggregate[2] += rssi
+                    aggregate[3] += 1
+                member = key + (result['device_mac'],)
+                members[member] = members.get(member, False) or bool(result['is_mobile'])
+
+        if not aggregates:
+            return
+
+        # Remember which devices each bucket has seen, so distinct counts stay exact
+        member_upsert = sqlite_insert(RollupMember)
+        member_upsert = member_upsert.on_conflict_do_update(
+            index_elements=[RollupMember.granularity, RollupMember.bucket_start, RollupMember.mac_address],
+            set_={'is_mobile': func.max(RollupMember.is_mobile, member_upsert.excluded.is_mobile)}
+        )
+        session.execute(member_upsert, [
+            {'granularity': g, 'bucket_start': b, 'mac_address': mac, 'is_mobile': is_mobile}
+            for (g, b, mac), is_mobile in members.items()
+        ])
+
+        rollup_upsert = sqlite_insert(OccupancyRollup)
+        rollup_upsert = rollup_upsert.on_conflict_do_update(
+            index_elements=[OccupancyRollup.granularity, OccupancyRollup.bucket_start],
+            set_={
+                'rssi_min': func.min(OccupancyRollup.rssi_min, rollup_upsert.excluded.rssi_min),
+                'rssi_max': func.max(OccupancyRollup.rssi_max, rollup_upsert.excluded.rssi_max),
+                'rssi_sum': OccupancyRollup.rssi_sum + rollup_upsert.excluded.rssi_sum,
+                'sample_count': OccupancyRollup.sample_count + rollup_upsert.excluded.sample_count
+            }
+        )
+        session.execute(rollup_upsert, [
+            {
+                'granularity': g,
+                'bucket_start': b,
+                'device_count': 0,
+                'mobile_count': 0,
+                'rssi_min': aggregate[0],
+                'rssi_max': aggregate[1],
+                'rssi_sum': aggregate[2],
+                'sample_count': aggregate[3]
+            }
+            for (g, b), aggregate in aggregates.items()
+        ])
+
+        # Recount distinct devices for the touched buckets only. An open
+        # bucket's members only grow, so the recount never falls below the
+        # stored count; a closed bucket has had its members pruned, and a late
+        # reading must not replace its count with just the late devices
+        for g, b in aggregates:
+            in_bucket = and_(RollupMember.granularity == g, RollupMember.bucket_start == b)
+            session.execute(
+                update(OccupancyRollup)
+                .where(OccupancyRollup.granularity == g, OccupancyRollup.bucket_start == b)
+                .values(
+                    device_count=func.max(
+                        OccupancyRollup.device_count,
+                        session.query(func.count()).filter(in_bucket).scalar_subquery()
+                    ),
+                    mobile_count=func.max(
+                        OccupancyRollup.mobile_count,
+                        session.query(func.count()).filter(
+                            in_bucket, RollupMember.is_mobile.is_(True)
+                        ).scalar_subquery()
+                    )
+                )
+            )
+
+        # Closed buckets no longer need their member lists; one bucket of
+        # grace covers records that arrive late through the write queue
+        for granularity, size in ROLLUP_GRANULARITIES.items():
+            cutoff = bucket_start(latest, granularity) - timedelta(seconds=size)
+            session.query(RollupMember).filter(
+                RollupMember.granularity == granularity,
+                RollupMember.bucket_start < cutoff
+            ).delete(synchronize_session=False)
+
+    @staticmethod
+    def choose_granularity(start: datetime, end: datetime) -> str:
+        """Pick the coarsest rollup whose bucket boundaries line up with the range."""
+        for granularity in reversed(list(ROLLUP_GRANULARITIES)):
+            size = timedelta(seconds=ROLLUP_GRANULARITIES[granularity])
+            if (end - start >= size
+                    and bucket_start(start, granularity) == start
+                    and bucket_start(end, granularity) == end):
+                return granularity
+        return next(iter(ROLLUP_GRANULARITIES))
+
+    def get_occupancy(self, start: datetime, end: datetime,
+                      granularity: Optional[str] = None) -> List[Dict]:
+        """
+        Get occupancy per bucket for [start, end).
+        Uses the coarsest rollup that fits the range unless one is given.
+        """
+        granularity = granularity or self.choose_granularity(start, end)
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+        session = self.Session()
+        try:
+            rollups = session.query(OccupancyRollup).filter(
+                OccupancyRollup.granularity == granularity,
+                OccupancyRollup.bucket_start >= bucket_start(start, granularity),
+                OccupancyRollup.bucket_start < end
+            ).order_by(OccupancyRollup.bucket_start).all()
+            return [
+                {
+                    'bucket_start': rollup.bucket_start,
+                    'granularity': granularity,
+                    'devices': rollup.device_count,
+                    'mobile_devices': rollup.mobile_count,
+                    'rssi_min': rollup.rssi_min,
+                    'rssi_avg': rollup.rssi_sum / rollup.sample_count if rollup.sample_count else None,
+                    'rssi_max': rollup.rssi_max
+                }
+                for rollup in rollups
+            ]
+        finally:
+            session.close()
+
+    def backfill_rollups(self, chunk_size: int = 10000) -> int:
+        """Rebuild all rollups from the raw scan results. Returns rows processed."""
+        session = self.Session()
+        try:
+            session.query(RollupMember).delete(synchronize_session=False)
+            session.query(OccupancyRollup).delete(synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+        processed = 0
+        last_time, last_id = None, None
+        while True:
+            session = self.Session()
+            try:
+                # Keyset pagination in time order, so closed buckets can be pruned as we go
+                model = CompactScanResult if self.compact else ScanResult
+                query = session.query(model).filter(model.scan_time.isnot(None))
+                if last_time is not None:
+                    query = query.filter(or_(
+                        model.scan_time > last_time,
+                        and_(model.scan_time == last_time, model.id > last_id)
+                    ))
+                chunk = query.order_by(model.scan_time, model.id).limit(chunk_size).all()
+                if not chunk:
+                    break
+                if self.compact:
+                    results = [_expand_compact_row(result) for result in chunk]
+                else:
+                    results = [
+                        {
+                            'device_mac': result.device_mac,
+                            'scan_time': result.scan_time,
+                            'signal_strength': result.signal_strength,
+                            'is_mobile': result.is_mobile
+                        }
+                        for result in chunk
+                    ]
+                for result in results:
+                    result['signal_strength'] = result['signal_strength'] or 0
+                self._update_rollups(session, results)
+                session.commit()
+                processed += len(chunk)
+                last_time, last_id = chunk[-1].scan_time, chunk[-1].id
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+        self.logger.log_storage_operation("backfill_rollups", "Rebuilt rollups from %d scan results", processed)
+        return processed
+
+    def get_device_counts(self) -> Tuple[int, int]:
+        """Get total and mobile device counts from the latest device state."""
+        session = self.Session()
+        try:
+            total = session.query(func.count(DeviceState.mac_address)).scalar()
+            mobile = session.query(func.count(DeviceState.mac_address)).filter(
+                DeviceState.is_mobile.is_(True)
+            ).scalar()
+            return total, mobile
+        finally:
+            session.close()
+
+    def submit_cycle(self, batch: List[Tuple[Dict, Dict]], persist_mask: Optional[List[bool]] = None) -> None:
+        """
+        Store a scan cycle, through the write-behind queue when it is running.
+        Without a writer thread this is a synchronous store_cycle call.
+        """
+        if self._writer is None:
+            self.store_cycle(batch, persist_mask)
+            return
+
+        enqueued_at = time.monotonic()
+        for index, record in enumerate(batch):
+            self._enqueue((enqueued_at, record, persist_mask is None or persist_mask[index]))
+
+    def start_writer(self) -> None:
+        """Start the write-behind writer thread."""
+        if self._writer is not None:
+            return
+        self._write_queue = queue.Queue(maxsize=self.config.write_queue_size)
+        self._writer_stop.clear()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="storage-writer", daemon=True
+        )
+        self._writer.start()
+        self.logger.info(
+            f"Write-behind storage enabled (queue={self.config.write_queue_size}, "
+            f"batch={self.config.write_batch_size}, backpressure={self.config.write_backpressure})"
+        )
+
+    def stop_writer(self, timeout: Optional[float] = None) -> None:
+        """Write out everything still queued and stop the writer thread."""
+        writer = self._writer
+        if writer is None:
+            return
+        # From here on submit_cycle stores synchronously
+        self._writer = None
+        self._writer_stop.set()
+        writer.join(timeout)
+        if writer.is_alive():
+            self.logger.warning(
+                f"Storage writer did not finish, {self._write_queue.qsize()} records left unwritten"
+            )
+            return
+        # Records a producer enqueued just as the writer exited
+        items = []
+        while True:
+            try:
+                items.append(self._write_queue.get_nowait())
+            except queue.Empty:
+                break
+        if items:
+            stored = self.store_cycle([record for _, record, _ in items], [persist for _, _, persist in items])
+            with self._stats_lock:
+                self.writer_stats['written'] += stored
+            for _ in items:
+                self._write_queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued record has been written."""
+        if self._writer is not None:
+            self._write_queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes and release the database engine."""
+        self.stop_writer()
+        self.adverts.close()
+        self.engine.dispose()
+
+    def get_writer_stats(self) -> Dict:
+        """Get write-behind queue depth, throughput and latency figures."""
+        with self._stats_lock:
+            stats = dict(self.writer_stats)
+        stats['queue_depth'] = self._write_queue.qsize() if self._write_queue else 0
+        return stats
+
+    def _enqueue(self, item: Tuple) -> None:
+        """Put a record on the write queue, applying the backpressure policy."""
+        if self.config.write_backpressure == 'drop_oldest':
+            while True:
+                try:
+                    self._write_queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self._write_queue.get_nowait()
+                        self._write_queue.task_done()
+                        with self._stats_lock:
+                            self.writer_stats['dropped'] += 1
+                    except queue.Empty:
+                        pass
+        else:
+            self._write_queue.put(item)
+        with self._stats_lock:
+            self.writer_stats['enqueued'] += 1
+
+    def _writer_loop(self) -> None:
+        """Drain the write queue in size- or time-bounded batches."""
+        while not (self._writer_stop.is_set() and self._write_queue.empty()):
+            items = self._next_write_batch()
+            if not items:
+                continue
+            stored = 0
+            try:
+                stored = self.store_cycle(
+                    [record for _, record, _ in items], [persist for _, _, persist in items]
+                )
+            finally:
+                latency = time.monotonic() - min(enqueued_at for enqueued_at, _, _ in items)
+                with self._stats_lock:
+                    self.writer_stats['written'] += stored
+                    self.writer_stats['batches'] += 1
+                    self.writer_stats['last_latency'] = latency
+                    self.writer_stats['max_latency'] = max(self.writer_stats['max_latency'], latency)
+                for _ in items:
+                    self._write_queue.task_done()
+
+    def _next_write_batch(self) -> List[Tuple]:
+        """Collect up to write_batch_size records or wait write_flush_interval."""
+        items = []
+        deadline = time.monotonic() + self.config.write_flush_interval
+        while len(items) < self.config.write_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self._writer_stop.is_set() and self._write_queue.empty()):
+                break
+            try:
+                items.append(self._write_queue.get(timeout=min(timeout, 0.1)))
+            except queue.Empty:
+                continue
+        return items
+
     def get_device_history(self, mac_address: str, days: Optional[int] = None) -> List[Dict]:
         """Retrieve device history."""
+        if self.compact:
+            return self._get_compact_device_history(mac_address, days)
+
         session = self.Session()
         try:
             query = session.query(ScanResult).filter_by(device_mac=mac_address)
@@ -109,33 +1091,344 @@ class StorageManager:
                 query = query.filter(ScanResult.scan_time >= cutoff_date)
             
             results = query.order_by(ScanResult.scan_time.desc()).all()
-            return [self._scan_result_to_dict(result) for result in results]
+            # Every row's payload from one index query and the mapped segments
+            adverts = self.get_adverts([result.id for result in results]) if results else {}
+            return [self._scan_result_to_dict(result, adverts.get(result.id, {})) for result in results]
         finally:
             session.close()
-    
-    def cleanup_old_data(self) -> None:
-        """Remove data older than retention period."""
+
+    def _get_compact_device_history(self, mac_address: str, days: Optional[int] = None) -> List[Dict]:
+        """get_device_history for the compact schema."""
+        device_id = pack_mac(mac_address)
+        if device_id is None:
+            return []
         session = self.Session()
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=self.config.retention_days)
-            session.query(ScanResult).filter(ScanResult.scan_time < cutoff_date).delete()
-            session.commit()
-            self.logger.log_storage_operation("cleanup", f"Removed data older than {self.config.retention_days} days")
+            query = session.query(CompactScanResult).filter(CompactScanResult.device_id == device_id)
+            if days:
+                cutoff_date = datetime.utcnow() - timedelta(days=days)
+                query = query.filter(CompactScanResult.scan_time >= _epoch_seconds(cutoff_date))
+            results = query.order_by(CompactScanResult.scan_time.desc()).all()
+
+            adverts = self.get_adverts([result.id for result in results]) if results else {}
+
+            history = []
+            for result in results:
+                entry = _expand_compact_row(result)
+                del entry['device_mac']
+                entry['properties'] = adverts.get(result.id, {})
+                history.append(entry)
+            return history
+        finally:
+            session.close()
+
+    def iter_scan_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          mac_addresses: Optional[Sequence[str]] = None, after_id: Optional[int] = None,
+                          batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream scan results joined with their devices, in id order.
+        Rows are fetched from the cursor batch_size at a time, so memory use
+        doesn't grow with the table. Filters on [start, end), a set of MACs
+        and ids after after_id, which lets an export resume where it stopped.
+        """
+        if self.compact:
+            yield from self._iter_compact_scan_history(start, end, mac_addresses, after_id, batch_size)
+            return
+
+        statement = select(
+            ScanResult.id, ScanResult.scan_time, ScanResult.device_mac,
+            Device.device_name, Device.device_class, Device.manufacturer,
+            ScanResult.signal_strength, ScanResult.device_type, ScanResult.is_mobile,
+            ScanResult.adapter
+        ).outerjoin(Device, Device.mac_address == ScanResult.device_mac)
+        if start is not None:
+            statement = statement.where(ScanResult.scan_time >= start)
+        if end is not None:
+            statement = statement.where(ScanResult.scan_time < end)
+        if mac_addresses:
+            statement = statement.where(ScanResult.device_mac.in_(list(mac_addresses)))
+        if after_id is not None:
+            statement = statement.where(ScanResult.id > after_id)
+        statement = statement.order_by(ScanResult.id)
+
+        with self.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(statement)
+            for row in result:
+                yield row._asdict()
+
+    def _iter_compact_scan_history(self, start: Optional[datetime], end: Optional[datetime],
+                                   mac_addresses: Optional[Sequence[str]], after_id: Optional[int],
+                                   batch_size: int) -> Iterator[Dict]:
+        """iter_scan_history for the compact schema, expanding rows to the standard fields."""
+        statement = select(
+            CompactScanResult.id, CompactScanResult.scan_time, CompactScanResult.device_id,
+            Device.device_name, Device.device_class, Device.manufacturer,
+            CompactScanResult.rssi, CompactScanResult.type_code, CompactScanResult.is_mobile,
+            CompactScanResult.adapter
+        ).outerjoin(Device, Device.device_id == CompactScanResult.device_id)
+        if start is not None:
+            statement = statement.where(CompactScanResult.scan_time >= _epoch_seconds(start))
+        if end is not None:
+            statement = statement.where(CompactScanResult.scan_time < _epoch_seconds(end))
+        if mac_addresses:
+            device_ids = [pack_mac(mac_address) for mac_address in mac_addresses]
+            statement = statement.where(CompactScanResult.device_id.in_(
+                [device_id for device_id in device_ids if device_id is not None]
+            ))
+        if after_id is not None:
+            statement = statement.where(CompactScanResult.id > after_id)
+        if start is not None or end is not None:
+            # Ordering by the bare rowid makes SQLite walk the whole table to
+            # skip the sort; an expression sends it to the scan_time index
+            statement = statement.order_by(CompactScanResult.id + 0)
+        else:
+            statement = statement.order_by(CompactScanResult.id)
+
+        utcfromtimestamp = datetime.utcfromtimestamp
+        with self.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(statement)
+            # Unpacked positionally; named access on each row costs more than the query
+            for (row_id, scan_time, device_id, device_name, device_class, manufacturer,
+                 rssi, type_code, is_mobile, adapter) in result:
+                yield {
+                    'id': row_id,
+                    'scan_time': utcfromtimestamp(scan_time),
+                    'device_mac': unpack_mac(device_id),
+                    'device_name': device_name,
+                    'device_class': device_class,
+                    'manufacturer': manufacturer,
+                    'signal_strength': rssi,
+                    'device_type': DEVICE_TYPES[type_code] if type_code is not None else None,
+                    'is_mobile': is_mobile,
+                    'adapter': _adapter_name(adapter)
+                }
+
+    def convert_to_compact(self, chunk_size: int = 50000) -> int:
+        """
+        Move every standard scan result into the compact schema, keeping ids,
+        and switch the database to compact mode. Each chunk moves in its own
+        transaction, so an interrupted conversion picks up where it stopped
+        when run again. Run it while the scanner is stopped. Rows without a
+        valid MAC address can't be keyed and are dropped. Returns the rows
+        moved.
+        """
+        moved = skipped = 0
+        while True:
+            with self.engine.begin() as connection:
+                rows = connection.execute(
+                    select(
+                        ScanResult.id, ScanResult.device_mac, ScanResult.scan_time,
+                        ScanResult.signal_strength, ScanResult.device_type,
+                        ScanResult.is_mobile, ScanResult.adapter
+                    ).order_by(ScanResult.id).limit(chunk_size)
+                ).fetchall()
+                if not rows:
+                    break
+                compact_rows = [
+                    _compact_row({**row._asdict(), 'scan_time': row.scan_time or EPOCH})
+                    for row in rows
+                ]
+                compact_rows = [row for row in compact_rows if row is not None]
+                if compact_rows:
+                    connection.execute(insert(CompactScanResult), compact_rows)
+                connection.execute(delete(ScanResult).where(ScanResult.id <= rows[-1].id))
+                moved += len(compact_rows)
+                skipped += len(rows) - len(compact_rows)
+            self.logger.log_storage_operation("convert_to_compact", "Moved %d scan results", moved)
+
+        if skipped:
+            self.logger.warning(f"Dropped {skipped} scan results without a valid MAC address")
+
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(SchemaSetting).where(SchemaSetting.key == 'schema_mode').values(value='compact')
+            )
+        self.schema_mode = 'compact'
+        self.compact = True
+        return moved
+    
+    def cleanup_old_data(self, stop: Optional[threading.Event] = None) -> Dict:
+        """
+        Remove data older than the retention period.
+        Deletes run in chunks of retention_chunk_size rows, each in its own
+        short transaction, so concurrent writers are never blocked for long.
+        Once stop is set the pass ends after the current chunk, leaving the
+        rest for the next run. Returns the rows deleted per table and the
+        bytes handed back to the OS.
+        """
+        stats = {
+            'scan_results': 0,
+            'adverts': 0,
+            'advert_segments': 0,
+            'devices': 0,
+            'rollups': 0,
+            'presence': 0,
+            'bytes_freed': 0
+        }
+        chunk_size = self.config.retention_chunk_size
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=self.config.retention_days)
+        rollup_cutoff = now - timedelta(days=self.config.rollup_retention_days)
+
+        try:
+            size_before = self._database_size()
+
+            # Scan results, cascading to their advert index rows
+            results = CompactScanResult if self.compact else ScanResult
+            results_cutoff = _epoch_seconds(cutoff_date) if self.compact else cutoff_date
+            while not self._stopping(stop):
+                with self.engine.begin() as connection:
+                    ids = connection.execute(
+                        select(results.id)
+                        .where(results.scan_time < results_cutoff)
+                        .order_by(results.scan_time)
+                        .limit(chunk_size)
+                    ).scalars().all()
+                    if not ids:
+                        break
+                    stats['adverts'] += connection.execute(
+                        delete(AdvertIndex).where(AdvertIndex.scan_result_id.in_(ids))
+                    ).rowcount
+                    stats['scan_results'] += connection.execute(
+                        delete(results).where(results.id.in_(ids))
+                    ).rowcount
+
+            stats['advert_segments'], segment_bytes = self._drop_advert_segments(_epoch_seconds(cutoff_date), stop)
+
+            if self.config.retention_prune_devices:
+                stale = select(Device.mac_address).where(Device.last_seen < cutoff_date).limit(chunk_size)
+                self._delete_in_chunks(
+                    delete(DeviceState).where(DeviceState.mac_address.in_(
+                        select(DeviceState.mac_address)
+                        .join(Device, Device.mac_address == DeviceState.mac_address)
+                        .where(Device.last_seen < cutoff_date)
+                        .limit(chunk_size)
+                        .scalar_subquery()
+                    )),
+                    stop
+                )
+                stats['devices'] += self._delete_in_chunks(
+                    delete(Device).where(Device.mac_address.in_(stale.scalar_subquery())), stop
+                )
+
+            stats['rollups'] += self._delete_in_chunks(
+                delete(OccupancyRollup).where(OccupancyRollup.bucket_start.in_(
+                    select(OccupancyRollup.bucket_start)
+                    .where(OccupancyRollup.bucket_start < rollup_cutoff)
+                    .limit(chunk_size)
+                    .scalar_subquery()
+                )),
+                stop
+            )
+
+            for model, column in ((PresenceEvent, PresenceEvent.event_time),
+                                  (PresenceSample, PresenceSample.sample_time)):
+                stats['presence'] += self._delete_in_chunks(
+                    delete(model).where(model.id.in_(
+                        select(model.id).where(column < cutoff_date).limit(chunk_size).scalar_subquery()
+                    )),
+                    stop
+                )
+
+            if self._stopping(stop):
+                self.logger.info("Retention stopped early; the rest is left for the next run")
+            else:
+                self._reclaim_space()
+            stats['bytes_freed'] = max(0, size_before - self._database_size()) + segment_bytes
+            self.logger.log_storage_operation(
+                "cleanup", "Removed data older than %d days: %s", self.config.retention_days, stats
+            )
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Error cleaning up old data: {str(e)}")
+        return stats
+
+    def _drop_advert_segments(self, cutoff: int, stop: Optional[threading.Event] = None) -> Tuple[int, int]:
+        """
+        Delete advert store segments whose newest scan result is older than
+        cutoff (epoch seconds), along with segment files nothing indexes.
+        The segment being written is always kept, and no more are deleted
+        once stop is set. Returns the segments deleted and the bytes freed.
+        """
+        with self.engine.connect() as connection:
+            known = {
+                row.segment: row for row in connection.execute(
+                    select(AdvertSegment.segment, AdvertSegment.first_id,
+                           AdvertSegment.last_id, AdvertSegment.last_time)
+                )
+            }
+        newest = max(known, default=0)
+        dropped = freed = 0
+        for segment in self.adverts.segments():
+            if self._stopping(stop):
+                break
+            if segment == self.adverts.active_segment:
+                continue
+            row = known.get(segment)
+            if row is None and segment >= newest:
+                # Possibly being written by the scanner, with its first index rows not yet committed
+                continue
+            if row is not None:
+                if row.last_time >= cutoff:
+                    continue
+                with self.engine.begin() as connection:
+                    # Normally gone with their scan results already
+                    connection.execute(delete(AdvertIndex).where(
+                        AdvertIndex.scan_result_id.between(row.first_id, row.last_id),
+                        AdvertIndex.segment == segment
+                    ))
+                    connection.execute(delete(AdvertSegment).where(AdvertSegment.segment == segment))
+            # An older segment without a row was written by a run that never committed its index
+            freed += self.adverts.remove_segment(segment)
+            dropped += 1
+        return dropped, freed
+
+    def _delete_in_chunks(self, statement, stop: Optional[threading.Event] = None) -> int:
+        """Repeat a LIMIT-bounded delete, one transaction per chunk, until it deletes nothing or stop is set."""
+        deleted = 0
+        while not self._stopping(stop):
+            with self.engine.begin() as connection:
+                count = connection.execute(statement).rowcount
+            if not count:
+                break
+            deleted += count
+        return deleted
+
+    @staticmethod
+    def _stopping(stop: Optional[threading.Event]) -> bool:
+        return stop is not None and stop.is_set()
+
+    def _database_size(self) -> int:
+        """Get the size in bytes of the database pages in use."""
+        with self.engine.connect() as connection:
+            page_count = connection.exec_driver_sql("PRAGMA page_count").scalar()
+            freelist = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+        return (page_count - freelist) * page_size
+
+    def _reclaim_space(self) -> None:
+        """Return free pages to the OS where the database allows it."""
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                # execute() only steps the pragma once (one page); executescript runs it to the end
+                cursor.executescript("PRAGMA incremental_vacuum;")
+            else:
+                # Only when the startup VACUUM failed; freed pages are still reused by SQLite
+                self.logger.warning("Database is not in incremental vacuum mode; freed pages stay in the file")
+            if cursor.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+                cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            cursor.close()
         finally:
-            session.close()
+            connection.close()
     
-    def _scan_result_to_dict(self, result: ScanResult) -> Dict:
+    def _scan_result_to_dict(self, result: ScanResult, adverts: Dict) -> Dict:
         """Convert scan result to dictionary."""
         return {
             'scan_time': result.scan_time,
             'signal_strength': result.signal_strength,
             'device_type': result.device_type,
             'is_mobile': result.is_mobile,
-            'properties': {
-                prop.property_name: prop.property_value
-                for prop in result.properties
-            }
+            'adapter': result.adapter,
+            'properties': adverts
         } 
\ No newline at end of file
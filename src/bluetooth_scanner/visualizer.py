@@ -1,35 +1,303 @@
 """
 Console visualizer for Bluetooth device data.
 """
+import os
 import time
+import select
 import signal
 import sys
-from datetime import datetime
-from typing import Dict, List
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
 from rich.panel import Panel
 from rich.layout import Layout
 from rich.text import Text
+from rich.segment import Segment
 from rich import box
 from sqlalchemy import desc
-from .storage import StorageManager, Device, ScanResult
-from .config import ConfigManager
-from .logger import Logger
+from .storage import Device, DeviceState
+from .context import AppContext
+from .feed import FeedSubscriber, epoch
+
+# Sort modes the table cycles through, with their keys
+SORT_KEYS: Dict[str, Callable[[Dict], Tuple]] = {
+    'last seen': lambda device: (-(device.get('last_seen') or 0),),
+    'RSSI': lambda device: (-(device.get('signal_strength') or -999), -(device.get('last_seen') or 0)),
+    'mobile first': lambda device: (not device.get('is_mobile'), -(device.get('last_seen') or 0)),
+}
+
+KEY_HINTS = "[n/p] page  [g/G] first/last  [s] sort  [/] filter  [q] quit"
+
+# Lines the table itself takes: title, borders, header rule and caption
+TABLE_CHROME_LINES = 6
+
+class DeviceTableView:
+    """
+    A page of the device table. Sorting and filtering only rerun when the
+    device model, sort mode or filter changes, only the visible page is put
+    into the table, and each row's cells are cached until that device
+    changes, so a frame costs the same at 100 devices as at 10,000.
+    """
+
+    def __init__(self, page_size: int = 20):
+        self.page_size = page_size
+        self.sort_mode = next(iter(SORT_KEYS))
+        self.filter_text = ''
+        self.editing_filter = False
+        self.offset = 0
+        self._ordered: List[Dict] = []
+        self._source_version: Optional[int] = None
+        self._dirty = True
+        self._cells: Dict[str, Tuple[Tuple, Tuple]] = {}  # mac -> (signature, cells)
+
+    def update(self, devices: List[Dict], version: int) -> None:
+        """Re-sort and re-filter when the model changed since the last call."""
+        if version == self._source_version and not self._dirty:
+            return
+        self._source_version = version
+        self._dirty = False
+        needle = self.filter_text.lower()
+        if needle:
+            devices = [
+                device for device in devices
+                if needle in (device.get('device_name') or '').lower()
+                or needle in (device.get('mac_address') or '').lower()
+                or needle in (device.get('device_type') or '').lower()
+            ]
+        self._ordered = sorted(devices, key=SORT_KEYS[self.sort_mode])
+        self.offset = min(self.offset, self._last_offset())
+        if len(self._cells) > 2 * len(self._ordered) + 1000:
+            # Drop cached rows of devices that left the model
+            live = {device.get('mac_address') for device in self._ordered}
+            self._cells = {mac: entry for mac, entry in self._cells.items() if mac in live}
+
+    @property
+    def total(self) -> int:
+        return len(self._ordered)
+
+    def visible(self) -> List[Dict]:
+        """Get the devices on the current page."""
+        return self._ordered[self.offset:self.offset + self.page_size]
+
+    def cells(self, device: Dict) -> Tuple:
+        """Get a device's table cells, rebuilding them only if it changed."""
+        mac_address = device.get('mac_address')
+        signature = (
+            device.get('device_name'), device.get('is_mobile'), device.get('signal_strength'),
+            device.get('last_seen'), device.get('first_seen')
+        )
+        cached = self._cells.get(mac_address)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        cells = (
+            device.get('device_name') or 'Unknown',
+            mac_address or 'Unknown',
+            '📱 Mobile' if device.get('is_mobile') else '📶 Other',
+            f"{device.get('signal_strength', 0)} dBm",
+            format_time(device.get('last_seen')),
+            format_time(device.get('first_seen'))
+        )
+        self._cells[mac_address] = (signature, cells)
+        return cells
+
+    def state(self) -> Tuple:
+        """Everything that decides what the page shows, to skip redundant frames."""
+        return (
+            self._source_version, self.sort_mode, self.filter_text, self.editing_filter,
+            self.offset, self.page_size
+        )
+
+    def caption(self) -> str:
+        if not self._ordered:
+            position = "no devices"
+        else:
+            page = self.offset // self.page_size + 1
+            pages = (len(self._ordered) - 1) // self.page_size + 1
+            position = (
+                f"{self.offset + 1}-{self.offset + len(self.visible())} of {len(self._ordered)} "
+                f"(page {page}/{pages})"
+            )
+        filter_text = self.filter_text + ('_' if self.editing_filter else '')
+        filter_part = f"  filter: {filter_text}" if filter_text else ''
+        return f"{position}  sort: {self.sort_mode}{filter_part}"
+
+    def _last_offset(self) -> int:
+        return max(0, (len(self._ordered) - 1) // self.page_size * self.page_size)
+
+    def set_page_size(self, page_size: int) -> None:
+        page_size = max(1, page_size)
+        if page_size != self.page_size:
+            # Keep the first visible row on screen
+            self.offset = self.offset // page_size * page_size
+            self.page_size = page_size
+
+    def next_page(self) -> None:
+        self.offset = min(self.offset + self.page_size, self._last_offset())
+
+    def previous_page(self) -> None:
+        self.offset = max(0, self.offset - self.page_size)
+
+    def first_page(self) -> None:
+        self.offset = 0
+
+    def last_page(self) -> None:
+        self.offset = self._last_offset()
+
+    def cycle_sort(self) -> None:
+        modes = list(SORT_KEYS)
+        self.sort_mode = modes[(modes.index(self.sort_mode) + 1) % len(modes)]
+        self.offset = 0
+        self._dirty = True
+
+    def set_filter(self, text: str) -> None:
+        self.filter_text = text
+        self.offset = 0
+        self._dirty = True
+
+    def handle_key(self, key: str) -> bool:
+        """Apply a keypress. Returns False for the quit key."""
+        if self.editing_filter:
+            if key in ('\r', '\n'):
+                self.editing_filter = False
+            elif key == '\x1b':
+                self.editing_filter = False
+                self.set_filter('')
+            elif key in ('\x7f', '\b'):
+                self.set_filter(self.filter_text[:-1])
+            elif key.isprintable() and len(key) == 1:
+                self.set_filter(self.filter_text + key)
+            return True
+
+        if key == 'q':
+            return False
+        if key in ('n', ' ', 'PAGE_DOWN', 'RIGHT'):
+            self.next_page()
+        elif key in ('p', 'PAGE_UP', 'LEFT'):
+            self.previous_page()
+        elif key in ('g', 'HOME'):
+            self.first_page()
+        elif key in ('G', 'END'):
+            self.last_page()
+        elif key == 's':
+            self.cycle_sort()
+        elif key == '/':
+            self.editing_filter = True
+        elif key == '\x1b':
+            self.set_filter('')
+        return True
+
+class RenderCache:
+    """Renders a renderable once per size and replays the lines on later frames."""
+
+    def __init__(self, renderable):
+        self.renderable = renderable
+        self._size = None
+        self._lines = []
+
+    def __rich_console__(self, console, options):
+        size = (options.max_width, options.height)
+        if size != self._size:
+            self._lines = console.render_lines(self.renderable, options, pad=False)
+            self._size = size
+        for line in self._lines:
+            yield from line
+            yield Segment.line()
+
+def format_time(timestamp: Optional[float]) -> str:
+    """Format epoch seconds as a UTC time, as the database stores them."""
+    if not timestamp:
+        return 'Never'
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+# Terminal escape sequences for the paging keys
+ESCAPE_KEYS = {
+    '[5~': 'PAGE_UP', '[6~': 'PAGE_DOWN', '[H': 'HOME', '[F': 'END',
+    '[1~': 'HOME', '[4~': 'END', '[C': 'RIGHT', '[D': 'LEFT',
+}
+
+class KeyReader:
+    """Reads single keypresses from a terminal in cbreak mode, on a background thread."""
+
+    def __init__(self, on_key: Callable[[str], None]):
+        self.on_key = on_key
+        self._stop = threading.Event()
+        self._saved = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start reading; False when stdin isn't an interactive terminal."""
+        if not sys.stdin.isatty():
+            return False
+        try:
+            import termios
+            import tty
+            self._saved = termios.tcgetattr(sys.stdin.fileno())
+            tty.setcbreak(sys.stdin.fileno())
+        except Exception:
+            return False
+        self._thread = threading.Thread(target=self._run, name="visualizer-keys", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+    def _read(self, timeout: float) -> str:
+        ready, _, _ = select.select([sys.stdin], [], [], timeout)
+        return os.read(sys.stdin.fileno(), 1).decode(errors='ignore') if ready else ''
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            key = self._read(0.2)
+            if not key:
+                continue
+            if key == '\x1b':
+                # A bare Escape, or the start of an escape sequence
+                sequence = ''
+                while True:
+                    char = self._read(0.02)
+                    if not char:
+                        break
+                    sequence += char
+                    if char.isalpha() or char == '~':
+                        break
+                key = ESCAPE_KEYS.get(sequence, '\x1b' if not sequence else '')
+                if not key:
+                    continue
+            self.on_key(key)
 
 class BluetoothVisualizer:
     """Console visualizer for Bluetooth device data."""
     
-    def __init__(self):
-        self.console = Console()
-        self.config_manager = ConfigManager()
-        self.logger = Logger(self.config_manager)
-        self.storage = StorageManager(self.config_manager, self.logger)
+    def __init__(self, context: Optional[AppContext] = None, console: Optional[Console] = None):
+        self.console = console or Console()
+        self.context = context or AppContext.default()
+        self.config_manager = self.context.config_manager
+        self.logger = self.context.logger
+        self.storage = self.context.storage
         self.running = True
+        config = self.config_manager.get_config()
+        # The database is read once here; after that the live feed keeps the model current
+        self.feed = FeedSubscriber(config.feed_socket, self.logger, timeout=config.feed_timeout)
+        self.feed.load(self.get_recent_devices(config.feed_timeout))
+        self.view = DeviceTableView()
+        self.refresh_interval = config.visualizer_min_interval
+        self._layout: Optional[Layout] = None
+        self._frame_state = None
+        self._feed_connected: Optional[bool] = None
+        self._view_lock = threading.Lock()
+        self._wake = threading.Event()
     
-    def create_device_table(self, devices: List[Dict]) -> Table:
-        """Create a rich table for device data."""
+    def _new_table(self) -> Table:
         table = Table(
             title="Bluetooth Devices",
             box=box.ROUNDED,
@@ -45,18 +313,20 @@ class BluetoothVisualizer:
         table.add_column("Signal", style="blue")
         table.add_column("Last Seen", style="magenta")
         table.add_column("First Seen", style="magenta")
-        
-        # Add rows
+        return table
+    
+    def create_device_table(self, devices: List[Dict]) -> Table:
+        """Create a rich table for device data."""
+        table = self._new_table()
         for device in devices:
-            table.add_row(
-                device.get('device_name', 'Unknown'),
-                device.get('mac_address', 'Unknown'),
-                '📱 Mobile' if device.get('is_mobile') else '📶 Other',
-                f"{device.get('signal_strength', 0)} dBm",
-                device.get('last_seen', 'Never'),
-                device.get('first_seen', 'Never')
-            )
-        
+            table.add_row(*self.view.cells(device))
+        return table
+    
+    def create_page_table(self) -> Table:
+        """Create the table for the current page of the view."""
+        table = self.create_device_table(self.view.visible())
+        # One line, since the page size leaves room for no more
+        table.caption = Text(self.view.caption(), no_wrap=True, overflow="ellipsis")
         return table
     
     def create_stats_panel(self, total_devices: int, mobile_devices: int) -> Panel:
@@ -70,25 +340,28 @@ class BluetoothVisualizer:
         return Panel(
             stats_text,
             title="Statistics",
+            # Text, so the bracketed keys aren't read as markup
+            subtitle=Text(KEY_HINTS),
             border_style="cyan",
             box=box.ROUNDED
         )
     
-    def get_recent_devices(self) -> List[Dict]:
-        """Get recent device data from the database."""
+    def get_recent_devices(self, within: Optional[float] = None) -> List[Dict]:
+        """Get device data from the database, optionally only devices seen in the last `within` seconds."""
         session = self.storage.Session()
         try:
-            # Get the most recent scan result for each device
-            recent_results = session.query(
+            # device_state holds exactly one row (the latest) per device
+            query = session.query(
                 Device,
-                ScanResult
+                DeviceState
             ).join(
-                ScanResult,
-                Device.mac_address == ScanResult.device_mac
-            ).order_by(
-                desc(ScanResult.scan_time)
-            ).distinct(
-                Device.mac_address
+                DeviceState,
+                Device.mac_address == DeviceState.mac_address
+            )
+            if within is not None:
+                query = query.filter(DeviceState.scan_time >= datetime.utcnow() - timedelta(seconds=within))
+            recent_results = query.order_by(
+                desc(DeviceState.scan_time)
             ).all()
             
             devices = []
@@ -98,9 +371,10 @@ class BluetoothVisualizer:
                     'device_name': device.device_name,
                     'device_class': device.device_class,
                     'manufacturer': device.manufacturer,
-                    'first_seen': device.first_seen.strftime('%Y-%m-%d %H:%M:%S'),
-                    'last_seen': device.last_seen.strftime('%Y-%m-%d %H:%M:%S'),
+                    'first_seen': epoch(device.first_seen),
+                    'last_seen': epoch(device.last_seen),
                     'signal_strength': result.signal_strength,
+                    'device_type': result.device_type,
                     'is_mobile': result.is_mobile
                 })
             
@@ -110,15 +384,7 @@ class BluetoothVisualizer:
     
     def get_device_counts(self) -> tuple:
         """Get total and mobile device counts."""
-        session = self.storage.Session()
-        try:
-            total = session.query(Device).count()
-            mobile = session.query(ScanResult).filter_by(is_mobile=True).distinct(
-                ScanResult.device_mac
-            ).count()
-            return total, mobile
-        finally:
-            session.close()
+        return self.storage.get_device_counts()
     
     def create_layout(self) -> Layout:
         """Create the main layout."""
@@ -126,48 +392,99 @@ class BluetoothVisualizer:
         layout.split_column(
             Layout(name="header", size=3),
             Layout(name="body"),
-            Layout(name="footer", size=3)
+            Layout(name="footer", size=6)
         )
         return layout
     
+    def _page_size(self) -> int:
+        """Rows that fit in the body once the header, footer and table chrome are drawn."""
+        return self.console.size.height - 3 - 6 - TABLE_CHROME_LINES
+    
     def update_display(self) -> Layout:
-        """Update the display with current data."""
-        layout = self.create_layout()
-        
-        # Get current data
-        devices = self.get_recent_devices()
-        total_devices, mobile_devices = self.get_device_counts()
+        """
+        Update the display with current data.
+        The layout is built once; each call replaces only the parts whose
+        content changed since the previous frame.
+        """
+        if self._layout is None:
+            self._layout = self.create_layout()
+        layout = self._layout
         
-        # Create header
-        header_text = Text("Bluetooth Device Scanner - Real-time Monitor", style="bold cyan")
-        layout["header"].update(Panel(header_text, style="cyan"))
+        # Read the version first: a change landing in between only costs an extra re-sort
+        version = self.feed.version
+        devices = self.feed.snapshot()
+        with self._view_lock:
+            self.view.set_page_size(self._page_size())
+            self.view.update(devices, version)
+            state = self.view.state()
+            if state != self._frame_state:
+                self._frame_state = state
+                layout["body"].update(RenderCache(self.create_page_table()))
         
-        # Create body with device table
-        layout["body"].update(self.create_device_table(devices))
+        connected = self.feed.connected
+        if connected != self._feed_connected:
+            self._feed_connected = connected
+            header_text = Text("Bluetooth Device Scanner - Real-time Monitor", style="bold cyan")
+            if connected:
+                header_text.append("  ● live", style="bold green")
+            else:
+                header_text.append("  ○ waiting for scanner", style="bold red")
+            layout["header"].update(Panel(header_text, style="cyan"))
         
-        # Create footer with stats
-        layout["footer"].update(self.create_stats_panel(total_devices, mobile_devices))
+        mobile_devices = sum(1 for device in devices if device.get('is_mobile'))
+        layout["footer"].update(self.create_stats_panel(len(devices), mobile_devices))
         
         return layout
     
+    def _adapt_refresh(self, cpu_seconds: float, wall_seconds: float) -> None:
+        """Back off while the process uses more CPU than its budget, speed up when well under it."""
+        config = self.config_manager.get_config()
+        load = cpu_seconds / wall_seconds if wall_seconds > 0 else 0.0
+        if load > config.visualizer_cpu_budget:
+            self.refresh_interval *= 1.5
+        elif load < config.visualizer_cpu_budget / 2:
+            self.refresh_interval /= 1.5
+        self.refresh_interval = min(
+            config.visualizer_max_interval, max(config.visualizer_min_interval, self.refresh_interval)
+        )
+    
+    def _on_key(self, key: str) -> None:
+        with self._view_lock:
+            if not self.view.handle_key(key):
+                self.running = False
+        self._wake.set()
+    
     def run(self) -> None:
         """Run the visualizer."""
         def signal_handler(signum, frame):
             """Handle system signals."""
             self.running = False
+            self._wake.set()
         
         # Set up signal handlers
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
         
+        self.feed.start()
+        keys = KeyReader(self._on_key)
         try:
-            with Live(self.update_display(), refresh_per_second=1) as live:
+            keys.start()
+            with Live(self.update_display(), console=self.console, auto_refresh=False, screen=True) as live:
+                live.refresh()
+                last_cpu, last_wall = time.process_time(), time.monotonic()
                 while self.running:
-                    live.update(self.update_display())
-                    time.sleep(1)
+                    self._wake.wait(self.refresh_interval)
+                    self._wake.clear()
+                    live.update(self.update_display(), refresh=True)
+                    cpu, wall = time.process_time(), time.monotonic()
+                    self._adapt_refresh(cpu - last_cpu, wall - last_wall)
+                    last_cpu, last_wall = cpu, wall
         except KeyboardInterrupt:
             self.console.print("\n[yellow]Stopping visualizer...[/yellow]")
         finally:
+            keys.stop()
+            self.feed.stop()
+            self.context.close()
             self.console.print("[green]Visualizer stopped.[/green]")
 
 def main():
@@ -176,4 +493,4 @@ def main():
     visualizer.run()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the Bluetooth Scanner tests.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.context import AppContext
+
+@pytest.fixture
+def make_context(tmp_path):
+    """
+    Build AppContexts on fresh databases under tmp_path. Keyword settings
+    override the configuration; backend and bus are handed to the context.
+    """
+    contexts = []
+
+    def make(backend=None, bus=None, **settings) -> AppContext:
+        config_manager = ConfigManager()
+        config_manager.update_config(**{
+            'db_path': str(tmp_path / f'scanner{len(contexts)}.db'),
+            'log_file': str(tmp_path / 'scanner.log'),
+            'log_level': "WARNING",
+            'log_async': False,
+            'retention_interval': 0,
+            'metrics_enabled': False,
+            'feed_enabled': False,
+            **settings
+        })
+        context = AppContext(config_manager=config_manager, bus=bus, backend=backend)
+        contexts.append(context)
+        return context
+
+    yield make
+    for context in contexts:
+        context.close()
@@ -0,0 +1,117 @@
+"""
+In-memory stand-in for the pydbus system bus with BlueZ behind it.
+
+FakeBus answers bus.get and bus.subscribe the way pydbus does, keeps an
+ObjectManager tree of adapters and devices, and emits InterfacesAdded,
+PropertiesChanged and InterfacesRemoved to subscribers as the tree changes,
+so the scanner and BlueZBackend run against it unchanged.
+"""
+from typing import Callable, Dict, List, Optional
+
+from bluetooth_scanner.backends import (
+    ADAPTER_INTERFACE, BLUEZ_SERVICE, DEVICE_INTERFACE, OBJECT_MANAGER_INTERFACE, PROPERTIES_INTERFACE,
+    adapter_path, device_path
+)
+
+class FakeSubscription:
+    """What bus.subscribe returns: something to unsubscribe."""
+
+    def __init__(self, bus: 'FakeBus', entry: Dict):
+        self.bus = bus
+        self.entry = entry
+
+    def unsubscribe(self) -> None:
+        if self.entry in self.bus.subscriptions:
+            self.bus.subscriptions.remove(self.entry)
+
+class FakeProxy:
+    """A proxy for one BlueZ object, with the methods the scanner calls on it."""
+
+    def __init__(self, bus: 'FakeBus', path: str):
+        self.bus = bus
+        self.path = path
+
+    def GetManagedObjects(self) -> Dict[str, Dict[str, Dict]]:
+        self.bus.calls.append(('GetManagedObjects', self.path))
+        return {
+            path: {iface: dict(properties) for iface, properties in interfaces.items()}
+            for path, interfaces in self.bus.objects.items()
+        }
+
+    def StartDiscovery(self) -> None:
+        self.bus.calls.append(('StartDiscovery', self.path))
+        self.bus.discovering.add(self.path)
+
+    def StopDiscovery(self) -> None:
+        self.bus.calls.append(('StopDiscovery', self.path))
+        self.bus.discovering.discard(self.path)
+
+    def SetDiscoveryFilter(self, discovery_filter: Dict) -> None:
+        self.bus.calls.append(('SetDiscoveryFilter', self.path))
+        self.bus.discovery_filters[self.path] = dict(discovery_filter)
+
+    def GetAll(self, iface: str) -> Dict:
+        self.bus.calls.append(('GetAll', self.path))
+        return dict(self.bus.objects[self.path][iface])
+
+class FakeBus:
+    """A pydbus-shaped system bus serving a BlueZ object tree from memory."""
+
+    def __init__(self, adapters: List[str] = ('hci0',)):
+        self.objects: Dict[str, Dict[str, Dict]] = {}
+        self.subscriptions: List[Dict] = []
+        self.discovering = set()
+        self.discovery_filters: Dict[str, Dict] = {}
+        self.calls: List[tuple] = []
+        for name in adapters:
+            self.add_adapter(name)
+
+    def get(self, service: str, path: str = '/') -> FakeProxy:
+        assert service == BLUEZ_SERVICE
+        return FakeProxy(self, path)
+
+    def subscribe(self, sender: Optional[str] = None, iface: Optional[str] = None,
+                  signal: Optional[str] = None, object: Optional[str] = None,
+                  arg0: Optional[str] = None, flags: int = 0,
+                  signal_fired: Optional[Callable] = None) -> FakeSubscription:
+        entry = {'sender': sender, 'iface': iface, 'signal': signal, 'object': object,
+                 'arg0': arg0, 'signal_fired': signal_fired}
+        self.subscriptions.append(entry)
+        return FakeSubscription(self, entry)
+
+    def emit(self, object_path: str, iface: str, signal: str, params: tuple) -> None:
+        """Deliver a signal to every matching subscriber, as the bus would."""
+        for entry in list(self.subscriptions):
+            if entry['iface'] not in (None, iface) or entry['signal'] not in (None, signal):
+                continue
+            if entry['object'] not in (None, object_path):
+                continue
+            if entry['arg0'] is not None and (not params or params[0] != entry['arg0']):
+                continue
+            entry['signal_fired'](BLUEZ_SERVICE, object_path, iface, signal, params)
+
+    def add_adapter(self, name: str) -> str:
+        path = adapter_path(name)
+        self.objects[path] = {ADAPTER_INTERFACE: {'Address': '00:00:00:00:00:00', 'Powered': True}}
+        return path
+
+    def add_device(self, adapter: str, mac_address: str, **properties) -> str:
+        """Add a device an adapter has heard and announce it with InterfacesAdded."""
+        path = device_path(adapter, mac_address)
+        device = {'Address': mac_address, 'Adapter': adapter_path(adapter), **properties}
+        self.objects[path] = {DEVICE_INTERFACE: device}
+        self.emit('/', OBJECT_MANAGER_INTERFACE, 'InterfacesAdded', (path, {DEVICE_INTERFACE: dict(device)}))
+        return path
+
+    def change_device(self, path: str, invalidated: List[str] = (), **changed) -> None:
+        """Update a device's properties and announce it with PropertiesChanged."""
+        device = self.objects[path][DEVICE_INTERFACE]
+        device.update(changed)
+        for name in invalidated:
+            device.pop(name, None)
+        self.emit(path, PROPERTIES_INTERFACE, 'PropertiesChanged', (DEVICE_INTERFACE, changed, list(invalidated)))
+
+    def remove_device(self, path: str) -> None:
+        """Forget a device and announce it with InterfacesRemoved."""
+        interfaces = list(self.objects.pop(path))
+        self.emit('/', OBJECT_MANAGER_INTERFACE, 'InterfacesRemoved', (path, interfaces))
@@ -0,0 +1,119 @@
+"""
+Scanning on several adapters.
+"""
+import threading
+
+import pytest
+
+from bluetooth_scanner.scanner import BluetoothScanner
+
+from fakes import FakeBus
+
+ADAPTERS = ['hci0', 'hci1', 'hci2', 'hci3']
+# MAC -> RSSI per adapter that hears it
+HEARD = {
+    'AA:BB:CC:00:00:00': {'hci0': -50},
+    'AA:BB:CC:00:00:01': {'hci1': -55},
+    'AA:BB:CC:00:00:02': {'hci2': -60},
+    'AA:BB:CC:00:00:03': {'hci3': -65},
+    # Heard everywhere, loudest on hci2
+    'AA:BB:CC:00:00:04': {'hci0': -80, 'hci1': -75, 'hci2': -45, 'hci3': -70},
+}
+
+@pytest.fixture
+def bus():
+    bus = FakeBus(adapters=ADAPTERS)
+    for mac_address, heard_by in HEARD.items():
+        for adapter, rssi in heard_by.items():
+            bus.add_device(adapter, mac_address, RSSI=rssi, Name=f"Phone {mac_address[-2:]}")
+    return bus
+
+def stored_adapters(scanner) -> dict:
+    """Get the adapter of every stored row, per MAC."""
+    return {
+        mac_address: [row['adapter'] for row in scanner.storage.get_device_history(mac_address)]
+        for mac_address in HEARD
+    }
+
+def test_enumerates_every_adapter(make_context):
+    # Unsorted, and hci10 after hci9 rather than after hci1
+    bus = FakeBus(adapters=['hci10', 'hci2', 'hci0', 'hci9', 'hci1'])
+    scanner = BluetoothScanner(make_context(bus=bus))
+
+    assert scanner.initialize()
+    assert scanner.adapters == ['hci0', 'hci1', 'hci2', 'hci9', 'hci10']
+    assert scanner.adapter == 'hci0'
+
+def test_adapters_setting_narrows_the_set(make_context, bus):
+    scanner = BluetoothScanner(make_context(bus=bus, adapters='hci1, hci3'))
+
+    assert scanner.initialize()
+    assert scanner.adapters == ['hci1', 'hci3']
+
+def test_polling_stores_the_adapter_per_row(make_context, bus):
+    scanner = BluetoothScanner(make_context(bus=bus))
+    assert scanner.initialize()
+    assert scanner.adapters == ADAPTERS
+
+    for name in scanner.adapters:
+        scanner._collect_sightings(name)
+    scanner._store_sightings(scanner.merger.flush(force=True))
+
+    assert stored_adapters(scanner) == {
+        'AA:BB:CC:00:00:00': ['hci0'],
+        'AA:BB:CC:00:00:01': ['hci1'],
+        'AA:BB:CC:00:00:02': ['hci2'],
+        'AA:BB:CC:00:00:03': ['hci3'],
+        'AA:BB:CC:00:00:04': ['hci2'],
+    }
+    assert scanner.storage.get_device_history('AA:BB:CC:00:00:04')[0]['signal_strength'] == -45
+
+def test_staggered_discovery_runs_on_every_adapter(make_context, bus):
+    scanner = BluetoothScanner(make_context(bus=bus, scan_duration=0.02, scan_interval=0.02, merge_window=0.05))
+    assert scanner.initialize()
+    scanner.scanning = True
+    runner = threading.Thread(target=scanner._run_polling_discovery)
+    runner.start()
+    threading.Event().wait(0.3)
+    scanner.stop_scanning()
+    runner.join(timeout=10)
+
+    started = {path.rsplit('/', 1)[-1] for call, path in bus.calls if call == 'StartDiscovery'}
+    assert started == set(ADAPTERS)
+    assert {mac_address: adapters[0] for mac_address, adapters in stored_adapters(scanner).items()} == {
+        'AA:BB:CC:00:00:00': 'hci0',
+        'AA:BB:CC:00:00:01': 'hci1',
+        'AA:BB:CC:00:00:02': 'hci2',
+        'AA:BB:CC:00:00:03': 'hci3',
+        'AA:BB:CC:00:00:04': 'hci2',
+    }
+
+def test_signals_from_every_adapter_merge_into_one_row(make_context):
+    bus = FakeBus(adapters=ADAPTERS)
+    scanner = BluetoothScanner(make_context(bus=bus))
+    assert scanner.initialize()
+    assert scanner.subscribe_signals()
+    scanner.scanning = True
+
+    for adapter, rssi in HEARD['AA:BB:CC:00:00:04'].items():
+        bus.add_device(adapter, 'AA:BB:CC:00:00:04', RSSI=rssi)
+    scanner.scanning = False
+    scanner._flush_sightings()
+
+    rows = scanner.storage.get_device_history('AA:BB:CC:00:00:04')
+    assert [(row['adapter'], row['signal_strength']) for row in rows] == [('hci2', -45)]
+    scanner.unsubscribe_signals()
+
+def test_dbus_calls_from_every_adapter_thread_are_counted(make_context, bus):
+    scanner = BluetoothScanner(make_context(bus=bus))
+    threads = [
+        threading.Thread(target=lambda: [scanner._dbus_call(int) for _ in range(20000)])
+        for _ in ADAPTERS
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert scanner._take_dbus_calls() == 20000 * len(ADAPTERS)
+    assert scanner.dbus_calls == 0
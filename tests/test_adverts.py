@@ -0,0 +1,141 @@
+"""
+The advert store and the index from scan results to its records.
+"""
+import os
+import time
+
+import pytest
+
+from bluetooth_scanner.adverts import RECORD_HEADER, AdvertStore, decode_adverts, encode_adverts
+
+def mac(index: int) -> str:
+    return f'AA:BB:CC:DD:00:{index:02X}'
+
+def advert(index: int, cycle: int = 0) -> dict:
+    return {'ManufacturerData': {0x004C: bytes((index, cycle))}, 'TxPower': -index}
+
+def store(storage, devices, cycle: int = 0) -> None:
+    """Store one cycle of readings, each with its own advert payload."""
+    storage.store_cycle([
+        (
+            {'mac_address': mac(index), 'signal_strength': -60, 'last_seen': time.time(),
+             'adverts': advert(index, cycle)},
+            {'device_type': 'mobile_phone', 'is_mobile': True}
+        )
+        for index in devices
+    ])
+
+@pytest.mark.parametrize('schema_mode', ['standard', 'compact'])
+@pytest.mark.parametrize('returning', [True, False])
+def test_adverts_are_indexed_to_their_scan_results(make_context, schema_mode, returning):
+    storage = make_context(schema_mode=schema_mode).storage
+    # SQLite before 3.35 or SQLAlchemy before 2.0.10 can't return the new ids
+    storage._returning_ids = storage._returning_ids and returning
+    for cycle in range(3):
+        store(storage, range(1, 6), cycle)
+
+    for index in range(1, 6):
+        history = storage.get_device_history(mac(index))
+        assert [row['properties'] for row in history] == [advert(index, cycle) for cycle in (2, 1, 0)]
+
+def test_encode_decode_round_trip():
+    adverts = {
+        'ManufacturerData': {0x004C: b'\x02\x15\x01', '0x0075': [1, 2, 3]},
+        'ServiceData': {'0000feaa-0000-1000-8000-00805f9b34fb': b'\x10\x00'},
+        'UUIDs': ['0000180f-0000-1000-8000-00805f9b34fb', '0000fe9f-0000-1000-8000-00805f9b34fb'],
+        'TxPower': -12
+    }
+
+    assert decode_adverts(encode_adverts(adverts)) == {
+        'ManufacturerData': {0x004C: b'\x02\x15\x01', 0x0075: b'\x01\x02\x03'},
+        'ServiceData': {'0000feaa-0000-1000-8000-00805f9b34fb': b'\x10\x00'},
+        'UUIDs': ['0000180f-0000-1000-8000-00805f9b34fb', '0000fe9f-0000-1000-8000-00805f9b34fb'],
+        'TxPower': -12
+    }
+    assert decode_adverts(encode_adverts({})) == {}
+
+@pytest.fixture
+def advert_store(make_context, tmp_path):
+    def make(**kwargs) -> AdvertStore:
+        store = AdvertStore(str(tmp_path / 'adverts'), make_context().logger, **kwargs)
+        stores.append(store)
+        return store
+
+    stores = []
+    yield make
+    for store in stores:
+        store.close()
+
+def test_damaged_record_is_skipped(advert_store):
+    store = advert_store()
+    first, second = store.append_many([(mac(1), advert(1)), (mac(2), advert(2))])
+    segment, offset = second
+    with open(store.path(segment), 'r+b') as segment_file:
+        # Flip a byte of the second record's payload
+        segment_file.seek(offset + RECORD_HEADER.size + 3)
+        value = segment_file.read(1)
+        segment_file.seek(-1, 1)
+        segment_file.write(bytes((value[0] ^ 0xFF,)))
+
+    assert store.read(*second) is None
+    assert store.read(*first) == advert(1)
+    assert store.read(segment, offset + 10 ** 6) is None
+
+def test_unchanged_payload_is_written_once_per_segment(advert_store):
+    store = advert_store()
+    first, = store.append_many([(mac(1), advert(1))])
+    size = os.path.getsize(store.path(first[0]))
+
+    repeated, other_device, changed = store.append_many([
+        (mac(1), advert(1)), (mac(2), advert(1)), (mac(1), advert(1, cycle=1))
+    ])
+
+    assert repeated == first
+    assert other_device != first
+    assert changed not in (first, other_device)
+    # The first record, the other device's copy and the changed payload, all the same length
+    assert os.path.getsize(store.path(first[0])) == 3 * size
+    assert store.read(*changed) == advert(1, cycle=1)
+
+def test_reads_across_segment_rollover(advert_store):
+    # Each call appends 60 bytes, so a segment takes two calls before it passes 100
+    store = advert_store(segment_size=100)
+    locations = []
+    for cycle in range(6):
+        locations += store.append_many([(mac(index), advert(index, cycle)) for index in range(1, 4)])
+        # Read while the active segment is still growing, so its map has to be replaced
+        assert store.read(*locations[-1]) == advert(3, cycle)
+
+    assert store.segments() == [1, 2, 3]
+    records = store.read_many(locations)
+    expected = [advert(index, cycle) for cycle in range(6) for index in range(1, 4)]
+    assert [records[location] for location in locations] == expected
+
+    # A payload repeated in a new segment is written again there
+    repeated, = store.append_many([(mac(1), advert(1, 5))])
+    assert repeated[0] == store.active_segment != locations[-3][0]
+
+def test_retention_deletes_segments_past_the_cutoff(make_context):
+    storage = make_context(retention_days=30, advert_segment_size=1).storage
+    for days_ago in (50, 40):
+        seen_at = time.time() - days_ago * 86400
+        storage.store_cycle([
+            (
+                {'mac_address': mac(index), 'signal_strength': -60, 'last_seen': seen_at,
+                 'adverts': advert(index, days_ago)},
+                {'device_type': 'mobile_phone', 'is_mobile': True}
+            )
+            for index in range(1, 4)
+        ])
+    store(storage, range(1, 4))
+    assert storage.adverts.segments() == [1, 2, 3]
+    old_size = os.path.getsize(storage.adverts.path(1)) + os.path.getsize(storage.adverts.path(2))
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['advert_segments'] == 2
+    assert stats['bytes_freed'] >= old_size
+    assert storage.adverts.segments() == [3]
+    assert [row['properties'] for row in storage.get_device_history(mac(1))] == [advert(1)]
+    # The segment being written is never deleted, whatever its age
+    assert storage.adverts.active_segment == 3
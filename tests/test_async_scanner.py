@@ -0,0 +1,77 @@
+"""
+The asyncio pipeline end to end against a synthetic crowd, including shutdown.
+"""
+import logging
+import threading
+import time
+
+from bluetooth_scanner.async_scanner import AsyncBluetoothScanner
+from bluetooth_scanner.backends import SyntheticBackend
+
+def make_scanner(make_context, submit_delay: float, population: int = 100) -> AsyncBluetoothScanner:
+    """
+    A pipeline whose store stage takes submit_delay per batch, counting the
+    readings discovery enqueued and the ones that reached storage.
+    """
+    context = make_context(
+        backend=SyntheticBackend(population=population, churn=0.0, seed=3),
+        scan_duration=0, scan_interval=30, write_batch_size=10,
+        min_signal_strength=-128, suppress_unchanged=False
+    )
+    scanner = AsyncBluetoothScanner(context)
+    scanner.enqueued = 0
+    scanner.submitted = 0
+    scanner.submit_started = threading.Event()
+    strongest_sightings, submit = scanner._strongest_sightings, scanner._submit
+
+    def counting_sightings(snapshot):
+        sightings = strongest_sightings(snapshot)
+        scanner.enqueued += len(sightings)
+        return sightings
+
+    def slow_submit(batch):
+        scanner.submit_started.set()
+        time.sleep(submit_delay)
+        submit(batch)
+        scanner.submitted += len(batch)
+
+    scanner._strongest_sightings = counting_sightings
+    scanner._submit = slow_submit
+    return scanner
+
+def run_until_submitting(scanner: AsyncBluetoothScanner) -> threading.Thread:
+    """Start the pipeline and return once the first window is being stored."""
+    thread = threading.Thread(target=scanner.start_scanning)
+    thread.start()
+    assert scanner.submit_started.wait(5)
+    return thread
+
+def test_stop_drains_every_queued_reading(make_context):
+    scanner = make_scanner(make_context, submit_delay=0.01)
+    thread = run_until_submitting(scanner)
+
+    # The first window's readings are still queued behind the slow store stage
+    scanner.stop_scanning()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert scanner.enqueued == 100
+    assert scanner.submitted == 100
+    assert [scanner._queue_depth(name) for name in ('enrich', 'classify', 'store')] == [0, 0, 0]
+    assert scanner.storage.get_device_counts()[0] == 100
+
+def test_drain_gives_up_after_the_timeout(make_context, caplog):
+    scanner = make_scanner(make_context, submit_delay=0.2)
+    scanner.DRAIN_TIMEOUT = 0.1
+    thread = run_until_submitting(scanner)
+
+    started = time.monotonic()
+    with caplog.at_level(logging.WARNING, logger="bluetooth_scanner"):
+        scanner.stop_scanning()
+        thread.join(10)
+
+    assert not thread.is_alive()
+    # The timeout plus the batch already on the database executor
+    assert time.monotonic() - started < 2
+    assert scanner.submitted < scanner.enqueued
+    assert "Timed out draining the scan pipeline" in caplog.text
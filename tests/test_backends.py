@@ -0,0 +1,83 @@
+"""
+Capture and replay of backend snapshots, and which backends deliver signals.
+"""
+import gzip
+
+import pytest
+
+from bluetooth_scanner.backends import (
+    RecordingBackend, ReplayBackend, SyntheticBackend, create_backend, read_capture
+)
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.scanner import BluetoothScanner
+
+from fakes import FakeBus
+
+def record(path, polls: int = 5, **settings) -> list:
+    """Record polls of a synthetic crowd and get the snapshots it returned."""
+    backend = RecordingBackend(SyntheticBackend(seed=7, **settings), str(path))
+    snapshots = [backend.get_managed_objects() for _ in range(polls)]
+    backend.close()
+    return snapshots
+
+def test_replay_returns_what_was_recorded(tmp_path):
+    path = tmp_path / 'crowd.cap'
+    snapshots = record(path, population=50, churn=0.2, adapters=('hci0', 'hci1'))
+
+    replay = ReplayBackend(str(path), speed=0)
+    replayed = [replay.get_managed_objects() for _ in snapshots]
+
+    assert replayed == snapshots
+    assert not replay.finished
+
+    # Past the end only the adapters remain
+    assert replay.get_managed_objects() == {'/org/bluez/hci0': {'org.bluez.Adapter1': {}},
+                                            '/org/bluez/hci1': {'org.bluez.Adapter1': {}}}
+    assert replay.finished
+    replay.close()
+
+def test_truncated_capture_ends_at_the_last_whole_frame(tmp_path):
+    path = tmp_path / 'crowd.cap'
+    snapshots = record(path, polls=3, population=20)
+    with gzip.open(path, 'rb') as capture:
+        data = capture.read()
+    with gzip.open(path, 'wb') as capture:
+        capture.write(data[:-10])
+
+    assert [objects for _, objects in read_capture(str(path))] == snapshots[:2]
+
+def configured(**settings):
+    config_manager = ConfigManager()
+    config_manager.update_config(**settings)
+    return config_manager.get_config()
+
+def test_create_backend_records_and_replays(tmp_path):
+    path = str(tmp_path / 'crowd.cap')
+    recorder = create_backend(configured(backend='synthetic', synthetic_devices=30, record_path=path), FakeBus)
+    assert isinstance(recorder, RecordingBackend)
+    snapshots = [recorder.get_managed_objects() for _ in range(3)]
+    recorder.close()
+
+    replay = create_backend(configured(backend='replay', replay_path=path, replay_speed=0), FakeBus)
+    assert [replay.get_managed_objects() for _ in range(3)] == snapshots
+
+    with pytest.raises(ValueError):
+        create_backend(configured(backend='replay'), FakeBus)
+
+def test_scanner_polls_backends_without_signals(make_context, tmp_path):
+    record(tmp_path / 'crowd.cap', population=10)
+    backend = ReplayBackend(str(tmp_path / 'crowd.cap'), speed=0)
+    scanner = BluetoothScanner(make_context(backend=backend, discovery_mode='signals'))
+
+    assert not backend.supports_signals
+    assert not scanner.subscribe_signals()
+    assert scanner._subscriptions == []
+
+def test_scanner_subscribes_through_bluez(make_context):
+    bus = FakeBus()
+    scanner = BluetoothScanner(make_context(bus=bus))
+
+    assert scanner.backend.supports_signals
+    assert scanner.subscribe_signals()
+    assert len(bus.subscriptions) == 3
+    scanner.unsubscribe_signals()
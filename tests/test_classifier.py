@@ -0,0 +1,90 @@
+"""
+Compiled, batch classification against the original rules.
+"""
+import random
+
+import pytest
+
+from bluetooth_scanner.classifier import DeviceClassifier
+
+CORPUS_SIZE = 100000
+
+NAMES = ['iPhone', 'Galaxy S23', 'Pixel 8', 'JBL Flip', 'Tile', 'Mi Band', 'LE-Bose', 'HUAWEI P30', '']
+MANUFACTURERS = ['Apple', 'Samsung', 'Bose', 'Tile Inc', 'Fitbit', 'Google LLC', 'nokia', '']
+# Smartphone, cellular phone, cordless phone, headset, laptop, wearable, BlueZ int, none
+CLASSES = ['0x5a020c', '0x7a0204', '0x200208', '0x240404', '0x3a010c', 0x000704, 5898764, '']
+# Values that carry no Class of Device information: missing, unparseable,
+# miscellaneous (major 0) and uncategorized (major 31)
+UNINFORMATIVE_CLASSES = ['', None, 'unknown', 0, '0x000000', 0x1F00]
+
+def legacy_classify(device_info: dict) -> dict:
+    """The if-chain classify_device used before the rules were compiled."""
+    classification = {'is_mobile': False, 'device_type': 'unknown', 'confidence': 0.0}
+    if device_info.get('device_class', '') in {'0x000500', '0x000504', '0x000508'}:
+        classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.8)
+    manufacturer = (device_info.get('manufacturer') or '').lower()
+    manufacturers = {
+        'Apple', 'Samsung', 'Google', 'Xiaomi', 'Huawei', 'OnePlus', 'Sony', 'LG', 'Motorola', 'Nokia'
+    }
+    if any(m.lower() in manufacturer for m in manufacturers):
+        if not classification['is_mobile']:
+            classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.7)
+        else:
+            classification['confidence'] = 0.9
+    device_name = (device_info.get('device_name') or '').lower()
+    if any(pattern in device_name for pattern in {'iphone', 'samsung', 'galaxy', 'pixel', 'xiaomi', 'huawei'}):
+        if not classification['is_mobile']:
+            classification.update(is_mobile=True, device_type='mobile_phone', confidence=0.6)
+        else:
+            classification['confidence'] = min(1.0, classification['confidence'] + 0.2)
+    return classification
+
+def make_devices(count: int, classes: list, seed: int) -> list:
+    """Build a corpus of synthetic device_info dicts."""
+    rng = random.Random(seed)
+    return [
+        {
+            'mac_address': f"02:00:00:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}",
+            'device_name': f"{rng.choice(NAMES)} {i % 7}".strip(),
+            'manufacturer': rng.choice(MANUFACTURERS),
+            'device_class': rng.choice(classes),
+            'signal_strength': rng.randint(-95, -30)
+        }
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def classifier(make_context):
+    return DeviceClassifier(make_context().logger)
+
+def test_classify_many_matches_classify_device(classifier):
+    corpus = make_devices(CORPUS_SIZE, CLASSES, seed=2)
+
+    results = classifier.classify_many(corpus)
+
+    assert len(results) == CORPUS_SIZE
+    mismatches = [
+        index for index, device in enumerate(corpus) if results[index] != classifier.classify_device(device)
+    ]
+    assert mismatches == []
+    assert 0 < results.mobile_count() < CORPUS_SIZE
+
+def test_matches_legacy_rules_without_class_of_device(classifier):
+    corpus = make_devices(CORPUS_SIZE, UNINFORMATIVE_CLASSES, seed=3)
+
+    for device, result in zip(corpus, classifier.classify_many(corpus)):
+        expected = legacy_classify(device)
+        assert (result['is_mobile'], result['device_type']) == (expected['is_mobile'], expected['device_type'])
+        assert result['confidence'] == pytest.approx(expected['confidence'])
+
+@pytest.mark.parametrize('device_class, manufacturer, expected', [
+    (0x5a020c, '', ('mobile_phone', True, 0.8)),  # smartphone, as BlueZ reports it
+    ('0x7a0204', 'Samsung', ('mobile_phone', True, 0.9)),  # cellular phone from a phone maker
+    ('0x200208', '', ('phone', False, 0.8)),  # cordless phone
+    ('0x240404', 'Apple', ('audio_video', False, 0.8)),  # headset: the vendor doesn't make it a phone
+    ('0x3a010c', 'Apple', ('computer', False, 0.8)),  # laptop
+])
+def test_class_of_device_is_decoded(classifier, device_class, manufacturer, expected):
+    result = classifier.classify_device({'device_class': device_class, 'manufacturer': manufacturer})
+
+    assert (result['device_type'], result['is_mobile'], result['confidence']) == expected
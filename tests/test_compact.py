@@ -0,0 +1,125 @@
+"""
+Converting a standard database to the compact schema, and reading it back.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, event, insert, select
+
+from bluetooth_scanner.export import export_scan_history
+from bluetooth_scanner.storage import CompactScanResult, ScanResult
+
+START = datetime(2026, 1, 5, 9, 0)
+TYPES = ('mobile_phone', 'computer', 'unknown')
+
+def mac(index: int) -> str:
+    return f'AA:BB:CC:DD:00:{index:02X}'
+
+def fill(storage, cycles: int = 10, devices: int = 6) -> None:
+    """Store whole-second cycles of readings, then delete some rows so the ids have gaps."""
+    for cycle in range(cycles):
+        seen_at = (START + timedelta(minutes=cycle) - datetime(1970, 1, 1)).total_seconds()
+        storage.store_cycle([
+            (
+                {'mac_address': mac(index), 'device_name': f"Device {index}", 'signal_strength': -40 - index - cycle,
+                 'last_seen': seen_at, 'adapter': f"hci{index % 2}"},
+                {'device_type': TYPES[index % 3], 'is_mobile': index % 3 == 0}
+            )
+            for index in range(devices)
+        ])
+    with storage.engine.begin() as connection:
+        connection.execute(delete(ScanResult).where(ScanResult.id % 7 == 0))
+
+def scan_ids(storage, model) -> list:
+    with storage.engine.connect() as connection:
+        return connection.execute(select(model.id).order_by(model.id)).scalars().all()
+
+def warnings_of(storage) -> list:
+    messages = []
+    storage.logger.warning = messages.append
+    return messages
+
+def test_conversion_keeps_ids(make_context):
+    storage = make_context().storage
+    fill(storage)
+    ids = scan_ids(storage, ScanResult)
+
+    moved = storage.convert_to_compact(chunk_size=7)
+
+    assert moved == len(ids)
+    assert scan_ids(storage, CompactScanResult) == ids
+    assert scan_ids(storage, ScanResult) == []
+    assert storage.schema_mode == 'compact'
+
+def test_invalid_macs_are_dropped_and_counted(make_context):
+    storage = make_context().storage
+    fill(storage, cycles=2)
+    with storage.engine.begin() as connection:
+        connection.execute(insert(ScanResult), [
+            {'device_mac': bad_mac, 'scan_time': START, 'signal_strength': -50}
+            for bad_mac in ('not-a-mac', 'AA:BB:CC:DD:EE', None)
+        ])
+    valid = len(scan_ids(storage, ScanResult)) - 3
+    messages = warnings_of(storage)
+
+    moved = storage.convert_to_compact(chunk_size=5)
+
+    assert moved == valid
+    assert len(scan_ids(storage, CompactScanResult)) == valid
+    assert "Dropped 3 scan results without a valid MAC address" in messages
+
+def test_interrupted_conversion_resumes(make_context):
+    context = make_context()
+    storage = context.storage
+    fill(storage)
+    ids = scan_ids(storage, ScanResult)
+    compact_inserts = []
+
+    def fail_third_chunk(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO compact_scan_results'):
+            compact_inserts.append(statement)
+            if len(compact_inserts) == 3:
+                raise RuntimeError("power cut")
+
+    event.listen(storage.engine, 'before_cursor_execute', fail_third_chunk)
+    with pytest.raises(RuntimeError, match="power cut"):
+        storage.convert_to_compact(chunk_size=10)
+    event.remove(storage.engine, 'before_cursor_execute', fail_third_chunk)
+
+    # Two chunks moved; the failed one rolled back whole
+    assert scan_ids(storage, CompactScanResult) == ids[:20]
+    assert scan_ids(storage, ScanResult) == ids[20:]
+
+    # A fresh run on the reopened database is still in standard mode and picks up the rest
+    reopened = make_context(db_path=context.config.db_path).storage
+    assert reopened.schema_mode == 'standard'
+    assert reopened.convert_to_compact(chunk_size=10) == len(ids) - 20
+    assert scan_ids(reopened, CompactScanResult) == ids
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'start': START + timedelta(minutes=2), 'end': START + timedelta(minutes=7)},
+    {'mac_addresses': [mac(1), mac(4)]},
+    {'after_id': 25},
+])
+def test_compact_history_matches_standard(make_context, filters):
+    storage = make_context().storage
+    fill(storage)
+    standard = list(storage.iter_scan_history(**filters, batch_size=4))
+    standard_device = storage.get_device_history(mac(2))
+
+    storage.convert_to_compact(chunk_size=9)
+
+    assert standard
+    assert list(storage.iter_scan_history(**filters, batch_size=4)) == standard
+    assert storage.get_device_history(mac(2)) == standard_device
+
+def test_compact_export_matches_standard(make_context, tmp_path):
+    storage = make_context().storage
+    fill(storage)
+    export_scan_history(storage, str(tmp_path / 'standard.csv'))
+
+    storage.convert_to_compact()
+    export_scan_history(storage, str(tmp_path / 'compact.csv'))
+
+    assert (tmp_path / 'compact.csv').read_text() == (tmp_path / 'standard.csv').read_text()
@@ -0,0 +1,35 @@
+"""
+AppContext wiring.
+"""
+import sys
+
+from bluetooth_scanner.backends import BlueZBackend, SyntheticBackend
+from bluetooth_scanner.scanner import BluetoothScanner
+
+from fakes import FakeBus
+
+def test_injected_bus_backs_the_bluez_backend(make_context):
+    bus = FakeBus()
+    context = make_context(bus=bus)
+
+    assert context.bus is bus
+    assert isinstance(context.backend, BlueZBackend)
+    assert context.backend.bus is bus
+    assert 'pydbus' not in sys.modules
+
+def test_scanner_uses_the_context_members(make_context):
+    bus = FakeBus(adapters=['hci0', 'hci1'])
+    context = make_context(bus=bus)
+    scanner = BluetoothScanner(context)
+
+    assert scanner.initialize()
+    assert scanner.adapters == ['hci0', 'hci1']
+    assert ('GetManagedObjects', '/') in bus.calls
+    assert scanner.storage is context.storage
+    assert scanner.logger is context.logger
+
+def test_storage_opens_once_and_lazily(make_context):
+    context = make_context(backend=SyntheticBackend(population=0))
+
+    assert context._storage is None
+    assert context.storage is context.storage
@@ -0,0 +1,83 @@
+"""
+The live feed between a publisher and a subscriber over a Unix socket.
+"""
+import time
+
+import pytest
+
+from bluetooth_scanner.feed import FeedPublisher, FeedSubscriber
+
+PHONE = 'AA:BB:CC:DD:EE:01'
+LAPTOP = 'AA:BB:CC:DD:EE:02'
+
+def reading(mac_address: str, rssi: int, seen: float, **extra) -> tuple:
+    return (
+        {'mac_address': mac_address, 'signal_strength': rssi, 'last_seen': seen, **extra},
+        {'device_type': 'mobile_phone', 'is_mobile': True}
+    )
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+@pytest.fixture
+def feed(make_context, tmp_path):
+    logger = make_context().logger
+    path = str(tmp_path / 'feed.sock')
+    publisher = FeedPublisher(path, logger, timeout=60.0)
+    subscriber = FeedSubscriber(path, logger, timeout=60.0)
+    subscriber.RETRY_INTERVAL = 0.05
+    publisher.start()
+    yield publisher, subscriber
+    subscriber.stop()
+    publisher.stop()
+
+def test_subscriber_follows_snapshot_and_deltas(feed):
+    publisher, subscriber = feed
+    now = time.time()
+    publisher.publish([reading(PHONE, -60, now, device_name='Pixel 8')], now)
+
+    subscriber.start()
+    wait_until(lambda: publisher.subscriber_count == 1 and subscriber.version == 1)
+    assert subscriber.devices[PHONE]['device_name'] == 'Pixel 8'
+
+    delta = publisher.publish([reading(PHONE, -70, now + 1), reading(LAPTOP, -80, now + 1)], now + 1)
+    assert [device['mac_address'] for device in delta['added']] == [LAPTOP]
+    assert [device['mac_address'] for device in delta['changed']] == [PHONE]
+    wait_until(lambda: subscriber.version == 2)
+    # A sighting without a name keeps the known one
+    assert subscriber.devices[PHONE]['signal_strength'] == -70
+    assert subscriber.devices[PHONE]['device_name'] == 'Pixel 8'
+
+    # The phone goes unseen past the timeout
+    delta = publisher.publish([reading(LAPTOP, -80, now + 61)], now + 61.5)
+    assert delta['removed'] == [PHONE]
+    wait_until(lambda: subscriber.version == 3)
+    assert list(subscriber.devices) == [LAPTOP]
+
+def test_subscriber_resyncs_after_the_publisher_restarts(feed):
+    publisher, subscriber = feed
+    subscriber.start()
+    wait_until(lambda: subscriber.connected)
+
+    publisher.stop()
+    wait_until(lambda: not subscriber.connected)
+    now = time.time()
+    publisher.publish([reading(PHONE, -60, now)], now)
+    publisher.start()
+
+    wait_until(lambda: PHONE in subscriber.devices)
+    assert publisher.subscriber_count == 1
+
+def test_empty_cycles_send_nothing(feed):
+    publisher, subscriber = feed
+    subscriber.start()
+    wait_until(lambda: subscriber.version == 1)
+
+    publisher.publish([], time.time())
+    publisher.publish([reading(PHONE, -60, time.time())])
+
+    wait_until(lambda: PHONE in subscriber.devices)
+    assert subscriber.version == 2
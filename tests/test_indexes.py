@@ -0,0 +1,78 @@
+"""
+The hot queries are planned on their indexes, not on table scans.
+"""
+import re
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from bluetooth_scanner.storage import StorageManager
+from bluetooth_scanner.visualizer import BluetoothVisualizer
+
+def fill(storage: StorageManager, devices: int = 50, cycles: int = 20) -> None:
+    """Store cycles of readings from a small crowd, the older half past retention."""
+    now = time.time()
+    for cycle in range(cycles):
+        seen_at = now - (cycles - cycle) * 86400 * 3
+        storage.store_cycle([
+            (
+                {'mac_address': f'AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}',
+                 'signal_strength': -60, 'last_seen': seen_at},
+                {'device_type': 'mobile_phone', 'is_mobile': index % 2 == 0}
+            )
+            for index in range(devices)
+        ])
+
+@contextmanager
+def captured(storage: StorageManager):
+    """Collect the (statement, parameters) pairs the storage engine executes."""
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(storage.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(storage.engine, 'before_cursor_execute', capture)
+
+def plan(storage: StorageManager, statements, pattern: str) -> str:
+    """EXPLAIN QUERY PLAN of the first captured statement matching pattern."""
+    for statement, parameters in statements:
+        if re.search(pattern, statement, re.S):
+            with storage.engine.connect() as connection:
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            return '\n'.join(row[-1] for row in rows)
+    raise AssertionError(f"No statement matched {pattern!r}")
+
+def test_device_history_uses_mac_and_time_index(make_context):
+    storage = make_context().storage
+    fill(storage)
+    with captured(storage) as statements:
+        assert storage.get_device_history('AA:BB:CC:DD:00:01')
+
+    query_plan = plan(storage, statements, r'FROM scan_results\s+WHERE scan_results\.device_mac = ')
+    assert 'ix_scan_results_device_mac_scan_time' in query_plan
+
+def test_latest_per_device_uses_device_state_index(make_context):
+    context = make_context()
+    fill(context.storage)
+    with captured(context.storage) as statements:
+        BluetoothVisualizer(context).get_recent_devices(7 * 86400)
+
+    query_plan = plan(context.storage, statements, r'FROM devices JOIN device_state .*device_state\.scan_time >= ')
+    assert 'ix_device_state_scan_time' in query_plan
+    assert 'SCAN device_state' not in query_plan
+
+def test_retention_delete_uses_time_index(make_context):
+    storage = make_context(retention_days=30).storage
+    fill(storage)
+    with captured(storage) as statements:
+        stats = storage.cleanup_old_data()
+
+    assert stats['scan_results'] > 0
+    query_plan = plan(storage, statements, r'SELECT scan_results\.id\s+FROM scan_results\s+WHERE scan_results\.scan_time < ')
+    assert 'ix_scan_results_scan_time' in query_plan
@@ -0,0 +1,45 @@
+"""
+The shared logger: handler replacement and shutdown.
+"""
+import atexit
+import logging
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.logger import Logger
+
+def make_logger(tmp_path, **settings) -> Logger:
+    config_manager = ConfigManager()
+    config_manager.update_config(log_file=str(tmp_path / 'scanner.log'), log_level="INFO", **settings)
+    return Logger(config_manager)
+
+def test_new_logger_replaces_the_previous_one(tmp_path):
+    first = make_logger(tmp_path)
+    second = make_logger(tmp_path)
+
+    assert Logger._active is second
+    assert first._listener is None
+    assert logging.getLogger("bluetooth_scanner").handlers == second._handlers
+    second.close()
+    assert Logger._active is None
+    assert logging.getLogger("bluetooth_scanner").handlers == []
+
+def test_loggers_do_not_register_exit_hooks(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+
+    for _ in range(3):
+        make_logger(tmp_path, log_async=True)
+
+    assert registered == []
+    Logger._active.close()
+
+def test_exit_hook_writes_out_queued_records(tmp_path):
+    logger = make_logger(tmp_path, log_async=True)
+    for index in range(100):
+        logger.info("record %d", index)
+
+    Logger._close_active()
+
+    assert Logger._active is None
+    lines = (tmp_path / 'scanner.log').read_text().splitlines()
+    assert len(lines) == 100 and lines[-1].endswith("record 99")
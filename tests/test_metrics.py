@@ -0,0 +1,70 @@
+"""
+Metric families, the Prometheus exposition and the disabled registry.
+"""
+import pytest
+
+from bluetooth_scanner.config import ConfigManager
+from bluetooth_scanner.metrics import NULL_METRIC, MetricsExporter, MetricsRegistry
+
+def test_render_prometheus_exposition_format():
+    registry = MetricsRegistry()
+    registry.counter('scans_total', 'Completed scan cycles').inc(3)
+    stage = registry.histogram('stage_seconds', 'Stage time', ('stage',), buckets=(0.01, 0.1))
+    stage.labels('store').observe(0.005)
+    stage.labels('store').observe(0.05)
+    stage.labels('store').observe(2.0)
+    registry.gauge('queue_depth', 'Queued records').set_function(lambda: 7)
+
+    assert registry.render_prometheus() == (
+        '# HELP scans_total Completed scan cycles\n'
+        '# TYPE scans_total counter\n'
+        'scans_total 3.0\n'
+        '# HELP stage_seconds Stage time\n'
+        '# TYPE stage_seconds histogram\n'
+        'stage_seconds_bucket{stage="store",le="0.01"} 1\n'
+        'stage_seconds_bucket{stage="store",le="0.1"} 2\n'
+        'stage_seconds_bucket{stage="store",le="+Inf"} 3\n'
+        'stage_seconds_sum{stage="store"} 2.055\n'
+        'stage_seconds_count{stage="store"} 3\n'
+        '# HELP queue_depth Queued records\n'
+        '# TYPE queue_depth gauge\n'
+        'queue_depth 7\n'
+    )
+
+def test_same_name_returns_the_same_metric():
+    registry = MetricsRegistry()
+
+    assert registry.counter('scans_total', 'Scans') is registry.counter('scans_total', 'Scans')
+
+def test_failing_gauge_function_reports_nan():
+    registry = MetricsRegistry()
+    registry.gauge('broken', 'Raises').set_function(lambda: 1 / 0)
+
+    assert registry.render_prometheus().splitlines()[-1] == 'broken nan'
+
+def test_disabled_registry_hands_out_no_op_metrics():
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter('scans_total', 'Scans', ('adapter',))
+    histogram = registry.histogram('stage_seconds', 'Stage time')
+    gauge = registry.gauge('queue_depth', 'Queued records')
+
+    assert counter is histogram is gauge is NULL_METRIC
+    counter.labels('hci0').inc()
+    histogram.observe(1.0)
+    with histogram.time():
+        pass
+    gauge.set(3)
+    gauge.set_function(lambda: pytest.fail("a disabled gauge is never read"))
+
+    assert registry.render_prometheus() == '\n'
+    assert registry.summary() == ''
+
+def test_disabled_exporter_starts_nothing(make_context):
+    config_manager = ConfigManager()
+    config_manager.update_config(metrics_port=9, metrics_log_interval=0.01)
+    exporter = MetricsExporter(MetricsRegistry(enabled=False), config_manager, make_context().logger)
+
+    exporter.start()
+
+    assert exporter._server is None and exporter._reporter is None
+    exporter.stop()
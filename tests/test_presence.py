@@ -0,0 +1,98 @@
+"""
+Presence hysteresis, expiry and the window limit.
+"""
+import pytest
+
+from bluetooth_scanner.backends import SyntheticBackend
+from bluetooth_scanner.presence import MAX_WINDOW, PresenceEngine
+from bluetooth_scanner.scanner import BluetoothScanner
+
+MAC = 'AA:BB:CC:DD:EE:01'
+
+def feed(engine: PresenceEngine, rssi_values, start: float = 1000.0, mac_address: str = MAC) -> list:
+    """Feed one reading per second and collect the events as (time, event)."""
+    events = []
+    for offset, rssi in enumerate(rssi_values):
+        now = start + offset
+        transitions, _ = engine.update(
+            [{'mac_address': mac_address, 'signal_strength': rssi, 'last_seen': now}], now
+        )
+        events += [(event['event_time'] - start, event['event']) for event in transitions]
+    return events
+
+def test_arrives_after_confirm_samples_above_enter():
+    engine = PresenceEngine(alpha=1.0, enter_rssi=-75, exit_rssi=-85, confirm_samples=3)
+
+    assert feed(engine, [-70, -70, -90, -70, -70, -70]) == [(5, 'arrived')]
+    assert engine.is_present(MAC)
+
+def test_hovering_between_thresholds_does_not_flip():
+    engine = PresenceEngine(alpha=1.0, enter_rssi=-75, exit_rssi=-85, confirm_samples=2)
+    assert feed(engine, [-70, -70]) == [(1, 'arrived')]
+
+    # Below the enter threshold but above the exit threshold: still present
+    assert feed(engine, [-80, -84, -80, -84], start=1002.0) == []
+    assert engine.is_present(MAC)
+
+    assert feed(engine, [-90, -90], start=1006.0) == [(1, 'left')]
+    assert not engine.is_present(MAC)
+
+def test_smoothing_rides_out_a_single_dip():
+    engine = PresenceEngine(alpha=0.3, enter_rssi=-75, exit_rssi=-85, confirm_samples=2)
+    feed(engine, [-60] * 5)
+
+    assert feed(engine, [-100, -60, -60], start=1005.0) == []
+    assert engine.smoothed_rssi(MAC) == pytest.approx(-65.88, abs=0.01)
+
+def test_unseen_device_leaves_and_its_slot_is_reused():
+    engine = PresenceEngine(alpha=1.0, confirm_samples=1, timeout=120.0, sample_interval=1000.0)
+    feed(engine, [-60])
+    assert engine.is_present(MAC)
+
+    events, _ = engine.update([{'mac_address': 'AA:BB:CC:DD:EE:02', 'signal_strength': -90}], 1121.0)
+
+    assert [(event['device_mac'], event['event'], event['event_time']) for event in events] == [
+        (MAC, 'left', 1121.0)
+    ]
+    assert not engine.is_present(MAC)
+    assert len(engine) == 1
+    # The freed slot starts clean for the next new device
+    memory = engine.memory_bytes()
+    feed(engine, [-90], start=1122.0, mac_address='AA:BB:CC:DD:EE:03')
+    assert engine.memory_bytes() == memory
+    assert not engine.is_present('AA:BB:CC:DD:EE:03')
+    assert engine.rssi_variance('AA:BB:CC:DD:EE:03') == 0.0
+
+def test_samples_present_devices_each_interval():
+    engine = PresenceEngine(alpha=1.0, confirm_samples=1, sample_interval=60.0)
+    feed(engine, [-60])
+
+    _, samples = engine.update([], 1030.0)
+    assert samples == []
+    _, samples = engine.update([], 1061.0)
+    assert samples == [{'device_mac': MAC, 'sample_time': 1061.0, 'rssi': -60}]
+
+def test_readings_without_rssi_are_ignored():
+    engine = PresenceEngine()
+
+    engine.update([{'mac_address': MAC, 'signal_strength': 0}, {'signal_strength': -60}], 1000.0)
+
+    assert len(engine) == 0
+
+@pytest.mark.parametrize('window', [1, 16, MAX_WINDOW])
+def test_window_wraps_without_overflow(window):
+    engine = PresenceEngine(window=window)
+
+    feed(engine, [-60 - index % 7 for index in range(2 * window + 3)])
+
+    assert engine.rssi_variance(MAC) is not None
+
+@pytest.mark.parametrize('window', [0, MAX_WINDOW + 1, 1000])
+def test_window_out_of_range_is_rejected(window):
+    with pytest.raises(ValueError):
+        PresenceEngine(window=window)
+
+def test_scanner_clamps_configured_window(make_context):
+    scanner = BluetoothScanner(make_context(backend=SyntheticBackend(population=0), presence_window=1000))
+
+    assert scanner.presence.window == MAX_WINDOW
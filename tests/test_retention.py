@@ -0,0 +1,152 @@
+"""
+Chunked retention deletes and handing freed space back to the OS.
+"""
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event
+
+from bluetooth_scanner.storage import AdvertIndex, Device, DeviceState, ScanResult
+
+DAY = 86400
+OLD, RECENT = 40, 1  # days ago, either side of the 30-day retention
+
+def mac(index: int) -> str:
+    return f'AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}'
+
+def store(storage, devices, days_ago: float, adverts: bool = False) -> None:
+    """Store one cycle of readings seen days_ago."""
+    seen_at = time.time() - days_ago * DAY
+    storage.store_cycle([
+        (
+            {'mac_address': mac(index), 'signal_strength': -60, 'last_seen': seen_at,
+             **({'adverts': {'ManufacturerData': {0x004C: bytes((index % 256,))}}} if adverts else {})},
+            {'device_type': 'mobile_phone', 'is_mobile': True}
+        )
+        for index in devices
+    ])
+
+def count(storage, model) -> int:
+    session = storage.Session()
+    try:
+        return session.query(model).count()
+    finally:
+        session.close()
+
+def scan_result_deletes(storage):
+    """Collect the DELETE statements retention runs against scan_results."""
+    deletes = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('DELETE FROM scan_results'):
+            deletes.append(statement)
+
+    event.listen(storage.engine, 'before_cursor_execute', capture)
+    return deletes
+
+def legacy_database(path) -> str:
+    """Create a WAL database file the way older versions did, without auto_vacuum."""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE legacy (payload BLOB)")
+    connection.executemany("INSERT INTO legacy VALUES (?)", [(b'x' * 1000,)] * 200)
+    connection.commit()
+    assert connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    connection.close()
+    return str(path)
+
+def test_existing_database_is_rebuilt_for_incremental_vacuum(make_context, tmp_path):
+    db_path = legacy_database(tmp_path / 'legacy.db')
+
+    storage = make_context(db_path=db_path).storage
+
+    with storage.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM legacy").scalar() == 200
+
+def test_retention_frees_space_on_a_converted_database(make_context, tmp_path):
+    db_path = legacy_database(tmp_path / 'legacy.db')
+    storage = make_context(db_path=db_path, retention_days=30).storage
+    store(storage, range(2000), OLD)
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['scan_results'] == 2000
+    assert stats['bytes_freed'] > 0
+    with storage.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA freelist_count").scalar() == 0
+
+def test_deletes_run_in_chunks(make_context):
+    storage = make_context(retention_days=30, retention_chunk_size=7).storage
+    store(storage, range(30), OLD)
+    store(storage, range(30, 35), RECENT)
+    deletes = scan_result_deletes(storage)
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['scan_results'] == 30
+    assert len(deletes) == 5  # four full chunks and the remaining two rows
+    assert count(storage, ScanResult) == 5
+
+def test_deletes_cascade_to_the_advert_index(make_context):
+    storage = make_context(retention_days=30, retention_chunk_size=4).storage
+    store(storage, range(10), OLD, adverts=True)
+    store(storage, range(10, 13), RECENT, adverts=True)
+    assert count(storage, AdvertIndex) == 13
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['adverts'] == 10
+    session = storage.Session()
+    try:
+        remaining = {row.scan_result_id for row in session.query(AdvertIndex)}
+        kept = {row.id for row in session.query(ScanResult)}
+    finally:
+        session.close()
+    assert remaining == kept
+    assert len(storage.get_adverts(sorted(kept))) == 3
+
+def test_stale_devices_are_pruned(make_context):
+    storage = make_context(retention_days=30, retention_chunk_size=3).storage
+    store(storage, range(8), OLD)
+    store(storage, range(8, 10), RECENT)
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['devices'] == 8
+    session = storage.Session()
+    try:
+        assert sorted(device.mac_address for device in session.query(Device)) == [mac(8), mac(9)]
+        assert sorted(state.mac_address for state in session.query(DeviceState)) == [mac(8), mac(9)]
+    finally:
+        session.close()
+
+def test_device_pruning_can_be_disabled(make_context):
+    storage = make_context(retention_days=30, retention_prune_devices=False).storage
+    store(storage, range(8), OLD)
+
+    stats = storage.cleanup_old_data()
+
+    assert stats['devices'] == 0
+    assert count(storage, Device) == 8
+
+def test_stop_ends_the_pass_between_chunks(make_context):
+    storage = make_context(retention_days=30, retention_chunk_size=5).storage
+    store(storage, range(20), OLD)
+    stop = threading.Event()
+
+    def stop_after_first_chunk(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('DELETE FROM scan_results'):
+            stop.set()
+
+    event.listen(storage.engine, 'after_cursor_execute', stop_after_first_chunk)
+    stats = storage.cleanup_old_data(stop)
+
+    assert stats['scan_results'] == 5
+    assert stats['devices'] == 0
+    assert count(storage, ScanResult) == 15
+
+    # The next run picks up the rest
+    event.remove(storage.engine, 'after_cursor_execute', stop_after_first_chunk)
+    assert storage.cleanup_old_data()['scan_results'] == 15
@@ -0,0 +1,122 @@
+"""
+Occupancy rollups: folding readings into buckets, late readings and the backfill tool.
+"""
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from bluetooth_scanner import rollups
+from bluetooth_scanner.context import AppContext
+from bluetooth_scanner.storage import OccupancyRollup, RollupMember, StorageManager, bucket_start
+
+START = datetime(2026, 1, 5, 9, 0)
+
+def epoch(timestamp: datetime) -> float:
+    return (timestamp - datetime(1970, 1, 1)).total_seconds()
+
+def readings(seen_at: datetime, macs, rssi: int = -60, mobile=()):
+    """One cycle of (device_info, classification) pairs, all seen at seen_at."""
+    return [
+        (
+            {'mac_address': mac_address, 'signal_strength': rssi, 'last_seen': epoch(seen_at)},
+            {'device_type': 'mobile_phone', 'is_mobile': mac_address in mobile}
+        )
+        for mac_address in macs
+    ]
+
+def mac(index: int) -> str:
+    return f'AA:BB:CC:DD:00:{index:02X}'
+
+def bucket(storage: StorageManager, granularity: str, seen_at: datetime):
+    """The occupancy row of the bucket holding seen_at."""
+    start = bucket_start(seen_at, granularity)
+    rows = storage.get_occupancy(start, start + timedelta(days=1), granularity)
+    return next(row for row in rows if row['bucket_start'] == start)
+
+def test_buckets_count_distinct_devices_and_rssi(make_context):
+    storage = make_context().storage
+    storage.store_cycle(readings(START, [mac(0), mac(1)], rssi=-50, mobile={mac(0)}))
+    storage.store_cycle(readings(START + timedelta(seconds=20), [mac(0), mac(1), mac(2)], rssi=-70))
+
+    for granularity in ('minute', 'hour', 'day'):
+        row = bucket(storage, granularity, START)
+        assert (row['devices'], row['mobile_devices']) == (3, 1)
+        assert (row['rssi_min'], row['rssi_max']) == (-70, -50)
+        assert row['rssi_avg'] == pytest.approx((2 * -50 + 3 * -70) / 5)
+
+def test_closed_bucket_members_are_pruned(make_context):
+    storage = make_context().storage
+    storage.store_cycle(readings(START, [mac(0), mac(1)]))
+    storage.store_cycle(readings(START + timedelta(minutes=5), [mac(0)]))
+
+    session = storage.Session()
+    try:
+        minute_members = session.query(RollupMember).filter(
+            RollupMember.granularity == 'minute', RollupMember.bucket_start == START
+        ).count()
+        hour_members = session.query(RollupMember).filter(
+            RollupMember.granularity == 'hour', RollupMember.bucket_start == START
+        ).count()
+    finally:
+        session.close()
+    assert minute_members == 0
+    assert hour_members == 2
+
+def test_late_reading_for_closed_bucket_keeps_its_count(make_context):
+    storage = make_context().storage
+    storage.store_cycle(readings(START, [mac(0), mac(1), mac(2)], mobile={mac(0), mac(1)}))
+    # Five minutes on, the 09:00 minute bucket is closed and its members pruned
+    storage.store_cycle(readings(START + timedelta(minutes=5), [mac(0)]))
+
+    # A reading from 09:00 arrives late through the write queue
+    storage.store_cycle(readings(START + timedelta(seconds=30), [mac(3)]))
+
+    row = bucket(storage, 'minute', START)
+    assert (row['devices'], row['mobile_devices']) == (3, 2)
+    # Samples still add up, and the still-open hour counts the new device
+    session = storage.Session()
+    try:
+        samples = session.query(OccupancyRollup.sample_count).filter(
+            OccupancyRollup.granularity == 'minute', OccupancyRollup.bucket_start == START
+        ).scalar()
+    finally:
+        session.close()
+    assert samples == 4
+    assert bucket(storage, 'hour', START)['devices'] == 4
+
+@pytest.mark.parametrize('start, end, expected', [
+    (START, START + timedelta(minutes=30), 'minute'),
+    (START, START + timedelta(hours=3), 'hour'),
+    (START.replace(hour=0), START.replace(hour=0) + timedelta(days=7), 'day'),
+    (START, START + timedelta(days=2), 'hour'),  # not on day boundaries
+    (START + timedelta(seconds=30), START + timedelta(hours=2), 'minute'),  # not on any boundary
+    (START, START + timedelta(seconds=30), 'minute'),  # shorter than a bucket
+])
+def test_choose_granularity(start, end, expected):
+    assert StorageManager.choose_granularity(start, end) == expected
+
+def test_backfill_command_rebuilds_rollups(make_context, tmp_path, monkeypatch):
+    context = make_context(db_path=str(tmp_path / 'backfill.db'))
+    storage = context.storage
+    for minute in range(3):
+        storage.store_cycle(readings(START + timedelta(minutes=minute), [mac(0), mac(minute + 1)], mobile={mac(0)}))
+    expected = storage.get_occupancy(START, START + timedelta(hours=1), 'minute')
+    session = storage.Session()
+    try:
+        session.query(OccupancyRollup).delete()
+        session.commit()
+    finally:
+        session.close()
+    context.close()
+
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'backfill.db'))
+    monkeypatch.setenv('LOG_FILE', str(tmp_path / 'rollups.log'))
+    monkeypatch.setenv('LOG_ASYNC', 'false')
+    monkeypatch.setattr(AppContext, '_default', None)
+    monkeypatch.setattr(sys, 'argv', ['bluetooth-rollups', 'backfill', '--chunk-size', '2'])
+    rollups.main()
+
+    rebuilt = make_context(db_path=str(tmp_path / 'backfill.db')).storage
+    assert rebuilt.get_occupancy(START, START + timedelta(hours=1), 'minute') == expected
+    assert bucket(rebuilt, 'hour', START)['devices'] == 4
@@ -0,0 +1,85 @@
+"""
+Discovery duty cycles of the polling scanners.
+"""
+import threading
+
+from bluetooth_scanner.backends import DEVICE_INTERFACE, SyntheticBackend
+from bluetooth_scanner.metrics import MetricsRegistry
+from bluetooth_scanner.scanner import BluetoothScanner
+from bluetooth_scanner.scheduler import AdaptiveSchedule
+
+class DiscoveringBackend(SyntheticBackend):
+    """Synthetic crowd that, like BlueZ, drops RSSI once discovery stops and counts windows per adapter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.discovering = set()
+        self.windows = {adapter: 0 for adapter in self.adapters}
+        self.on_stop = None
+
+    def start_discovery(self, adapter: str) -> None:
+        self.discovering.add(adapter)
+        self.windows[adapter] += 1
+
+    def stop_discovery(self, adapter: str) -> None:
+        self.discovering.discard(adapter)
+        if self.on_stop is not None:
+            self.on_stop()
+
+    def get_managed_objects(self):
+        objects = super().get_managed_objects()
+        for interfaces in objects.values():
+            properties = interfaces.get(DEVICE_INTERFACE)
+            if properties and properties['Adapter'].rsplit('/', 1)[-1] not in self.discovering:
+                del properties['RSSI']
+        return objects
+
+def decisions(metrics: MetricsRegistry) -> float:
+    counter = metrics.counter('bluetooth_scanner_schedule_decisions_total', '', ('reason',))
+    return sum(child.value for _, child in counter.children())
+
+def test_polling_reads_rssi_before_stopping_discovery(make_context):
+    backend = DiscoveringBackend(population=20, churn=0.0, seed=1)
+    scanner = BluetoothScanner(make_context(
+        backend=backend, scan_duration=0, scan_interval=0, min_signal_strength=-127
+    ))
+    assert scanner.initialize()
+    backend.on_stop = scanner.stop_scanning
+    scanner.scanning = True
+
+    scanner._run_polling_discovery()
+
+    history = [
+        row for mac_address in backend._devices for row in scanner.storage.get_device_history(mac_address)
+    ]
+    assert len(history) == 20
+    assert all(row['signal_strength'] for row in history)
+
+def test_current_cycle_repeats_the_last_decision():
+    metrics = MetricsRegistry(enabled=True)
+    schedule = AdaptiveSchedule(2.0, 6.0, 1.0, 20.0, 0.25, metrics)
+
+    cycle = schedule.next_cycle()
+    assert schedule.current_cycle() == cycle
+    assert schedule.current_cycle() == cycle
+    assert decisions(metrics) == 1
+
+def test_multi_adapter_counts_one_decision_per_cycle(make_context):
+    backend = DiscoveringBackend(population=20, churn=0.0, adapters=('hci0', 'hci1', 'hci2', 'hci3'), seed=1)
+    context = make_context(
+        backend=backend, metrics_enabled=True, adaptive_schedule=True, merge_window=0.05,
+        scan_duration_min=0.02, scan_duration_max=0.02, scan_interval_min=0.01, scan_interval_max=0.01
+    )
+    scanner = BluetoothScanner(context)
+    assert scanner.initialize()
+    scanner.scanning = True
+    runner = threading.Thread(target=scanner._run_polling_discovery)
+    runner.start()
+    threading.Event().wait(0.5)
+    scanner.stop_scanning()
+    runner.join(timeout=10)
+
+    lead = backend.windows['hci0']
+    assert lead > 1
+    assert lead <= decisions(context.metrics) <= lead + 1
+    assert all(backend.windows[adapter] > 1 for adapter in ('hci1', 'hci2', 'hci3'))
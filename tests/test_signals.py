@@ -0,0 +1,96 @@
+"""
+Signal-driven discovery against a fake BlueZ bus.
+"""
+import pytest
+
+from bluetooth_scanner.backends import DEVICE_INTERFACE, PROPERTIES_INTERFACE
+from bluetooth_scanner.scanner import BluetoothScanner
+
+from fakes import FakeBus
+
+PHONE = 'AA:BB:CC:DD:EE:01'
+
+@pytest.fixture
+def bus():
+    return FakeBus()
+
+@pytest.fixture
+def scanner(make_context, bus):
+    scanner = BluetoothScanner(make_context(bus=bus, suppress_unchanged=False, min_signal_strength=-100))
+    assert scanner.initialize()
+    assert scanner.subscribe_signals()
+    scanner.scanning = True
+    yield scanner
+    scanner.unsubscribe_signals()
+
+def stored(scanner, mac_address: str = PHONE) -> list:
+    """Store what the handlers buffered and get the device's rows, newest first."""
+    scanner._flush_signal_batch()
+    return scanner.storage.get_device_history(mac_address)
+
+def test_subscribes_to_bluez_signals(scanner, bus):
+    subscribed = {(entry['iface'], entry['signal'], entry['arg0']) for entry in bus.subscriptions}
+    assert subscribed == {
+        ('org.freedesktop.DBus.ObjectManager', 'InterfacesAdded', None),
+        ('org.freedesktop.DBus.ObjectManager', 'InterfacesRemoved', None),
+        (PROPERTIES_INTERFACE, 'PropertiesChanged', DEVICE_INTERFACE),
+    }
+
+    scanner.unsubscribe_signals()
+    assert bus.subscriptions == []
+
+def test_interfaces_added_stores_a_reading(scanner, bus):
+    path = bus.add_device('hci0', PHONE, RSSI=-52, Name='Pixel 8', Class=0x5a020c)
+
+    assert scanner.known_devices[path]['Name'] == 'Pixel 8'
+    rows = stored(scanner)
+    assert [(row['signal_strength'], row['device_type'], row['is_mobile']) for row in rows] == [
+        (-52, 'mobile_phone', True)
+    ]
+
+def test_properties_changed_stores_tracked_changes_only(scanner, bus):
+    path = bus.add_device('hci0', PHONE, RSSI=-52, Name='Pixel 8')
+    bus.change_device(path, RSSI=-70)
+    bus.change_device(path, Connected=False)
+    bus.change_device(path, Name='Pixel 8 Pro')
+
+    rows = stored(scanner)
+    assert len(rows) == 3
+    assert scanner.known_devices[path]['RSSI'] == -70
+    assert scanner.known_devices[path]['Name'] == 'Pixel 8 Pro'
+    assert scanner.storage.get_device_counts() == (1, 1)
+
+def test_properties_changed_drops_invalidated_properties(scanner, bus):
+    path = bus.add_device('hci0', PHONE, RSSI=-52, Name='Pixel 8')
+    bus.change_device(path, invalidated=['RSSI'], Name='Pixel')
+
+    assert 'RSSI' not in scanner.known_devices[path]
+
+def test_properties_changed_on_other_interfaces_is_ignored(scanner, bus):
+    path = bus.add_device('hci0', PHONE, RSSI=-52)
+    scanner._on_properties_changed(
+        'org.bluez', path, PROPERTIES_INTERFACE, 'PropertiesChanged',
+        ('org.bluez.MediaControl1', {'RSSI': -40}, [])
+    )
+
+    assert scanner.known_devices[path]['RSSI'] == -52
+    assert len(stored(scanner)) == 1
+
+def test_interfaces_removed_forgets_the_device(scanner, bus):
+    path = bus.add_device('hci0', PHONE, RSSI=-52)
+    bus.remove_device(path)
+
+    assert path not in scanner.known_devices
+    # The reading taken while it was around is still stored
+    assert len(stored(scanner)) == 1
+
+def test_devices_known_before_subscribing_are_processed(make_context, bus):
+    # Nobody is subscribed yet, so this InterfacesAdded goes unheard
+    bus.add_device('hci0', PHONE, RSSI=-60)
+    scanner = BluetoothScanner(make_context(bus=bus))
+    assert scanner.initialize()
+
+    for path, properties in scanner._get_device_snapshot().items():
+        scanner._handle_device_update(path, properties)
+
+    assert [row['signal_strength'] for row in stored(scanner)] == [-60]
@@ -0,0 +1,86 @@
+"""
+Unchanged-reading suppression only skips scan_results rows.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from bluetooth_scanner.backends import SyntheticBackend
+from bluetooth_scanner.scanner import BluetoothScanner
+from bluetooth_scanner.storage import DeviceState
+
+START = datetime(2026, 1, 5, 9, 0)
+MACS = ('AA:BB:CC:00:00:01', 'AA:BB:CC:00:00:02', 'AA:BB:CC:00:00:03')
+
+def cycles(count: int = 10, spacing: float = 20.0):
+    """Batches of the same three stationary devices, spacing seconds apart, with RSSI jitter under the delta."""
+    for cycle in range(count):
+        seen_at = (START + timedelta(seconds=cycle * spacing) - datetime(1970, 1, 1)).total_seconds()
+        yield [
+            (
+                {'mac_address': mac_address, 'device_name': f"Phone {index}", 'device_class': '0x5a020c',
+                 'manufacturer': '', 'signal_strength': -60 - index - cycle % 3, 'last_seen': seen_at,
+                 'adapter': 'hci0'},
+                {'device_type': 'mobile_phone', 'is_mobile': index != 2, 'confidence': 0.9}
+            )
+            for index, mac_address in enumerate(MACS)
+        ]
+
+def run(make_context, suppress: bool) -> BluetoothScanner:
+    scanner = BluetoothScanner(make_context(backend=SyntheticBackend(population=0), suppress_unchanged=suppress))
+    for batch in cycles():
+        scanner._submit(batch)
+    return scanner
+
+def device_states(storage):
+    session = storage.Session()
+    try:
+        return {
+            state.mac_address: (state.scan_time, state.signal_strength, state.is_mobile)
+            for state in session.query(DeviceState)
+        }
+    finally:
+        session.close()
+
+@pytest.mark.parametrize('granularity', ['minute', 'hour', 'day'])
+def test_rollups_match_with_suppression_on_and_off(make_context, granularity):
+    suppressed = run(make_context, True).storage
+    unsuppressed = run(make_context, False).storage
+    end = START + timedelta(days=1)
+
+    occupancy = suppressed.get_occupancy(START, end, granularity)
+    assert occupancy
+    assert occupancy == unsuppressed.get_occupancy(START, end, granularity)
+
+def test_suppression_still_updates_device_state(make_context):
+    suppressed = run(make_context, True).storage
+    unsuppressed = run(make_context, False).storage
+
+    assert device_states(suppressed) == device_states(unsuppressed)
+    assert suppressed.get_device_counts() == (3, 2)
+
+def test_suppression_skips_unchanged_scan_results(make_context):
+    suppressed = run(make_context, True).storage
+    unsuppressed = run(make_context, False).storage
+
+    assert len(suppressed.get_device_history(MACS[0])) == 1
+    assert len(unsuppressed.get_device_history(MACS[0])) == 10
+
+def test_feed_keeps_suppressed_devices_past_its_timeout(make_context, tmp_path):
+    context = make_context(
+        backend=SyntheticBackend(population=0), feed_enabled=True, feed_timeout=30.0,
+        feed_socket=str(tmp_path / 'feed.sock'), suppress_heartbeat=300
+    )
+    scanner = BluetoothScanner(context)
+    # Ten readings over the last 200 seconds, all but the first suppressed
+    started = time.time() - 200
+    for cycle, batch in enumerate(cycles()):
+        for device_info, _ in batch:
+            device_info['last_seen'] = started + cycle * 20
+        scanner._submit(batch)
+
+    assert sorted(scanner.feed.devices) == list(MACS)
+    # A viewer seeds itself from device_state, which must be as fresh as the feed
+    cutoff = datetime.utcnow() - timedelta(seconds=30)
+    assert all(scan_time >= cutoff for scan_time, _, _ in device_states(scanner.storage).values())
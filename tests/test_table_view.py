@@ -0,0 +1,117 @@
+"""
+The visualizer's device table: paging, sorting, filtering and the row cache.
+"""
+from bluetooth_scanner.visualizer import DeviceTableView
+
+def devices(count: int) -> list:
+    """Devices seen one second apart, the newest last; even ones are phones."""
+    return [
+        {
+            'mac_address': f'AA:BB:CC:DD:00:{index:02X}',
+            'device_name': f'Phone {index}' if index % 2 == 0 else f'Laptop {index}',
+            'device_type': 'mobile_phone' if index % 2 == 0 else 'laptop',
+            'is_mobile': index % 2 == 0,
+            'signal_strength': -40 - (index * 7) % 50,
+            'last_seen': 1000.0 + index,
+            'first_seen': 900.0
+        }
+        for index in range(count)
+    ]
+
+def names(view: DeviceTableView) -> list:
+    return [device['device_name'] for device in view.visible()]
+
+def test_pages_through_the_sorted_devices():
+    view = DeviceTableView(page_size=10)
+    view.update(devices(25), version=1)
+
+    assert view.total == 25
+    assert names(view)[0] == 'Phone 24'
+    assert view.caption().startswith("1-10 of 25 (page 1/3)")
+
+    view.handle_key('n')
+    view.handle_key('n')
+    assert view.caption().startswith("21-25 of 25 (page 3/3)")
+    assert names(view)[-1] == 'Phone 0'
+    # Paging past the end stays on the last page
+    view.handle_key('n')
+    assert view.offset == 20
+
+    view.handle_key('p')
+    assert view.offset == 10
+    view.handle_key('g')
+    assert view.offset == 0
+    view.handle_key('G')
+    assert view.offset == 20
+
+def test_shrinking_model_pulls_the_page_back():
+    view = DeviceTableView(page_size=10)
+    view.update(devices(25), version=1)
+    view.last_page()
+
+    view.update(devices(12), version=2)
+
+    assert view.offset == 10
+    assert len(view.visible()) == 2
+
+def test_sort_modes():
+    view = DeviceTableView(page_size=30)
+    view.update(devices(20), version=1)
+    view.next_page()
+
+    view.handle_key('s')
+    view.update(devices(20), version=1)
+    assert view.sort_mode == 'RSSI'
+    assert view.offset == 0
+    rssi = [device['signal_strength'] for device in view.visible()]
+    assert rssi == sorted(rssi, reverse=True)
+
+    view.handle_key('s')
+    view.update(devices(20), version=1)
+    assert view.sort_mode == 'mobile first'
+    assert [device['is_mobile'] for device in view.visible()] == [True] * 10 + [False] * 10
+    assert names(view)[:2] == ['Phone 18', 'Phone 16']
+
+    view.handle_key('s')
+    assert view.sort_mode == 'last seen'
+
+def test_filter_typed_after_slash():
+    view = DeviceTableView(page_size=10)
+    view.update(devices(25), version=1)
+
+    for key in '/lap':
+        view.handle_key(key)
+    view.update(devices(25), version=1)
+    assert view.total == 12
+    assert view.caption().endswith("filter: lap_")
+
+    view.handle_key('\x7f')
+    view.handle_key('\r')
+    view.update(devices(25), version=1)
+    assert view.filter_text == 'la'
+    assert not view.editing_filter
+
+    # While not editing, letters are commands again
+    assert view.handle_key('q') is False
+
+def test_unchanged_model_is_not_resorted():
+    view = DeviceTableView(page_size=10)
+    view.update(devices(5), version=1)
+
+    view.update([], version=1)
+    assert view.total == 5
+
+    view.update([], version=2)
+    assert view.total == 0
+    assert view.caption().startswith("no devices")
+
+def test_row_cells_are_cached_until_the_device_changes():
+    view = DeviceTableView()
+    device = devices(1)[0]
+
+    cells = view.cells(device)
+    assert view.cells(dict(device)) is cells
+
+    changed = view.cells({**device, 'signal_strength': -90})
+    assert changed is not cells
+    assert changed[3] == "-90 dBm"
@@ -0,0 +1,127 @@
+"""
+The write-behind queue: backpressure policies, flush and shutdown.
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+def record(index: int) -> tuple:
+    return (
+        {'mac_address': f'AA:BB:CC:DD:00:{index:02X}', 'signal_strength': -60, 'last_seen': time.time()},
+        {'device_type': 'mobile_phone', 'is_mobile': True}
+    )
+
+def stored_macs(db_path: str) -> list:
+    """Read the committed scan results over a separate connection."""
+    connection = sqlite3.connect(db_path)
+    try:
+        return [mac for mac, in connection.execute("SELECT device_mac FROM scan_results ORDER BY device_mac")]
+    finally:
+        connection.close()
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+@pytest.fixture
+def gated(make_context):
+    """A write-behind storage whose writer blocks in store_cycle until the gate opens."""
+    def make(**settings):
+        context = make_context(write_behind=True, write_batch_size=1, write_flush_interval=0.05, **settings)
+        storage = context.storage
+        store_cycle = storage.store_cycle
+
+        def gated_store_cycle(*args, **kwargs):
+            entered.set()
+            gate.wait(10)
+            return store_cycle(*args, **kwargs)
+
+        storage.store_cycle = gated_store_cycle
+        return storage, context.config.db_path
+
+    entered = threading.Event()
+    gate = threading.Event()
+    make.entered, make.gate = entered, gate
+    yield make
+    gate.set()
+
+def test_drop_oldest_discards_the_oldest_queued_records(gated):
+    storage, db_path = gated(write_queue_size=3, write_backpressure='drop_oldest')
+    storage.submit_cycle([record(0)])
+    assert gated.entered.wait(5)
+
+    # The writer is busy with record 0; seven more overflow a queue of three
+    storage.submit_cycle([record(index) for index in range(1, 8)])
+    assert storage.get_writer_stats()['dropped'] == 4
+    gated.gate.set()
+    storage.flush()
+
+    assert stored_macs(db_path) == [record(index)[0]['mac_address'] for index in (0, 5, 6, 7)]
+    stats = storage.get_writer_stats()
+    assert (stats['enqueued'], stats['written'], stats['queue_depth']) == (8, 4, 0)
+
+def test_block_waits_for_room_and_loses_nothing(gated):
+    storage, db_path = gated(write_queue_size=2, write_backpressure='block')
+    storage.submit_cycle([record(0)])
+    assert gated.entered.wait(5)
+
+    producer = threading.Thread(target=storage.submit_cycle, args=([record(index) for index in range(1, 6)],))
+    producer.start()
+    wait_until(lambda: storage.get_writer_stats()['queue_depth'] == 2)
+    producer.join(0.2)
+    assert producer.is_alive()
+
+    gated.gate.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    storage.flush()
+
+    assert len(stored_macs(db_path)) == 6
+    assert storage.get_writer_stats()['dropped'] == 0
+
+def test_flush_returns_once_records_are_committed(make_context):
+    context = make_context(write_behind=True, write_batch_size=1000, write_flush_interval=0.3)
+    storage = context.storage
+
+    storage.submit_cycle([record(index) for index in range(10)])
+    assert stored_macs(context.config.db_path) == []
+    storage.flush()
+
+    assert len(stored_macs(context.config.db_path)) == 10
+
+def test_stop_writer_drains_the_queue(make_context):
+    context = make_context(write_behind=True, write_batch_size=7, write_flush_interval=5.0)
+    storage = context.storage
+
+    for cycle in range(5):
+        storage.submit_cycle([record(cycle * 10 + index) for index in range(10)])
+    storage.stop_writer()
+
+    assert len(stored_macs(context.config.db_path)) == 50
+    assert storage.get_writer_stats()['written'] == 50
+
+    # Once stopped, submissions are stored synchronously
+    storage.submit_cycle([record(99)])
+    assert len(stored_macs(context.config.db_path)) == 51
+
+def test_stop_writer_stores_records_enqueued_as_it_exits(make_context):
+    context = make_context(write_behind=True)
+    storage = context.storage
+    writer = storage._writer
+
+    def join(timeout=None):
+        threading.Thread.join(writer, timeout)
+        # A producer that found the writer running, enqueuing after it exited
+        storage._write_queue.put((time.monotonic(), record(1), True))
+
+    writer.join = join
+    storage.submit_cycle([record(0)])
+    storage.stop_writer()
+
+    assert len(stored_macs(context.config.db_path)) == 2
+    stats = storage.get_writer_stats()
+    assert (stats['written'], stats['queue_depth']) == (2, 0)
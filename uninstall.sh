@@ -61,6 +61,12 @@ remove_data() {
         print_message "Database file not found" "$YELLOW"
     fi
     
+    # Remove advertisement payload segments
+    if [ -d "bluetooth_devices.adverts" ]; then
+        rm -rf bluetooth_devices.adverts
+        print_message "Removed advert store" "$GREEN"
+    fi
+    
     # Remove log files
     if [ -f "bluetooth_scanner.log" ]; then
         rm -f bluetooth_scanner.log